@@ -0,0 +1,165 @@
+"""
+Normalized-AST fingerprints for submitted programs.
+
+Identifiers are renamed in order of first use and comments, docstrings and
+formatting disappear, so two sources that differ only in those respects
+produce the same token stream. Block boundaries are tokens, so moving a
+statement in or out of a block changes the stream; names that also occur
+in keyword arguments, attributes, imports or strings are never renamed.
+Literal values are kept for fingerprints (they change behaviour) and
+dropped for similarity shingles.
+"""
+import ast
+import builtins
+import hashlib
+import io
+import keyword
+import re
+import tokenize
+
+SHINGLE_SIZE = 5
+
+# Builtins keep their names: renaming a builtin call changes the program.
+_KEEP_NAMES = frozenset(dir(builtins))
+
+
+def _is_docstring(body):
+    first = body[0] if body else None
+    return (isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant)
+            and isinstance(first.value.value, str))
+
+
+# Fields naming something the program itself binds; these are renamed.
+_NAME_FIELDS = frozenset({
+    ("Name", "id"), ("arg", "arg"), ("FunctionDef", "name"), ("AsyncFunctionDef", "name"),
+    ("ClassDef", "name"), ("Global", "names"), ("Nonlocal", "names"), ("ExceptHandler", "name"),
+    ("MatchAs", "name"), ("MatchStar", "name"), ("MatchMapping", "rest"), ("alias", "asname"),
+})
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def _fixed_names(tree):
+    """
+    Identifiers that must keep their spelling: anything that also appears
+    where renaming would change behaviour (keyword arguments, attributes,
+    imported names, words inside strings such as globals()["x"] or f"{x=}").
+    """
+    fixed = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.keyword) and node.arg:
+            fixed.add(node.arg)
+        elif isinstance(node, ast.Attribute):
+            fixed.add(node.attr)
+        elif isinstance(node, ast.alias):
+            fixed.update(node.name.split("."))
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            fixed.update(node.module.split("."))
+        elif isinstance(node, ast.MatchClass):
+            fixed.update(node.kwd_attrs)
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            fixed.update(_WORD.findall(node.value))
+    return fixed
+
+
+class _Normalizer:
+    """Pre-order walk emitting one token per node and a bracket pair around every list field."""
+
+    def __init__(self, literals, fixed=frozenset()):
+        self.literals = literals
+        self.fixed = fixed
+        self.tokens = []
+        self._names = {}
+
+    def _name(self, name):
+        if name in _KEEP_NAMES or name in self.fixed:
+            return name
+        if name not in self._names:
+            self._names[name] = f"v{len(self._names)}"
+        return self._names[name]
+
+    def _token(self, node):
+        tok = type(node).__name__
+        parts = [tok]
+        for field, value in ast.iter_fields(node):
+            if isinstance(node, ast.Constant) and field == "value":
+                parts.append(repr(value) if self.literals else type(value).__name__)
+            elif (tok, field) in _NAME_FIELDS:
+                if isinstance(value, list):
+                    parts.append(f"{field}={','.join(self._name(n) for n in value)}")
+                elif value is not None:
+                    parts.append(f"{field}={self._name(value)}")
+            elif isinstance(value, (str, int, float, complex, bytes)) or (
+                    isinstance(value, list) and value and not isinstance(value[0], ast.AST)):
+                # attribute and keyword names, import paths, levels, conversions, ...
+                parts.append(f"{field}={value!r}")
+        return ":".join(parts)
+
+    def visit(self, node):
+        if isinstance(node, ast.expr_context):
+            return
+        self.tokens.append(self._token(node))
+        for field, value in ast.iter_fields(node):
+            if isinstance(value, list):
+                if field == "body" and _is_docstring(value):
+                    value = value[1:]
+                # block boundaries make nesting (indentation) part of the stream
+                self.tokens.append(f"{field}[")
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        self.visit(item)
+                self.tokens.append("]")
+            elif isinstance(value, ast.AST):
+                self.visit(value)
+
+
+def _fallback_tokens(source, literals):
+    """Token stream for sources that do not parse (e.g. unfixed templates)."""
+    out, names = [], {}
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(source).readline):
+            if tok.type == tokenize.NAME:
+                if keyword.iskeyword(tok.string) or tok.string in _KEEP_NAMES:
+                    out.append(tok.string)
+                else:
+                    out.append(names.setdefault(tok.string, f"v{len(names)}"))
+            elif tok.type in (tokenize.NUMBER, tokenize.STRING):
+                out.append(tok.string if literals else tokenize.tok_name[tok.type])
+            elif tok.type in (tokenize.OP, tokenize.ERRORTOKEN):
+                out.append(tok.string)
+            elif tok.type in (tokenize.INDENT, tokenize.DEDENT):
+                out.append(tokenize.tok_name[tok.type])
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        pass
+    return out
+
+
+def normalized_tokens(source, literals=True):
+    """Return the normalized token stream for ``source``."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return _fallback_tokens(source, literals)
+    norm = _Normalizer(literals, _fixed_names(tree))
+    try:
+        norm.visit(tree)
+    except RecursionError:
+        return _fallback_tokens(source, literals)
+    return norm.tokens
+
+
+def shingles(source, k=SHINGLE_SIZE):
+    """Set of 64-bit hashes of the k-grams of the literal-free token stream."""
+    tokens = normalized_tokens(source, literals=False)
+    if len(tokens) < k:
+        tokens = tokens + [""] * (k - len(tokens))
+    out = set()
+    for i in range(len(tokens) - k + 1):
+        gram = "\x1f".join(tokens[i:i + k]).encode("utf-8")
+        out.add(int.from_bytes(hashlib.blake2b(gram, digest_size=8).digest(), "little"))
+    return out
+
+
+def fingerprint(source):
+    """Hex digest identifying ``source`` up to renaming, comments and formatting."""
+    data = "\x1e".join(normalized_tokens(source)).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Empirical complexity of a submission's entry function.
+
+The function is called on inputs of growing size n, each size in its own
+child interpreter and several sizes in parallel. Time per call (best of a
+few repetitions) and peak traced memory are fitted to the usual complexity
+classes; the class with the smallest relative error wins and its
+confidence is how clearly it beats the runner-up. A fit below
+MIN_CONFIDENCE is reported as inconclusive with both candidates. Larger
+sizes are cancelled as soon as one size goes over the time budget.
+
+Children run with the same file-size quota as contestant runs
+(run_workspace.QUOTA_GUARD), in a throwaway run workspace.
+
+Arguments are described by kinds, one per parameter:
+
+  int        n                       list       n random ints below n
+  str        string of length n      strlist    n distinct short strings
+  dict       n int keys -> ints      set        set of n ints
+  one        the constant 1          word       the constant "x"
+
+  python complexity_profiler.py submission.py --entry "total(list)"
+  python complexity_profiler.py submission.py --entry "add(one, list)" --budget 1
+"""
+import os
+import sys
+import json
+import math
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import run_workspace
+
+KINDS = ("int", "list", "str", "strlist", "dict", "set", "one", "word")
+DEFAULT_SIZES = tuple(2 ** k for k in range(3, 21))
+DEFAULT_BUDGET_S = 1.0
+# calls faster than this are mostly timer and call overhead
+MIN_FIT_SECONDS = 20e-6
+# below this a fit is reported as inconclusive: neighbouring classes such as
+# O(n) and O(n log n) are often this close on real timings
+MIN_CONFIDENCE = 0.3
+# peak memory that grows by less than this over all sizes is a constant baseline
+# (interpreter and allocator noise), not O(log n)
+MEMORY_SLACK_BYTES = 4096
+
+CLASSES = {
+    "O(1)": lambda n: 1.0,
+    "O(log n)": lambda n: math.log2(n),
+    "O(n)": lambda n: float(n),
+    "O(n log n)": lambda n: n * math.log2(n),
+    "O(n^2)": lambda n: float(n) ** 2,
+    "O(n^3)": lambda n: float(n) ** 3,
+}
+
+# Runs in the child: exec the submission quietly, build the input, time the entry.
+_HARNESS = r'''
+import io, sys, json, time, random, tracemalloc, contextlib
+source_path, entry, kinds, n, budget = sys.argv[1], sys.argv[2], sys.argv[3].split(","), int(sys.argv[4]), float(sys.argv[5])
+def make(kind, n, rng):
+    if kind == "int": return n
+    # random values, but the int objects are allocated in list order so walking
+    # the list measures the algorithm rather than cache misses
+    if kind == "list": return [rng.randrange(n) for _ in range(n)]
+    if kind == "str": return "".join(rng.choice("abcdefghij") for _ in range(n))
+    if kind == "strlist": return ["u%d" % i for i in range(n)]
+    if kind == "dict": return {i: i for i in range(n)}
+    if kind == "set": return set(range(n))
+    if kind == "one": return 1
+    if kind == "word": return "x"
+    raise ValueError("unknown kind " + kind)
+def args():
+    rng = random.Random(n)
+    return [make(k, n, rng) for k in kinds]
+with open(source_path, encoding="utf-8") as f:
+    code = compile(f.read(), "<submission>", "exec")
+ns = {"__name__": "__profiled__"}
+with contextlib.redirect_stdout(io.StringIO()):
+    exec(code, ns)
+func = ns[entry]
+best, spent, reps = float("inf"), 0.0, 0
+sink = io.StringIO()
+wall = time.perf_counter()
+# repeat short calls for a stable minimum; rebuilding big inputs must not eat the budget
+while reps < 50 and (reps == 0 or (spent < 0.05 and time.perf_counter() - wall < budget)):
+    a = args()
+    with contextlib.redirect_stdout(sink):
+        t0 = time.perf_counter()
+        func(*a)
+        dt = time.perf_counter() - t0
+    sink.seek(0); sink.truncate()
+    best, spent, reps = min(best, dt), spent + dt, reps + 1
+peak = None
+if best <= budget:
+    a = args()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    with contextlib.redirect_stdout(sink):
+        func(*a)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+print(json.dumps({"n": n, "seconds": best, "peak_bytes": peak, "reps": reps, "over_budget": best > budget}))
+'''
+
+
+def parse_entry(spec):
+    """'total(list)' -> ('total', ['list'])."""
+    name, _, rest = spec.strip().partition("(")
+    kinds = [k.strip() for k in rest.rstrip(")").split(",") if k.strip()]
+    unknown = [k for k in kinds if k not in KINDS]
+    if not name.isidentifier() or unknown:
+        raise ValueError(f"bad entry spec {spec!r}" + (f" (unknown kinds: {', '.join(unknown)})" if unknown else ""))
+    return name, kinds
+
+
+# ---------- FITTING ----------
+def _fit(ns, ys, f):
+    """Weighted least squares y ~ a + c*f(n) with relative error weights; returns (rel_rms, c)."""
+    xs = [f(n) for n in ns]
+    ws = [1.0 / max(y, 1e-12) ** 2 for y in ys]
+    sw = sum(ws)
+    mx = sum(w * x for w, x in zip(ws, xs)) / sw
+    my = sum(w * y for w, y in zip(ws, ys)) / sw
+    sxx = sum(w * (x - mx) ** 2 for w, x in zip(ws, xs))
+    if sxx == 0:
+        c, a = 0.0, my
+    else:
+        c = sum(w * (x - mx) * (y - my) for w, x, y in zip(ws, xs, ys)) / sxx
+        a = my - c * mx
+    if c < 0:
+        # a decreasing curve cannot be this class; fall back to a constant fit
+        c, a = 0.0, my
+    err = math.sqrt(sum(((a + c * x - y) / max(y, 1e-12)) ** 2 for x, y in zip(xs, ys)) / len(ys))
+    return err, c
+
+
+def fit_classes(ns, ys, slack=0.0):
+    """
+    {"class", "confidence", "candidates", "errors"} for measurements ``ys`` at sizes ``ns``.
+
+    Each class must also explain the growth from the smallest to the largest
+    size; classes that are too flat or too steep there are penalised. class
+    is None when the fit is inconclusive; candidates are then the two best
+    classes. Growth of at most ``slack`` over all sizes counts as O(1).
+    """
+    if len(ns) < 3:
+        return {"class": None, "confidence": 0.0, "candidates": [], "errors": {}}
+    if max(ys) - min(ys) <= slack:
+        return {"class": "O(1)", "confidence": 1.0, "candidates": ["O(1)"], "errors": {}}
+    errors = {}
+    span = math.log(max(ys[-1], 1e-12) / max(ys[0], 1e-12))
+    for name, f in CLASSES.items():
+        err, _ = _fit(ns, ys, f)
+        growth = math.log(max(f(ns[-1]), 1e-12) / max(f(ns[0]), 1e-12))
+        # mismatch between observed and predicted overall growth (log ratio)
+        errors[name] = err + 0.25 * abs(span - growth) / max(1.0, growth, abs(span))
+    ranked = sorted(errors, key=errors.get)
+    best, second = errors[ranked[0]], errors[ranked[1]]
+    confidence = (1.0 - best / second) if second > 0 else 1.0
+    # few points or a short size range leave room for doubt
+    confidence *= min(1.0, len(ns) / 6.0) * min(1.0, math.log2(ns[-1] / ns[0]) / 8.0)
+    conclusive = confidence >= MIN_CONFIDENCE
+    return {"class": ranked[0] if conclusive else None, "confidence": round(max(0.0, confidence), 3),
+            "candidates": ranked[:1] if conclusive else ranked[:2],
+            "errors": {k: round(v, 4) for k, v in errors.items()}}
+
+
+# ---------- RUNNING ----------
+def profile(source, entry, kinds, sizes=DEFAULT_SIZES, budget_s=DEFAULT_BUDGET_S, workers=None, cwd=None):
+    """
+    Profile ``entry(*kinds)`` from ``source``; see the module docstring.
+
+    Returns {"entry", "points": [{"n", "seconds", "peak_bytes"}], "time": fit,
+    "memory": fit, "stopped_at": first size over budget or None, "errors": [...]}.
+    """
+    # leave cores for the IDE and keep contention between sizes low
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    sizes = sorted(set(sizes))
+    stop = {"n": None}
+    lock = threading.Lock()
+    running = {}
+    points, errors = [], []
+
+    # contestant code: same file-size quota and throwaway directory as a normal run
+    workspace = cwd or run_workspace.create("profile")
+    env = dict(os.environ, **run_workspace.environment())
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            src_path = os.path.join(tmp, "submission.py")
+            harness_path = os.path.join(tmp, "harness.py")
+            with open(src_path, "w", encoding="utf-8") as f:
+                f.write(source)
+            with open(harness_path, "w", encoding="utf-8") as f:
+                f.write(run_workspace.QUOTA_GUARD + _HARNESS)
+
+            def run(n):
+                with lock:
+                    if stop["n"] is not None and n > stop["n"]:
+                        return
+                    proc = subprocess.Popen(
+                        [sys.executable, "-I", "-X", "utf8", harness_path, src_path, entry, ",".join(kinds),
+                         str(n), str(budget_s)],
+                        stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=workspace, env=env)
+                    running[proc] = n
+                try:
+                    # building the input and the memory pass also take time
+                    out, err = proc.communicate(timeout=budget_s * 4 + 5)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.communicate()
+                    out, err = b"", b""
+                    result = {"n": n, "over_budget": True, "seconds": None, "peak_bytes": None}
+                else:
+                    try:
+                        result = json.loads(out.decode("utf-8").strip().splitlines()[-1])
+                    except (ValueError, IndexError):
+                        result = None
+                with lock:
+                    running.pop(proc, None)
+                    if result is None:
+                        if stop["n"] is None or n < stop["n"]:
+                            errors.append({"n": n, "error": err.decode("utf-8", errors="replace").strip()[-500:]})
+                        return
+                    if result["over_budget"]:
+                        if stop["n"] is None or n < stop["n"]:
+                            stop["n"] = n
+                        # larger sizes can only be slower
+                        for other, m in list(running.items()):
+                            if m > n:
+                                other.kill()
+                        return
+                    points.append(result)
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for n in sizes:
+                    pool.submit(run, n)
+    finally:
+        if not cwd:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    stop_n = stop["n"]
+    points = sorted((p for p in points if stop_n is None or p["n"] < stop_n), key=lambda p: p["n"])
+    errors = [e for e in errors if stop_n is None or e["n"] < stop_n]
+    timed = [p for p in points if p["seconds"] >= MIN_FIT_SECONDS]
+    if len(timed) < 4:
+        timed = points[-4:]
+    mem = [(p["n"], max(p["peak_bytes"] or 0, 1)) for p in points if p["peak_bytes"] is not None]
+    return {
+        "entry": f"{entry}({', '.join(kinds)})",
+        "points": [{"n": p["n"], "seconds": p["seconds"], "peak_bytes": p["peak_bytes"]} for p in points],
+        "time": fit_classes([p["n"] for p in timed], [max(p["seconds"], 1e-9) for p in timed]),
+        "memory": fit_classes([n for n, _ in mem], [b for _, b in mem], MEMORY_SLACK_BYTES),
+        "stopped_at": stop_n,
+        "errors": errors,
+    }
+
+
+def _verdict(fit):
+    if fit["class"]:
+        return fit["class"]
+    if fit.get("candidates"):
+        return "inconclusive (" + " or ".join(fit["candidates"]) + ")"
+    return "?"
+
+
+def format_report(report):
+    t, m = report["time"], report["memory"]
+    lines = [f"Complexity of {report['entry']}:",
+             f"  time    {_verdict(t)}  (confidence {t['confidence']:.2f})",
+             f"  memory  {_verdict(m)}  (confidence {m['confidence']:.2f})",
+             f"  {'n':>9s} {'time/call':>12s} {'peak mem':>12s}"]
+    for p in report["points"]:
+        peak = f"{p['peak_bytes']:,} B" if p["peak_bytes"] is not None else "-"
+        lines.append(f"  {p['n']:>9,} {p['seconds'] * 1000:>9.3f} ms {peak:>12s}")
+    if report["stopped_at"] is not None:
+        lines.append(f"  stopped: n = {report['stopped_at']:,} went over the time budget")
+    for e in report["errors"][:3]:
+        lines.append(f"  error at n = {e['n']:,}: {e['error'].splitlines()[-1] if e['error'] else 'no result'}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate the time and memory complexity of a function.")
+    parser.add_argument("script")
+    parser.add_argument("--entry", required=True, help='entry function and argument kinds, e.g. "total(list)"')
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_S, help="seconds per call before stopping")
+    parser.add_argument("--max-size", type=int, default=DEFAULT_SIZES[-1])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print the raw report")
+    args = parser.parse_args(argv)
+    name, kinds = parse_entry(args.entry)
+    with open(args.script, encoding="utf-8") as f:
+        source = f.read()
+    sizes = [n for n in DEFAULT_SIZES if n <= args.max_size]
+    report = profile(source, name, kinds, sizes, args.budget, args.workers)
+    print(json.dumps(report, indent=1) if args.json else format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Differential fuzzing of a fixed template against its reference solution.
+
+A fix can print the right answer for the template's one hard-coded call
+and still be wrong elsewhere. For every template in REFERENCES this module
+generates random inputs, either the arguments of a sequence of calls to the
+template's function or the value of a top-level variable such as ``data``,
+and compares what the submission and the reference do with them: return
+values, printed output and exception types. Worker processes each load both
+programs once and run cases back to back; the first worker to see a
+divergence shrinks it to a minimal input and the others are stopped.
+Workers report on a private copy of their stdout (the submission's own
+writes to fd 1 go to the null device), discard what the submission writes
+to stderr, and run under the same file-size quota as a normal run, in a
+throwaway run workspace.
+
+  python differential_tester.py submission.py --template prog13
+  python differential_tester.py submission.py --template prog1 --cases 50000 --workers 4
+"""
+import os
+import sys
+import ast
+import copy
+import json
+import time
+import random
+import shutil
+import signal
+import argparse
+import builtins
+import threading
+import subprocess
+import contextlib
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CASES = 20000
+DEFAULT_BUDGET_S = 5.0
+# one case may not take longer than this (POSIX only)
+CASE_TIMEOUT_S = 0.5
+# a worker still running this long after its budget is killed; on Windows
+# there is no per-case limit, so this is what stops an endless loop
+WORKER_GRACE_S = 10.0
+SHRINK_STEPS = 2000
+# bytes of a worker's stderr kept for the error message
+STDERR_TAIL = 4096
+_INPUTS = "__mnmj_inputs__"
+
+
+# ---------- GENERATORS ----------
+def _int(rng):
+    # mostly small values, where off-by-one and sign mistakes show
+    return rng.randint(-10, 10) if rng.random() < 0.8 else rng.randint(-10 ** 6, 10 ** 6)
+
+
+def _int_list(rng):
+    return [_int(rng) for _ in range(rng.randint(0, 8))]
+
+
+def _word(rng):
+    return "".join(rng.choice("abcxyz AZ") for _ in range(rng.randint(0, 9)))
+
+
+def _calls(make_args):
+    """Several calls on one freshly loaded module, so state leaking between calls shows."""
+    return lambda rng: [make_args(rng) for _ in range(rng.randint(1, 4))]
+
+
+def _register_args(rng):
+    if rng.random() < 0.5:
+        return (_word(rng),)
+    return (_word(rng), [_word(rng) for _ in range(rng.randint(0, 4))])
+
+
+# Fixed templates and what to fuzz in them: "entry" + "calls" (list of
+# argument tuples per case) or "inputs" (top-level variable -> value).
+# Templates whose blank has more than one valid fix in behaviour are absent.
+REFERENCES = {
+    "prog1": {
+        "code": "def add(x, lst=None):\n    if lst is None:\n        lst = []\n    lst.append(x)\n    return lst\n"
+                "print(add(1))\nprint(add(2))\n",
+        "entry": "add", "calls": _calls(lambda rng: (_int(rng),)),
+    },
+    "prog3": {
+        "code": "def register_user(user, users=None):\n    if users is None:\n        users = []\n"
+                "    if user not in users:\n        users.append(user)\n    return users\n"
+                "print(register_user(\"Alice\"))\nprint(register_user(\"Bob\"))\n",
+        "entry": "register_user", "calls": _calls(_register_args),
+    },
+    "prog6": {
+        "code": "x = 7\nif x % 2 == 1:\n    print(\"Odd\")\nelse:\n    print(\"Even\")\n",
+        "inputs": {"x": _int},
+    },
+    "prog9": {
+        "code": "def check_len(s):\n    if len(s) >= 5:\n        return \"Long\"\n    return \"Short\"\n"
+                "print(check_len(\"Hello\"))\n",
+        "entry": "check_len", "calls": _calls(lambda rng: (_word(rng),)),
+    },
+    "prog10": {
+        "code": "list = [1, 2, 3]\ndef total(items):\n    return sum(items)\nprint(total(list))\n",
+        "entry": "total", "calls": _calls(lambda rng: (_int_list(rng),)),
+    },
+    "prog11": {
+        "code": "data = {\"x\": 10, \"y\": 20}\nprint(data.get(\"x\"))\n",
+        "inputs": {"data": lambda rng: {k: _int(rng) for k in "xyz" if rng.random() < 0.6}},
+    },
+    "prog13": {
+        "code": "data = [1, 2, 2, 3, 4, 3]\nresult = []\nfor x in data:\n    if x not in result:\n"
+                "        result.append(x)\nprint(result)\n",
+        "inputs": {"data": lambda rng: [rng.randint(0, 5) for _ in range(rng.randint(0, 10))]},
+    },
+    "prog14": {
+        "code": "nums = [2, 4, 6]\ntotal = 0\nfor n in nums:\n    total += n\nprint(total)\n",
+        "inputs": {"nums": _int_list},
+    },
+    "prog15": {
+        "code": "x = 10\ndef change():\n    global x\n    x += 5\nchange()\nprint(x)\n",
+        "inputs": {"x": _int},
+    },
+}
+
+
+def generate(spec, seed):
+    rng = random.Random(seed)
+    if "calls" in spec:
+        return spec["calls"](rng)
+    return {name: make(rng) for name, make in spec["inputs"].items()}
+
+
+# ---------- PREPARING CODE ----------
+def prepare(source, spec):
+    """
+    Code object for ``source`` with the fuzzed top-level assignments reading
+    from the injected inputs. Raises SyntaxError, or ValueError when the
+    program no longer has something this spec fuzzes.
+    """
+    tree = ast.parse(source)
+    if "inputs" in spec:
+        missing = set(spec["inputs"])
+        for node in tree.body:
+            if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                    and isinstance(node.targets[0], ast.Name) and node.targets[0].id in missing):
+                name = node.targets[0].id
+                node.value = ast.Subscript(value=ast.Name(id=_INPUTS, ctx=ast.Load()),
+                                           slice=ast.Constant(value=name), ctx=ast.Load())
+                missing.discard(name)
+        if missing:
+            raise ValueError(f"no top-level assignment to {', '.join(sorted(missing))}")
+        ast.fix_missing_locations(tree)
+    elif not any(isinstance(node, ast.FunctionDef) and node.name == spec["entry"] for node in tree.body):
+        raise ValueError(f"no function {spec['entry']}()")
+    return compile(tree, "<fuzzed>", "exec")
+
+
+# ---------- RUNNING ONE CASE (worker side) ----------
+class _CaseTimeout(BaseException):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise _CaseTimeout()
+
+
+@contextlib.contextmanager
+def _time_limit():
+    if not hasattr(signal, "setitimer"):
+        yield
+        return
+    signal.setitimer(signal.ITIMER_REAL, CASE_TIMEOUT_S)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class _Discard:
+    """Write-only text stream that keeps nothing."""
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def _attempt(func):
+    """("ok", repr) / ("raise", exception type) / ("timeout",) and the printed text."""
+    out = StringIO()
+    try:
+        # stderr is not compared, and a chatty submission must not fill the worker's pipe
+        with _time_limit(), contextlib.redirect_stdout(out), contextlib.redirect_stderr(_Discard()):
+            value = func()
+        result = ("ok", repr(value))
+    except _CaseTimeout:
+        result = ("timeout",)
+    except KeyboardInterrupt:
+        raise
+    except BaseException as e:
+        result = ("raise", type(e).__name__)
+    return result, out.getvalue()
+
+
+def outcome(code, spec, value):
+    """Everything observable about one case, as a JSON-friendly list."""
+    value = copy.deepcopy(value)
+    ns = {"__name__": "__fuzzed__", "__builtins__": builtins, _INPUTS: value}
+    loaded, printed = _attempt(lambda: exec(code, ns))
+    if "inputs" in spec:
+        return [*loaded, printed]
+    # the demo lines at the bottom may print or fail differently; only the function counts
+    func = ns.get(spec["entry"])
+    if not callable(func):
+        return ["no entry"]
+    calls = []
+    for args in value:
+        result, printed = _attempt(lambda: func(*args))
+        calls.append([*result, printed])
+        if result[0] == "timeout":
+            break
+    return calls
+
+
+# ---------- SHRINKING ----------
+def _candidates(value):
+    """Simpler variants of ``value``, simplest first."""
+    if isinstance(value, bool):
+        if value:
+            yield False
+    elif isinstance(value, int):
+        if value != 0:
+            yield 0
+            if abs(value) > 1:
+                yield value // 2 if value > 0 else -(-value // 2)
+            yield value - 1 if value > 0 else value + 1
+    elif isinstance(value, str):
+        if value:
+            yield ""
+            if len(value) > 1:
+                yield value[:len(value) // 2]
+                yield value[len(value) // 2:]
+            for i in range(len(value)):
+                yield value[:i] + value[i + 1:]
+            for i, ch in enumerate(value):
+                if ch != "a":
+                    yield value[:i] + "a" + value[i + 1:]
+    elif isinstance(value, tuple):
+        # argument tuples keep their arity
+        for i, item in enumerate(value):
+            for smaller in _candidates(item):
+                yield value[:i] + (smaller,) + value[i + 1:]
+    elif isinstance(value, list):
+        if len(value) > 1:
+            yield value[:len(value) // 2]
+            yield value[len(value) // 2:]
+        for i in range(len(value)):
+            yield value[:i] + value[i + 1:]
+        for i, item in enumerate(value):
+            for smaller in _candidates(item):
+                yield value[:i] + [smaller] + value[i + 1:]
+    elif isinstance(value, dict):
+        for key in value:
+            yield {k: v for k, v in value.items() if k != key}
+        for key, item in value.items():
+            for smaller in _candidates(item):
+                yield {**value, key: smaller}
+
+
+def shrink(value, fails, steps=SHRINK_STEPS):
+    """Greedy shrink: keep the first simpler variant that still fails until none does."""
+    improved = True
+    while improved and steps > 0:
+        improved = False
+        for candidate in _candidates(value):
+            steps -= 1
+            if fails(candidate):
+                value, improved = candidate, True
+                break
+            if steps <= 0:
+                break
+    return value
+
+
+# the worker's report stream: a copy of its original stdout (see _worker)
+_protocol = sys.stdout
+
+
+def _emit(obj):
+    _protocol.write(json.dumps(obj) + "\n")
+    _protocol.flush()
+
+
+def _worker():
+    """Child process: read one job from stdin, run its seed range, report on stdout."""
+    global _protocol
+    job = json.loads(sys.stdin.read())
+    sys.stdin = StringIO("")
+    # keep the report stream on a private fd; the submission's os.write(1, ...) goes nowhere
+    _protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    null_fd = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(null_fd, 1)
+    os.close(null_fd)
+    sys.stdout = _Discard()
+    exec(job.get("guard", ""), {})
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGALRM, _on_alarm)
+    spec = REFERENCES[job["template"]]
+    submission = prepare(job["submission"], spec)
+    reference = prepare(spec["code"], spec)
+    deadline = time.perf_counter() + job["budget_s"]
+    cases = 0
+    for seed in range(job["start"], job["start"] + job["count"]):
+        value = generate(spec, seed)
+        got, want = outcome(submission, spec, value), outcome(reference, spec, value)
+        cases += 1
+        if got != want:
+            _emit({"type": "found", "seed": seed})
+            small = shrink(value, lambda v: outcome(submission, spec, v) != outcome(reference, spec, v))
+            _emit({"type": "mismatch", "seed": seed, "cases": cases, "input": repr(small),
+                   "submission": outcome(submission, spec, small), "reference": outcome(reference, spec, small)})
+            return 0
+        if cases % 256 == 0 and time.perf_counter() > deadline:
+            break
+    _emit({"type": "done", "cases": cases})
+    return 0
+
+
+# ---------- DRIVER ----------
+def fuzz(source, template, cases=DEFAULT_CASES, budget_s=DEFAULT_BUDGET_S, workers=None, seed=0):
+    """
+    Compare ``source`` with the reference fix of ``template`` on ``cases`` inputs.
+
+    Returns {"template", "cases", "seconds", "mismatch": None or {"input",
+    "submission", "reference", "seed"}, "error": None or str}.
+    """
+    report = {"template": template, "cases": 0, "seconds": 0.0, "mismatch": None, "error": None}
+    spec = REFERENCES.get(template)
+    if spec is None:
+        report["error"] = f"no reference solution for {template}"
+        return report
+    try:
+        prepare(source, spec)
+    except SyntaxError as e:
+        report["error"] = f"syntax error on line {e.lineno}"
+        return report
+    except ValueError as e:
+        report["error"] = str(e)
+        return report
+
+    # the parent only: workers run isolated (-I) and get the guard in their job
+    import run_workspace
+    workers = max(1, min(workers or os.cpu_count() or 1, cases))
+    per_worker = -(-cases // workers)
+    lock = threading.Lock()
+    procs, errors = [], []
+    start = time.perf_counter()
+    # submissions may write files: same quota and throwaway directory as a normal run
+    workspace = run_workspace.create("fuzz")
+    env = dict(os.environ, **run_workspace.environment())
+
+    def run(index):
+        job = {"template": template, "submission": source, "budget_s": budget_s, "guard": run_workspace.QUOTA_GUARD,
+               "start": seed + index * per_worker, "count": min(per_worker, cases - index * per_worker)}
+        with lock:
+            if report["mismatch"] is not None:
+                return
+            proc = subprocess.Popen([sys.executable, "-I", "-X", "utf8", os.path.abspath(__file__), "--worker"],
+                                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    cwd=workspace, env=env)
+            procs.append(proc)
+        expired = threading.Event()
+        err = bytearray()
+
+        def drain():
+            # read stderr as it comes so the worker never blocks on a full pipe
+            for chunk in iter(lambda: proc.stderr.read1(STDERR_TAIL), b""):
+                err.extend(chunk)
+                del err[:-STDERR_TAIL]
+
+        drainer = threading.Thread(target=drain, daemon=True)
+        drainer.start()
+
+        def expire():
+            expired.set()
+            proc.kill()
+
+        killer = threading.Timer(budget_s + WORKER_GRACE_S, expire)
+        killer.daemon = True
+        killer.start()
+        try:
+            proc.stdin.write(json.dumps(job).encode("utf-8"))
+            proc.stdin.close()
+        except OSError:
+            pass
+        finished = malformed = False
+        for line in proc.stdout:
+            try:
+                event = json.loads(line)
+                event["type"]
+            except (ValueError, TypeError, KeyError):
+                malformed = True
+                proc.kill()
+                break
+            with lock:
+                if event["type"] == "found" and report["mismatch"] is None:
+                    # first divergence wins; nobody else needs to keep going
+                    for other in procs:
+                        if other is not proc:
+                            other.kill()
+                elif event["type"] == "mismatch":
+                    report["cases"] += event["cases"]
+                    if report["mismatch"] is None:
+                        report["mismatch"] = {k: event[k] for k in ("input", "submission", "reference", "seed")}
+                elif event["type"] == "done":
+                    report["cases"] += event["cases"]
+                finished = finished or event["type"] in ("mismatch", "done")
+        killer.cancel()
+        code = proc.wait()
+        drainer.join()
+        err = err.decode("utf-8", errors="replace").strip()
+        if malformed:
+            errors.append("a worker sent an unreadable report")
+        elif expired.is_set() and not finished and report["mismatch"] is None:
+            errors.append(f"a case did not finish within {budget_s + WORKER_GRACE_S:.0f} s (endless loop?)")
+        elif code != 0 and err:
+            errors.append(err.splitlines()[-1])
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run, range(workers)))
+    finally:
+        # nothing may outlive fuzz(), whatever went wrong in a worker thread
+        with lock:
+            for proc in procs:
+                if proc.poll() is None:
+                    proc.kill()
+        shutil.rmtree(workspace, ignore_errors=True)
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    if report["mismatch"] is None and errors:
+        report["error"] = errors[0]
+    return report
+
+
+def _describe(result):
+    if not isinstance(result, list) or not result:
+        return repr(result)
+    if isinstance(result[0], list):
+        return "; ".join(_describe(call) for call in result)
+    kind, rest = result[0], result[1:]
+    printed = rest[-1] if rest and isinstance(rest[-1], str) else ""
+    text = {"ok": f"returned {rest[0]}" if rest[0] != "None" else "ok",
+            "raise": f"raised {rest[0]}" if rest else "raised",
+            "timeout": "timed out"}.get(kind, kind)
+    return text + (f", printed {printed!r}" if printed else "")
+
+
+def format_report(report):
+    if report["error"]:
+        return f"Fuzzing {report['template']}: {report['error']}"
+    rate = report["cases"] / report["seconds"] if report["seconds"] else 0.0
+    head = f"Fuzzing {report['template']}: {report['cases']:,} cases in {report['seconds']:.2f} s ({rate:,.0f}/s)"
+    m = report["mismatch"]
+    if m is None:
+        return head + " — no difference from the reference"
+    return "\n".join([head + " — DIFFERENT from the reference",
+                      f"  smallest failing input: {m['input']}",
+                      f"  your code:  {_describe(m['submission'])}",
+                      f"  reference:  {_describe(m['reference'])}"])
+
+
+def main(argv=None):
+    if argv is None and sys.argv[1:] == ["--worker"]:
+        return _worker()
+    parser = argparse.ArgumentParser(description="Fuzz a fixed template against its reference solution.")
+    parser.add_argument("script")
+    parser.add_argument("--template", required=True, choices=sorted(REFERENCES))
+    parser.add_argument("--cases", type=int, default=DEFAULT_CASES)
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET_S, help="seconds per worker")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the raw report")
+    args = parser.parse_args(argv)
+    with open(args.script, encoding="utf-8") as f:
+        source = f.read()
+    report = fuzz(source, args.template, args.cases, args.budget, args.workers, args.seed)
+    print(json.dumps(report, indent=1) if args.json else format_report(report))
+    return 1 if report["mismatch"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Structured records of uncaught exceptions in contestant runs.
+
+The console shows contestants only "Error occurred", so stderr is no use
+to judges, and scraping traceback text would be fragile. FAILURE_GUARD
+is part of the run guard: when the IDE sets MNMJ_FAILURE_OUT it replaces
+sys.excepthook with one that appends a compact JSON line for the uncaught
+exception to that file (a side channel in the run's workspace, apart from
+stderr) and then calls the normal hook. Only frames in the contestant's
+own file are kept:
+
+  {"type": "ZeroDivisionError", "line": 7, "depth": 2,
+   "frames": [["<module>", 9], ["avg", 7]]}
+
+Line numbers are in the script as executed; read_records() shifts them
+back to the editor's numbering.
+"""
+import os
+import json
+
+# frames kept per record: the outermost few and the innermost few (deep recursion)
+MAX_FRAMES = 8
+
+FAILURE_GUARD = (
+    "def _mnmj_failures():\n"
+    "    import os, sys\n"
+    "    out = os.environ.get('MNMJ_FAILURE_OUT')\n"
+    "    if not out:\n"
+    "        return\n"
+    "    main_file = sys._getframe(1).f_code.co_filename\n"
+    "    previous = sys.excepthook\n"
+    "    def hook(exc_type, exc, tb):\n"
+    "        try:\n"
+    "            import json\n"
+    "            frames = []\n"
+    "            while tb is not None:\n"
+    "                code = tb.tb_frame.f_code\n"
+    "                if code.co_filename == main_file:\n"
+    "                    frames.append((code.co_name, tb.tb_lineno))\n"
+    "                tb = tb.tb_next\n"
+    f"            kept = frames if len(frames) <= {MAX_FRAMES} else frames[:{MAX_FRAMES // 2}] + frames[-{MAX_FRAMES // 2}:]\n"
+    "            record = {'type': exc_type.__name__, 'line': frames[-1][1] if frames else None,\n"
+    "                      'depth': len(frames), 'frames': kept}\n"
+    "            with open(out, 'a') as f:\n"
+    "                f.write(json.dumps(record) + '\\n')\n"
+    "        except Exception:\n"
+    "            pass\n"
+    "        previous(exc_type, exc, tb)\n"
+    "    sys.excepthook = hook\n"
+    "_mnmj_failures()\n"
+    "del _mnmj_failures\n"
+)
+
+
+def environment(out_path):
+    """Child environment variables that switch FAILURE_GUARD on."""
+    return {"MNMJ_FAILURE_OUT": out_path}
+
+
+def signature(record):
+    """Short key that groups the same failure mode, e.g. 'ZeroDivisionError @ line 7 in avg'."""
+    where = f" @ line {record['line']}" if record.get("line") is not None else ""
+    frames = record.get("frames") or []
+    if frames and frames[-1][0] != "<module>":
+        where += f" in {frames[-1][0]}"
+    return record["type"] + where
+
+
+def read_records(out_path, line_offset=0):
+    """Records written by the child, with lines shifted by ``line_offset``; [] when none."""
+    try:
+        with open(out_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+    records = []
+    for text in lines:
+        try:
+            record = json.loads(text)
+            if record.get("line") is not None:
+                record["line"] -= line_offset
+            record["frames"] = [[name, lineno - line_offset] for name, lineno in record.get("frames", [])]
+        except (ValueError, TypeError, KeyError, AttributeError):
+            continue
+        records.append(record)
+    try:
+        os.remove(out_path)
+    except OSError:
+        pass
+    return records
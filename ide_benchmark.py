@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Headless benchmarks for the IDE's hot paths.
+
+Runs under QT_QPA_PLATFORM=offscreen and measures:
+  cold_start_ms          process launch -> first paint of the IDE window
+  run_first_output_ms    run_code() -> first chunk delivered to read_stdout
+  template_load_ms       load_program_template() latency (first and cached)
+  output_throughput      lines/s rendered through read_stdout
+  memory_growth_kib      RSS growth over a long sequence of runs
+
+Results are written as JSON with sorted keys so runs can be diffed and
+compared with --compare against a stored baseline. --load N drives up to N
+IDE instances at once (1, 2, 4, ... N) and reports how many a PC can host
+before Run latency degrades past --load-threshold.
+
+Examples:
+  python ide_benchmark.py --output baseline.json
+  python ide_benchmark.py --compare baseline.json
+  python ide_benchmark.py --load 16
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Files the IDE keeps between runs; benchmarks point them at temp paths so the
+# station's real snapshot, results, archive and reference cache are never touched.
+STATE_FILES = {
+    "MNMJ_SESSION_FILE": "session.json",
+    "MNMJ_RESULTS_DB": "results.sqlite3",
+    "MNMJ_ARCHIVE_DB": "sources.sqlite3",
+    "MNMJ_REFERENCE_CACHE": "reference_fixes.json",
+}
+
+
+def _state_env(tag):
+    prefix = os.path.join(tempfile.gettempdir(), f"mnmj_bench_{tag}_")
+    return {name: prefix + suffix for name, suffix in STATE_FILES.items()}
+
+
+def _remove_state(env):
+    """Delete the state files named in ``env``, with SQLite's WAL side files."""
+    for name in STATE_FILES:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            try:
+                os.remove(env[name] + suffix)
+            except (KeyError, OSError):
+                pass
+
+
+# children get theirs from _child_env and the parent removes them
+if not os.environ.get("MNMJ_BENCH_CHILD"):
+    os.environ.update(_state_env(os.getpid()))
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+SCHEMA_VERSION = 1
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# ---------- HELPERS ----------
+def _rss_bytes():
+    """Resident set size of this process, or 0 if it cannot be read."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+
+def _child_env(tag):
+    """Environment for a child IDE process with state files of its own."""
+    env = dict(os.environ, MNMJ_BENCH_CHILD="1")
+    env.update(_state_env(f"{os.getpid()}_{tag}"))
+    return env
+
+
+def _summary(samples, unit, better="lower"):
+    return {
+        "unit": unit,
+        "better": better,
+        "n": len(samples),
+        "min": round(min(samples), 3),
+        "median": round(statistics.median(samples), 3),
+        "max": round(max(samples), 3),
+    }
+
+
+def _make_ide():
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    sys.path.insert(0, HERE)
+    import offline_python_ide
+    ide = offline_python_ide.OfflinePythonIDE()
+    ide.show()
+    return app, ide
+
+
+def _wait_until(app, predicate, timeout_s=30.0):
+    from PyQt5.QtCore import QEventLoop
+    deadline = time.perf_counter() + timeout_s
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark step timed out")
+        app.processEvents(QEventLoop.AllEvents, 5)
+
+
+def _reset(ide):
+    """Bring the IDE back to an idle, unlocked editor between samples."""
+    ide.exam_lock_active = False
+    ide.current_template = None
+    ide.runtime_error = False
+    ide.editor.setReadOnly(False)
+    ide.editor.clear()
+    ide.output.clear()
+
+
+def _run_and_wait(app, ide, code, timeout_s=60.0):
+    """Start a run and return (ms to first stdout chunk, ms to finished)."""
+    from PyQt5.QtCore import QProcess
+    state = {"first": None, "done": None}
+
+    def on_stdout():
+        if state["first"] is None:
+            state["first"] = time.perf_counter()
+
+    def on_finished(*_):
+        state["done"] = time.perf_counter()
+
+    # connected before the IDE's own slots run for the next chunk
+    ide.process.readyReadStandardOutput.connect(on_stdout)
+    ide.process.finished.connect(on_finished)
+    try:
+        _reset(ide)
+        ide.editor.setPlainText(code)
+        t0 = time.perf_counter()
+        ide.run_code()
+        _wait_until(app, lambda: state["done"] is not None, timeout_s)
+        _wait_until(app, lambda: ide.process.state() == QProcess.NotRunning, timeout_s)
+    finally:
+        ide.process.readyReadStandardOutput.disconnect(on_stdout)
+        ide.process.finished.disconnect(on_finished)
+    first = state["first"] if state["first"] is not None else state["done"]
+    return (first - t0) * 1000.0, (state["done"] - t0) * 1000.0
+
+
+# ---------- BENCHMARKS ----------
+def bench_cold_start(repeat):
+    samples = []
+    for i in range(repeat):
+        env = _child_env(f"cold{i}")
+        t0 = time.perf_counter()
+        child = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--cold-start-child"],
+                                 stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env)
+        line = child.stdout.readline()
+        elapsed = (time.perf_counter() - t0) * 1000.0
+        child.wait(timeout=30)
+        _remove_state(env)
+        if line.strip() == "PAINTED":
+            samples.append(elapsed)
+    return {"cold_start_ms": _summary(samples, "ms")} if samples else {}
+
+
+def _cold_start_child():
+    from PyQt5.QtCore import QObject, QEvent
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    sys.path.insert(0, HERE)
+    import offline_python_ide
+
+    class _PaintProbe(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                sys.stdout.write("PAINTED\n")
+                sys.stdout.flush()
+                os._exit(0)
+            return False
+
+    ide = offline_python_ide.OfflinePythonIDE()
+    probe = _PaintProbe()
+    ide.installEventFilter(probe)
+    ide.show()
+    app.exec_()
+
+
+def bench_run_first_output(app, ide, repeat):
+    samples = [_run_and_wait(app, ide, "print('ready')")[0] for _ in range(repeat)]
+    return {"run_first_output_ms": _summary(samples, "ms")}
+
+
+def bench_template_load(app, ide, repeat):
+    first, cached = [], []
+    for key in sorted(ide.PROGRAM_TEMPLATES):
+        for i in range(max(2, repeat)):
+            _reset(ide)
+            t0 = time.perf_counter()
+            ide.load_program_template(key)
+            app.processEvents()
+            elapsed = (time.perf_counter() - t0) * 1000.0
+            (first if i == 0 else cached).append(elapsed)
+    _reset(ide)
+    return {
+        "template_load_first_ms": _summary(first, "ms"),
+        "template_load_cached_ms": _summary(cached, "ms"),
+    }
+
+
+def bench_output_throughput(app, ide, repeat, lines=100_000):
+    code = f"for i in range({lines}):\n    print('line', i)\n"
+    samples = []
+    for _ in range(repeat):
+        _, total_ms = _run_and_wait(app, ide, code)
+        samples.append(lines / (total_ms / 1000.0))
+    return {"output_throughput_lines_per_s": _summary(samples, "lines/s", better="higher")}
+
+
+def bench_memory_growth(app, ide, runs):
+    _run_and_wait(app, ide, "print('warmup')")
+    before = _rss_bytes()
+    for i in range(runs):
+        _run_and_wait(app, ide, f"for i in range(2000):\n    print({i}, i)\n")
+    after = _rss_bytes()
+    growth = (after - before) / 1024.0
+    return {
+        "memory_growth_kib": _summary([growth], "KiB"),
+        "memory_growth_per_run_kib": _summary([growth / runs], "KiB"),
+    }
+
+
+def run_in_process(args):
+    app, ide = _make_ide()
+    results = {}
+    results.update(bench_run_first_output(app, ide, args.repeat))
+    if not args.quick:
+        results.update(bench_template_load(app, ide, args.repeat))
+        results.update(bench_output_throughput(app, ide, args.repeat))
+        results.update(bench_memory_growth(app, ide, args.memory_runs))
+    ide.exam_lock_active = False
+    # closing flushes and closes the stores so their files can be removed (Windows)
+    ide.close()
+    _remove_state(os.environ)
+    return results
+
+
+# ---------- LOAD MODE ----------
+def run_load(args):
+    """Drive 1, 2, 4, ... args.load IDE instances at once and find the capacity."""
+    levels, n = [], 1
+    while n < args.load:
+        levels.append(n)
+        n *= 2
+    levels.append(args.load)
+
+    report, baseline_ms, capacity = {}, None, 0
+    for n in levels:
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker", "--quick",
+               "--repeat", str(args.repeat)]
+        # concurrent workers must not write over each other's state files
+        envs = [_child_env(f"{n}_{i}") for i in range(n)]
+        procs = [subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env)
+                 for env in envs]
+        medians = []
+        for p, env in zip(procs, envs):
+            out, _ = p.communicate(timeout=600)
+            _remove_state(env)
+            try:
+                medians.append(json.loads(out)["run_first_output_ms"]["median"])
+            except Exception:
+                pass
+        if not medians:
+            break
+        level_ms = statistics.median(medians)
+        if baseline_ms is None:
+            baseline_ms = level_ms
+        report[f"load_{n}_run_first_output_ms"] = _summary(medians, "ms")
+        if level_ms > baseline_ms * args.load_threshold or len(medians) < n:
+            break
+        capacity = n
+    report["load_capacity_instances"] = _summary([capacity], "instances", better="higher")
+    return report
+
+
+# ---------- OUTPUT / BASELINE ----------
+def compare(results, baseline, tolerance):
+    """Print a comparison table; return the names of regressed metrics."""
+    regressions = []
+    base_metrics = baseline.get("metrics", {})
+    for name in sorted(results["metrics"]):
+        new = results["metrics"][name]
+        old = base_metrics.get(name)
+        if not old or not old["median"]:
+            print(f"  {name:38s} {new['median']:>12.3f} {new['unit']}  (no baseline)")
+            continue
+        ratio = new["median"] / old["median"]
+        worse = ratio > 1 + tolerance if new["better"] == "lower" else ratio < 1 - tolerance
+        mark = "REGRESSION" if worse else "ok"
+        print(f"  {name:38s} {old['median']:>12.3f} -> {new['median']:>12.3f} {new['unit']}  x{ratio:.2f}  {mark}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the offline Python IDE headlessly.")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per benchmark")
+    parser.add_argument("--memory-runs", type=int, default=50, help="runs in the memory growth session")
+    parser.add_argument("--quick", action="store_true", help="only measure Run latency")
+    parser.add_argument("--no-cold-start", action="store_true", help="skip the cold start benchmark")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a stored results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative regression")
+    parser.add_argument("--load", type=int, default=0, help="load mode: up to N concurrent IDE instances")
+    parser.add_argument("--load-threshold", type=float, default=2.0,
+                        help="capacity is exceeded when Run latency grows by this factor")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--cold-start-child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.cold_start_child:
+        _cold_start_child()
+        return 0
+    if args.worker:
+        print(json.dumps(run_in_process(args), sort_keys=True))
+        return 0
+
+    if args.load:
+        metrics = run_load(args)
+    else:
+        metrics = {}
+        if not args.no_cold_start:
+            metrics.update(bench_cold_start(args.repeat))
+        metrics.update(run_in_process(args))
+
+    results = {
+        "schema": SCHEMA_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "metrics": metrics,
+    }
+    text = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nComparison against {args.compare}:")
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
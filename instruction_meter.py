@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Deterministic execution cost: line events executed in the contestant's code.
+
+Wall-clock limits depend on the PC; the number of lines the program
+executes does not. METER_GUARD is the last part of the run guard. When the
+IDE sets MNMJ_METER_OUT it counts line events in the contestant's own file
+(library code is not counted) with sys.monitoring on Python 3.12+ or
+sys.settrace (plus threading.settrace) before that, writes the count to
+MNMJ_METER_OUT at exit, and stops the program with METER_EXIT_CODE once
+MNMJ_METER_LIMIT is exceeded. Threads are counted too. A program that
+tries to switch the meter off (sys.settrace, threading.settrace, the
+sys.monitoring setters) gets no count written, which the IDE treats like
+an exceeded budget. The guard removes both variables from os.environ and
+cost_path() names the count file unguessably, so a program cannot write
+a count of its own.
+
+Known limitation: on the settrace path (Python 3.11, the lab stations) a
+program can still stop counting in a frame it controls by setting
+frame.f_trace = None or frame.f_trace_lines = False; the tracer cannot
+prevent that. The meter is a fairness measure, not a sandbox.
+
+Re-measure a submission on any machine with the same Python version:
+
+  python instruction_meter.py submission.py --limit 50000000 < input.txt
+"""
+import os
+import sys
+import argparse
+import subprocess
+import tempfile
+
+DEFAULT_LIMIT = int(os.environ.get("MNMJ_METER_LIMIT", "50000000"))
+METER_EXIT_CODE = 97
+# sys.monitoring tool ids 0-2 and 5 are reserved for debuggers, coverage, profilers and optimizers
+_TOOL_ID = 3
+
+METER_GUARD = (
+    "def _mnmj_meter():\n"
+    "    import os, sys, threading\n"
+    "    # the count file is known to this closure only, so the program cannot write its own\n"
+    "    out = os.environ.pop('MNMJ_METER_OUT', None)\n"
+    "    limit = int(os.environ.pop('MNMJ_METER_LIMIT', None) or 0) or float('inf')\n"
+    "    if not out:\n"
+    "        return\n"
+    "    main_file = sys._getframe(1).f_code.co_filename\n"
+    "    count = 0\n"
+    "    tampered = False\n"
+    "    def report():\n"
+    "        # no count at all is what the IDE treats as an exceeded budget\n"
+    "        if tampered:\n"
+    "            return\n"
+    "        try:\n"
+    "            with open(out, 'w') as f:\n"
+    "                f.write(str(count))\n"
+    "        except OSError:\n"
+    "            pass\n"
+    "    def over():\n"
+    "        report()\n"
+    "        try:\n"
+    "            sys.stdout.flush()\n"
+    "        except Exception:\n"
+    "            pass\n"
+    f"        os._exit({METER_EXIT_CODE})\n"
+    "    def refuse(*args, **kwargs):\n"
+    "        nonlocal tampered\n"
+    "        tampered = True\n"
+    "    if hasattr(sys, 'monitoring'):\n"
+    "        mon = sys.monitoring\n"
+    "        def on_line(code, line):\n"
+    "            nonlocal count\n"
+    "            if code.co_filename != main_file:\n"
+    "                return mon.DISABLE\n"
+    "            count += 1\n"
+    "            if count > limit:\n"
+    "                over()\n"
+    f"        mon.use_tool_id({_TOOL_ID}, 'mnmj-meter')\n"
+    f"        mon.register_callback({_TOOL_ID}, mon.events.LINE, on_line)\n"
+    "        # events are process-wide, so every thread is counted\n"
+    f"        mon.set_events({_TOOL_ID}, mon.events.LINE)\n"
+    "        for name in ('set_events', 'set_local_events', 'register_callback', 'free_tool_id', 'use_tool_id'):\n"
+    "            setattr(mon, name, refuse)\n"
+    "    else:\n"
+    "        def local(frame, event, arg):\n"
+    "            nonlocal count\n"
+    "            if event == 'line':\n"
+    "                count += 1\n"
+    "                if count > limit:\n"
+    "                    over()\n"
+    "            return local\n"
+    "        def enter(frame, event, arg):\n"
+    "            return local if frame.f_code.co_filename == main_file else None\n"
+    "        sys.settrace(enter)\n"
+    "        threading.settrace(enter)\n"
+    "        sys._getframe(1).f_trace = local\n"
+    "        settrace = sys.settrace\n"
+    "        def keep(func):\n"
+    "            # threading re-installs our hook in every new thread; anything else may not\n"
+    "            # switch the meter off (or swap it for the program's own tracer)\n"
+    "            if func is enter:\n"
+    "                settrace(func)\n"
+    "            else:\n"
+    "                refuse()\n"
+    "        sys.settrace = keep\n"
+    "        threading.settrace = refuse\n"
+    "    import atexit\n"
+    "    atexit.register(report)\n"
+    "_mnmj_meter()\n"
+    "del _mnmj_meter\n"
+)
+
+
+def cost_path(directory):
+    """Fresh, unguessable count file path in ``directory`` (the run's workspace)."""
+    return os.path.join(directory, f".mnmj_cost_{os.urandom(8).hex()}")
+
+
+def environment(out_path, limit=DEFAULT_LIMIT):
+    """Child environment variables that switch METER_GUARD on."""
+    return {"MNMJ_METER_OUT": out_path, "MNMJ_METER_LIMIT": str(int(limit))}
+
+
+def read_cost(out_path):
+    """Count written by the child, or None if it never reported (killed, crashed hard)."""
+    try:
+        with open(out_path) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def measure(source, stdin="", limit=DEFAULT_LIMIT, timeout=None):
+    """(cost, exceeded, returncode, stdout) for ``source`` run under the meter."""
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "submission.py")
+        with open(script, "w", encoding="utf-8") as f:
+            f.write(METER_GUARD + source)
+        out_path = os.path.join(tmp, "cost")
+        env = dict(os.environ, **environment(out_path, limit))
+        done = subprocess.run([sys.executable, "-X", "utf8", script], input=stdin.encode("utf-8"),
+                              capture_output=True, env=env, cwd=tmp, timeout=timeout)
+        return (read_cost(out_path), done.returncode == METER_EXIT_CODE, done.returncode,
+                done.stdout.decode("utf-8", errors="replace"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the deterministic cost of a Python program.")
+    parser.add_argument("script")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="line-event budget")
+    args = parser.parse_args(argv)
+    with open(args.script, encoding="utf-8") as f:
+        source = f.read()
+    stdin = "" if sys.stdin.isatty() else sys.stdin.read()
+    cost, exceeded, code, _ = measure(source, stdin, args.limit)
+    print(f"cost {cost} line events, exit {code}" + (" — LIMIT EXCEEDED" if exceeded else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
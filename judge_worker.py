@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+LAN judge worker: runs contestant code for IDE stations on a pool of cores.
+
+Weak stations can send runs here instead of starting a local child. The
+worker runs each job in its own workspace with the same guard, launch
+profile and quota as a local run, and streams stdout/stderr back as they
+are produced. A station falls back to local execution whenever the worker
+cannot be reached.
+
+  python judge_worker.py                              loopback worker on 127.0.0.1:8765
+  python judge_worker.py --host 0.0.0.0 --workers 8 --token SECRET
+  python judge_worker.py --selftest                   run a job through an in-process worker
+
+Stations opt in with MNMJ_JUDGE_WORKER=host:port (and MNMJ_JUDGE_TOKEN when
+the worker was started with --token).
+
+Protocol: newline-delimited JSON over TCP. The station sends one job
+{"guard", "code", "stdin", "timeout_s", "token"} plus optionally
+"meter_limit" (instruction_meter) and "failures": true (failure_channel);
+the worker answers {"type": "accepted"} or {"type": "error", "message"},
+then any number of {"type": "stdout"|"stderr", "data"} and finally
+{"type": "exit", "code", "reason"}, which also carries "cost" (None when
+the child reported no count) and "failures" (records with lines in the
+user's numbering) when the job asked for them. Closing the connection
+cancels the job.
+"""
+import os
+import sys
+import json
+import codecs
+import shutil
+import asyncio
+import argparse
+
+import launch_profiles
+import run_workspace
+import instruction_meter
+import failure_channel
+
+DEFAULT_PORT = 8765
+# Largest JSON line either side accepts (asyncio's default is 64 KiB): the
+# job carries the whole source and stdin.
+STREAM_LIMIT = 32 * 1024 * 1024
+# Output is framed in pieces this size, far below STREAM_LIMIT even after JSON escaping.
+OUTPUT_CHUNK = 16 * 1024
+# How long a job may wait for a free slot before the worker answers "busy";
+# must stay below the station's reply timeout (run_remote's connect_timeout)
+SLOT_WAIT_S = 0.5
+
+
+class WorkerUnavailable(Exception):
+    """The worker could not be reached or refused the job; nothing ran remotely."""
+
+
+def parse_address(value):
+    """
+    (host, port) from "host", "host:port", "[v6]:port" or a bare IPv6
+    address; None when ``value`` is not a usable address.
+    """
+    value = value.strip()
+    if value.startswith("["):
+        host, sep, rest = value[1:].partition("]")
+        port = rest[1:] if rest.startswith(":") else None
+        if not sep or (rest and port is None):
+            return None
+    elif value.count(":") > 1:
+        # bare IPv6: no room for a port
+        host, port = value, None
+    else:
+        host, _, port = value.partition(":")
+        if ":" not in value:
+            port = None
+    if not host:
+        return None
+    if port is None:
+        return host, DEFAULT_PORT
+    if not port.isdigit() or not 0 < int(port) < 65536:
+        return None
+    return host, int(port)
+
+
+def configured_address():
+    """(host, port) from MNMJ_JUDGE_WORKER, or None when remote execution is off (or the value is unusable)."""
+    value = os.environ.get("MNMJ_JUDGE_WORKER", "").strip()
+    if not value:
+        return None
+    address = parse_address(value)
+    if address is None:
+        sys.stderr.write(f"MNMJ_JUDGE_WORKER={value!r} is not host[:port]; running locally\n")
+    return address
+
+
+def _frame(obj):
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+# ---------- WORKER ----------
+class JudgeWorker:
+    """asyncio TCP server; at most ``workers`` jobs run at once."""
+
+    def __init__(self, workers=None, token=None, profile=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.token = token
+        self.profile_name, self.profile = launch_profiles.get_profile(profile)
+        self._slots = None
+
+    async def serve(self, host, port):
+        self._slots = asyncio.Semaphore(self.workers)
+        return await asyncio.start_server(self._handle, host, port, limit=STREAM_LIMIT)
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                job = json.loads(await reader.readline())
+            except ValueError:
+                # over STREAM_LIMIT or not JSON; tell the station instead of hanging up
+                writer.write(_frame({"type": "error", "message": "job too large or malformed"}))
+                return
+            if self.token and job.get("token") != self.token:
+                writer.write(_frame({"type": "error", "message": "bad token"}))
+                return
+            # take a slot before accepting, so a saturated worker turns stations away
+            # (they run locally) instead of queueing without bound
+            try:
+                await asyncio.wait_for(self._slots.acquire(), SLOT_WAIT_S)
+            except asyncio.TimeoutError:
+                writer.write(_frame({"type": "error", "message": "busy"}))
+                return
+            try:
+                writer.write(_frame({"type": "accepted"}))
+                await writer.drain()
+                run = asyncio.ensure_future(self._run_job(job, writer))
+                # the station closing its side cancels the job
+                hangup = asyncio.ensure_future(reader.read())
+                done, _ = await asyncio.wait({run, hangup}, return_when=asyncio.FIRST_COMPLETED)
+                if run not in done:
+                    run.cancel()
+                hangup.cancel()
+                await asyncio.gather(run, return_exceptions=True)
+            finally:
+                self._slots.release()
+        except (ValueError, KeyError, OSError):
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    async def _run_job(self, job, writer):
+        workspace = run_workspace.create("job")
+        try:
+            script = launch_profiles.write_script(self.profile, job.get("guard", ""), job["code"], directory=workspace)
+            env = launch_profiles.child_environment(self.profile, os.environ, os.getpid())
+            env.update(run_workspace.environment())
+            meter_out = failure_out = None
+            if job.get("meter_limit"):
+                meter_out = instruction_meter.cost_path(workspace)
+                env.update(instruction_meter.environment(meter_out, job["meter_limit"]))
+            if job.get("failures"):
+                failure_out = os.path.join(workspace, ".mnmj_failures")
+                env.update(failure_channel.environment(failure_out))
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, *launch_profiles.command(self.profile, script),
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE, cwd=workspace, env=env)
+
+            async def pump(stream, kind):
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                while True:
+                    chunk = await stream.read(OUTPUT_CHUNK)
+                    text = decoder.decode(chunk, final=not chunk)
+                    if text:
+                        writer.write(_frame({"type": kind, "data": text}))
+                        await writer.drain()
+                    if not chunk:
+                        break
+
+            async def feed():
+                try:
+                    proc.stdin.write(job.get("stdin", "").encode("utf-8"))
+                    await proc.stdin.drain()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                proc.stdin.close()
+
+            reason = "ok"
+            work = asyncio.gather(feed(), pump(proc.stdout, "stdout"), pump(proc.stderr, "stderr"), proc.wait())
+            # retrieve the result so a cancelled job is not logged as an error
+            work.add_done_callback(lambda f: f.cancelled() or f.exception())
+            try:
+                await asyncio.wait_for(work, job.get("timeout_s"))
+            except asyncio.TimeoutError:
+                reason = "timeout"
+            finally:
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+            result = {"type": "exit", "code": proc.returncode, "reason": reason}
+            if meter_out:
+                result["cost"] = instruction_meter.read_cost(meter_out)
+            if failure_out:
+                offset = launch_profiles.code_line_offset(self.profile, job.get("guard", ""))
+                result["failures"] = failure_channel.read_records(failure_out, offset)
+            writer.write(_frame(result))
+            await writer.drain()
+        finally:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+
+# ---------- STATION SIDE ----------
+async def run_remote(address, job, on_event, token=None, connect_timeout=1.0):
+    """
+    Send ``job`` to the worker at ``address`` and feed every event to ``on_event``.
+
+    Returns the final exit event. Raises WorkerUnavailable when the job
+    never started remotely, ConnectionError when the worker went away
+    mid-run; cancelling the coroutine cancels the remote job.
+    """
+    host, port = address
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, limit=STREAM_LIMIT), connect_timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        raise WorkerUnavailable(f"{host}:{port}: {e}") from e
+    try:
+        writer.write(_frame(dict(job, token=token)))
+        await writer.drain()
+        try:
+            reply = json.loads(await asyncio.wait_for(reader.readline(), connect_timeout) or b"{}")
+        except (OSError, ValueError, asyncio.TimeoutError) as e:
+            raise WorkerUnavailable(f"{host}:{port}: {e}") from e
+        if reply.get("type") != "accepted":
+            raise WorkerUnavailable(f"{host}:{port}: {reply.get('message', 'refused')}")
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("judge worker closed the connection")
+            event = json.loads(line)
+            on_event(event)
+            if event.get("type") == "exit":
+                return event
+    finally:
+        writer.close()
+
+
+async def _selftest():
+    worker = JudgeWorker(workers=2)
+    server = await worker.serve("127.0.0.1", 0)
+    address = server.sockets[0].getsockname()[:2]
+    guard = ("import os,sys\n"
+             "if os.environ.get('MNMJ_PARENT_PID') != str(os.getppid()):\n"
+             "    sys.exit(2)\n")
+    job = {"guard": guard, "code": "name = input()\nfor i in range(3):\n    print(i, name)\n",
+           "stdin": "ünï\n", "timeout_s": 10}
+    events = []
+    result = await run_remote(address, job, events.append)
+    print(f"worker {address[0]}:{address[1]} profile={worker.profile_name}")
+    for event in events:
+        print(" ", event)
+    # output lines and a job far beyond asyncio's default 64 KiB line limit
+    big_events = []
+    big = await run_remote(address, dict(job, code="print('x' * 200000)\n", stdin="y" * 200000), big_events.append)
+    big_out = sum(len(e["data"]) for e in big_events if e["type"] == "stdout")
+    print("  large output job:", big, big_out, "chars")
+    hung = await run_remote(address, dict(job, code="while True: pass\n", timeout_s=0.5), lambda e: None)
+    print("  timeout job:", hung)
+    # let the handlers remove their workspaces before the loop shuts down
+    await asyncio.sleep(0.2)
+    server.close()
+    await server.wait_closed()
+    stdout = "".join(e["data"] for e in events if e["type"] == "stdout")
+    ok = (result["code"] == 0 and stdout == "0 ünï\n1 ünï\n2 ünï\n" and big["code"] == 0
+          and big_out == 200001 and hung["reason"] == "timeout")
+    print("selftest", "ok" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run contestant code for IDE stations on the LAN.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (0.0.0.0 for the LAN)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="concurrent jobs (default: one per core)")
+    parser.add_argument("--token", default=os.environ.get("MNMJ_JUDGE_TOKEN"), help="shared secret stations must send")
+    parser.add_argument("--profile", default=None, help="launch profile for jobs")
+    parser.add_argument("--selftest", action="store_true", help="run a loopback job and exit")
+    args = parser.parse_args(argv)
+    if args.selftest:
+        return asyncio.run(_selftest())
+
+    async def serve():
+        worker = JudgeWorker(args.workers, args.token, args.profile)
+        server = await worker.serve(args.host, args.port)
+        print(f"judge worker on {args.host}:{args.port} — {worker.workers} slots, profile {worker.profile_name}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Launch profiles for the child interpreter that runs contestant code.
+
+A profile decides the interpreter flags, whether the child gets the full
+environment or a minimal one, and whether the guarded script is handed
+over as source or as bytecode compiled once in the IDE. Run this module
+to measure startup time and check correctness of every profile on the
+current machine:
+
+  python launch_profiles.py --runs 20
+
+DEFAULT_PROFILE stays "default" (the interpreter as launched before
+profiles existed) until the probe has been run on a lab PC; "lean" was
+only measured in a dev container. MNMJ_LAUNCH_PROFILE overrides it per
+station. "lean" and "nosite" skip site, so site-packages is not on sys.path and
+third-party imports (numpy, ...) fail; stations whose contests allow them
+should use "isolated".
+"""
+import os
+import sys
+import time
+import argparse
+import marshal
+import statistics
+import subprocess
+import tempfile
+import importlib.util
+
+# -I: isolated (no PYTHON* env vars, no user site, no script dir on sys.path)
+# -S: skip site (no site-packages scan); -X utf8: stable output encoding on
+#     Windows pipes, where -I would otherwise drop PYTHONIOENCODING
+PROFILES = {
+    "default": {"args": ["-u"], "minimal_env": False, "precompiled": False},
+    "isolated": {"args": ["-I", "-X", "utf8", "-u"], "minimal_env": False, "precompiled": False},
+    "nosite": {"args": ["-I", "-S", "-X", "utf8", "-u"], "minimal_env": False, "precompiled": False},
+    "lean": {"args": ["-I", "-S", "-X", "utf8", "-u"], "minimal_env": True, "precompiled": True},
+}
+DEFAULT_PROFILE = "default"
+
+# Without site, exit()/quit() are missing; contestants use them, so the
+# guard restores them (sys.exit has the same effect in a script).
+NOSITE_SHIM = "import builtins, sys\nbuiltins.exit = builtins.quit = sys.exit\n"
+
+# Variables a Python child needs to start on each platform
+_MINIMAL_ENV_KEYS = ("PATH", "SYSTEMROOT", "SYSTEMDRIVE", "WINDIR", "TEMP", "TMP", "TMPDIR",
+                     "HOME", "USERPROFILE", "LANG", "LC_ALL")
+
+
+def get_profile(name=None):
+    name = name or os.environ.get("MNMJ_LAUNCH_PROFILE") or DEFAULT_PROFILE
+    return name if name in PROFILES else "default", PROFILES.get(name, PROFILES["default"])
+
+
+def uses_site(profile):
+    return "-S" not in profile["args"]
+
+
+def child_environment(profile, base_env, parent_pid):
+    """Environment dict for the child: full or minimal, plus MNMJ_PARENT_PID."""
+    if profile["minimal_env"]:
+        env = {k: base_env[k] for k in _MINIMAL_ENV_KEYS if k in base_env}
+    else:
+        env = dict(base_env)
+    env["MNMJ_PARENT_PID"] = str(parent_pid)
+    return env
+
+
+def write_script(profile, guard, code, directory=None):
+    """
+    Write guard + code for ``profile`` and return the path to execute.
+
+    Precompiled profiles get a .pyc built here, so the child skips parsing
+    and compiling. Either way the guard (and the no-site shim) come first,
+    so line numbers in the child are shifted by code_line_offset().
+    """
+    source = guard
+    if not uses_site(profile):
+        source += NOSITE_SHIM
+    source += code
+    if profile["precompiled"]:
+        codeobj = compile(source, "<contest>", "exec")
+        fd, path = tempfile.mkstemp(suffix=".pyc", dir=directory)
+        with os.fdopen(fd, "wb") as f:
+            # PEP 552 header: magic, flags=0, mtime and size (unused for execution)
+            f.write(importlib.util.MAGIC_NUMBER + b"\0" * 12)
+            f.write(marshal.dumps(codeobj))
+        return path
+    fd, path = tempfile.mkstemp(suffix=".py", dir=directory)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(source)
+    return path
+
+
+def code_line_offset(profile, guard):
+    """Lines write_script() puts before the user's code (to map child line numbers back)."""
+    return guard.count("\n") + (0 if uses_site(profile) else NOSITE_SHIM.count("\n"))
+
+
+def command(profile, script_path):
+    """Arguments for QProcess.start / subprocess (without the executable)."""
+    return list(profile["args"]) + [script_path]
+
+
+# ---------- MEASUREMENT ----------
+_PROBE = '''
+x = 10
+def change():
+    global x
+    x += 5
+change()
+funcs = [lambda i=i: i for i in range(3)]
+data = {"x": 10}
+try:
+    n = int("12a")
+except ValueError:
+    n = 0
+name = input()
+print(x, [f() for f in funcs], data.get("x"), n, name, "✅")
+exit(0)
+'''
+_PROBE_STDIN = "ünï\n"
+_PROBE_EXPECTED = "15 [0, 1, 2] 10 0 ünï ✅\n"
+_PROBE_GUARD = ("import os,sys\n"
+                "if os.environ.get('MNMJ_PARENT_PID') != str(os.getppid()):\n"
+                "    sys.exit(2)\n")
+
+
+def measure(name, runs=10):
+    """Return (median startup ms, correct) for one profile."""
+    profile = PROFILES[name]
+    path = write_script(profile, _PROBE_GUARD, _PROBE)
+    env = child_environment(profile, os.environ, os.getpid())
+    try:
+        samples, correct = [], True
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            done = subprocess.run([sys.executable] + command(profile, path), input=_PROBE_STDIN.encode("utf-8"),
+                                  capture_output=True, env=env, timeout=30)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+            out = done.stdout.decode("utf-8", errors="replace").replace("\r\n", "\n")
+            correct = correct and done.returncode == 0 and out == _PROBE_EXPECTED and not done.stderr
+        return statistics.median(samples), correct
+    finally:
+        os.remove(path)
+
+
+def fastest_correct(runs=10):
+    results = {name: measure(name, runs) for name in PROFILES}
+    ok = [(ms, name) for name, (ms, correct) in results.items() if correct]
+    return (min(ok)[1] if ok else "default"), results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure child interpreter launch profiles.")
+    parser.add_argument("--runs", type=int, default=10, help="launches per profile")
+    args = parser.parse_args(argv)
+    best, results = fastest_correct(args.runs)
+    for name, (ms, correct) in results.items():
+        flags = " ".join(PROFILES[name]["args"])
+        print(f"{name:10s} {ms:8.1f} ms  {'ok' if correct else 'BROKEN':6s}  {flags}")
+    print(f"\nfastest correct profile: {best} (current default: {DEFAULT_PROFILE})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,954 @@
 #!/usr/bin/env python3
+import time
+_STARTUP_T0 = time.perf_counter()
+
 import sys
 import os
 import tempfile
 import random
-import subprocess
-import ctypes
-from ctypes import wintypes
+import ast
+import hashlib
+import hmac
+import gc
+import json
+import math
+import re
+import bisect
+from collections import OrderedDict, deque
 
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QPlainTextEdit, QPushButton,
     QVBoxLayout, QHBoxLayout, QLabel, QMessageBox, QInputDialog,
-    QMenuBar, QAction, QFileDialog
+    QMenuBar, QAction, QFileDialog, QDialog, QTabWidget, QCheckBox, QPlainTextDocumentLayout,
+    QLineEdit, QListWidget
+)
+from PyQt5.QtCore import Qt, QProcess, QTimer, QObject, QThread, QProcessEnvironment, QEvent, pyqtSignal
+from PyQt5.QtGui import QTextCursor, QTextDocument
+
+# Everything else (the run modules launch_profiles, run_workspace,
+# instruction_meter and failure_channel; preflight, template_stats and
+# output_index; ctypes for the Windows key hook, asyncio (qt_asyncio,
+# judge_worker), sqlite3 (results_store, source_archive) and the judge tools
+# complexity_profiler, differential_tester and reference_fixes) is imported
+# where it is first used so it stays off the startup path.
+
+# ---------- STARTUP TRACE ----------
+# Set MNMJ_STARTUP_TRACE=1 to print startup phase timings to stderr.
+STARTUP_TRACE = os.environ.get("MNMJ_STARTUP_TRACE", "") not in ("", "0")
+
+
+def startup_mark(label):
+    if STARTUP_TRACE:
+        elapsed_ms = (time.perf_counter() - _STARTUP_T0) * 1000.0
+        sys.stderr.write(f"[startup] {elapsed_ms:8.1f} ms  {label}\n")
+        sys.stderr.flush()
+
+
+startup_mark("modules imported")
+
+# Runtime guard prepended to every script the IDE runs so it only executes
+# when launched from this IDE process (parent-PID verification); run_guard()
+# adds the quota, meter and failure guards on the first run.
+PPID_GUARD = (
+    "import os,sys\n"
+    "_expected_ppid = os.environ.get('MNMJ_PARENT_PID')\n"
+    "try:\n"
+    "    if _expected_ppid is None or int(_expected_ppid) != os.getppid():\n"
+    "        print('❌ Unauthorized execution: script must be run from the MNMJ IDE')\n"
+    "        sys.exit(2)\n"
+    "except Exception:\n"
+    "    print('❌ Unauthorized execution: script must be run from the MNMJ IDE')\n"
+    "    sys.exit(2)\n"
+    "sys.setrecursionlimit(10**7)\n"
 )
-from PyQt5.QtCore import Qt, QProcess, QTimer
-from PyQt5.QtGui import QTextCursor
+_run_guard = None
+
+
+def run_guard():
+    global _run_guard
+    if _run_guard is None:
+        import run_workspace
+        import instruction_meter
+        import failure_channel
+        _run_guard = PPID_GUARD + run_workspace.QUOTA_GUARD + instruction_meter.METER_GUARD + failure_channel.FAILURE_GUARD
+    return _run_guard
+
+
+# ---------- WINDOW STATE ----------
+class WindowStateManager:
+    """
+    Collects the desired window flags and show-state for a top-level widget
+    and applies them in a single transition per event-loop turn.
+
+    Every setWindowFlag() on a visible window recreates the native window, so
+    callers only record what they want (request()) and apply() rebuilds at
+    most once, or not at all when nothing changed.
+    """
+
+    MODES = ("normal", "maximized", "fullscreen")
+
+    def __init__(self, widget):
+        self._widget = widget
+        self._on = Qt.WindowFlags()
+        self._off = Qt.WindowFlags()
+        self._mode = None
+        self._activate = False
+        self._timer = QTimer(widget)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.apply)
+
+    def request(self, on=None, off=None, mode=None, activate=False):
+        """Record flags to set/clear, a show mode and whether to raise the window."""
+        if on is not None:
+            on = Qt.WindowFlags(on)
+            self._on |= on
+            self._off &= ~on
+        if off is not None:
+            off = Qt.WindowFlags(off)
+            self._off |= off
+            self._on &= ~off
+        if mode is not None:
+            if mode not in self.MODES:
+                raise ValueError(f"unknown window mode: {mode}")
+            self._mode = mode
+        self._activate = self._activate or activate
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def apply(self):
+        """Apply the pending state now; a no-op when it matches the window."""
+        self._timer.stop()
+        w = self._widget
+        on, off, mode, activate = self._on, self._off, self._mode, self._activate
+        self._on, self._off, self._mode, self._activate = Qt.WindowFlags(), Qt.WindowFlags(), None, False
+
+        flags = w.windowFlags()
+        new_flags = (flags | on) & ~off
+        rebuilt = int(new_flags) != int(flags)
+        if rebuilt:
+            # hides the window; it is shown again below
+            w.setWindowFlags(new_flags)
+
+        if mode == "fullscreen":
+            if rebuilt or not w.isFullScreen():
+                w.showFullScreen()
+        elif mode == "maximized":
+            if rebuilt or not w.isMaximized() or w.isFullScreen():
+                w.showMaximized()
+        elif mode == "normal":
+            if rebuilt or w.isMaximized() or w.isFullScreen():
+                w.showNormal()
+        elif rebuilt:
+            w.show()
+
+        if activate:
+            w.raise_()
+            w.activateWindow()
+
+
+# ---------- EDITOR DOCUMENTS ----------
+class TemplateDocumentCache(QObject):
+    """
+    One live QTextDocument per template key, swapped into the editor.
+
+    Switching is a dict lookup plus setDocument(): the contestant's edits,
+    undo history and layout stay with each document. Free (non-template)
+    code lives in the scratch document. Least recently shown templates are
+    dropped beyond MAX_DOCUMENTS or MAX_CHARS.
+    """
+
+    MAX_DOCUMENTS = 8
+    MAX_CHARS = 2_000_000
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self._editor = editor
+        self._docs = OrderedDict()
+        # documents parented to this object are never deleted by the editor
+        self.scratch = self._new_document("")
+        editor.setDocument(self.scratch)
+
+    def _new_document(self, text):
+        doc = QTextDocument(self)
+        doc.setDocumentLayout(QPlainTextDocumentLayout(doc))
+        doc.setPlainText(text)
+        return doc
+
+    def _show(self, doc):
+        if self._editor.document() is not doc:
+            doc.setDefaultFont(self._editor.font())
+            self._editor.setDocument(doc)
+
+    def __contains__(self, key):
+        return key in self._docs
+
+    def add(self, key, text):
+        """Cache ``text`` for ``key`` unless a document already exists; returns the document."""
+        doc = self._docs.get(key)
+        if doc is None:
+            doc = self._docs[key] = self._new_document(text)
+        self._docs.move_to_end(key)
+        return doc
+
+    def show_template(self, key, text):
+        """Show the live document for ``key``, created from ``text`` on first use."""
+        self._show(self.add(key, text))
+        self._trim()
+
+    def show_scratch(self):
+        self._show(self.scratch)
+
+    def evict(self, key):
+        """Drop ``key``; if it is on screen it becomes the scratch document."""
+        doc = self._docs.pop(key, None)
+        if doc is None:
+            return
+        if self._editor.document() is doc:
+            doc, self.scratch = self.scratch, doc
+        doc.deleteLater()
+
+    def texts(self):
+        return {key: doc.toPlainText() for key, doc in self._docs.items()}
+
+    def _trim(self):
+        current = self._editor.document()
+        total = sum(doc.characterCount() for doc in self._docs.values())
+        for key in list(self._docs):
+            if len(self._docs) <= self.MAX_DOCUMENTS and total <= self.MAX_CHARS:
+                break
+            doc = self._docs[key]
+            if doc is current:
+                continue
+            total -= doc.characterCount()
+            del self._docs[key]
+            doc.deleteLater()
+
+
+# ---------- TEST CASES ----------
+def _normalize_output(text):
+    return "\n".join(line.rstrip() for line in text.replace("\r\n", "\n").strip().split("\n"))
+
+
+class TestCaseRunner(QObject):
+    """
+    Runs one script against many (stdin, expected stdout) cases concurrently.
+
+    At most ``max_workers`` child processes run at once (default: one per
+    core). Everything is driven by QProcess signals, so the GUI thread never
+    blocks. With fail-fast on, the first failing case cancels the rest.
+    """
+
+    case_finished = pyqtSignal(dict)
+    all_finished = pyqtSignal(dict)
+
+    def __init__(self, parent=None, max_workers=None):
+        super().__init__(parent)
+        self.max_workers = max_workers or max(1, QThread.idealThreadCount())
+        self._running = {}
+        self._queue = []
+        self._results = []
+        self._cancelled = False
+
+    def is_running(self):
+        return bool(self._running or self._queue)
+
+    def start(self, arguments, cases, fail_fast=True, timeout_ms=10000, env=None, working_dir=None):
+        """
+        Run ``sys.executable arguments`` once per case; results arrive via the signals.
+
+        With ``working_dir`` each case runs in its own subdirectory of it.
+        """
+        if self.is_running():
+            return False
+        self._arguments = list(arguments)
+        self._working_dir = working_dir
+        self._fail_fast = fail_fast
+        self._timeout_ms = timeout_ms
+        self._env = env or QProcessEnvironment.systemEnvironment()
+        self._queue = list(enumerate(cases))
+        self._results = [None] * len(cases)
+        self._cancelled = False
+        self._t0 = time.perf_counter()
+        self._fill()
+        if not self._running:
+            self._finish()
+        return True
+
+    def cancel(self):
+        """Kill running cases and drop queued ones."""
+        self._cancelled = True
+        for index, _ in self._queue:
+            self._results[index] = {"index": index, "status": "cancelled", "passed": False, "ms": 0.0}
+        self._queue = []
+        for proc in list(self._running):
+            try:
+                proc.kill()
+            except Exception:
+                pass
+
+    def _fill(self):
+        while self._queue and len(self._running) < self.max_workers and not self._cancelled:
+            index, case = self._queue.pop(0)
+            proc = QProcess(self)
+            proc.setProcessEnvironment(self._env)
+            if self._working_dir:
+                case_dir = os.path.join(self._working_dir, str(index))
+                try:
+                    os.mkdir(case_dir)
+                    proc.setWorkingDirectory(case_dir)
+                except OSError:
+                    pass
+            timer = QTimer(proc)
+            timer.setSingleShot(True)
+            timer.timeout.connect(proc.kill)
+            self._running[proc] = (index, case, time.perf_counter(), timer)
+            proc.finished.connect(lambda *_, p=proc: self._on_finished(p))
+            # a child that never starts emits errorOccurred but never finished
+            proc.errorOccurred.connect(lambda error, p=proc: self._on_error(p, error))
+            proc.start(sys.executable, self._arguments)
+            stdin = case.get("stdin", "")
+            if stdin:
+                proc.write(stdin.encode())
+            proc.closeWriteChannel()
+            timer.start(self._timeout_ms)
+
+    def _on_error(self, proc, error):
+        if error == QProcess.FailedToStart:
+            # may be emitted from inside start(); settle the case after _fill() returns
+            QTimer.singleShot(0, lambda: self._on_finished(proc, failed_to_start=True))
+
+    def _on_finished(self, proc, failed_to_start=False):
+        if proc not in self._running:
+            return
+        index, case, t0, timer = self._running.pop(proc)
+        ms = (time.perf_counter() - t0) * 1000.0
+        timed_out = not timer.isActive()
+        timer.stop()
+        stdout = bytes(proc.readAllStandardOutput()).decode(errors="replace")
+        stderr = bytes(proc.readAllStandardError()).decode(errors="replace")
+        proc.deleteLater()
+
+        if self._cancelled and self._results[index] is None:
+            status = "cancelled"
+        elif timed_out:
+            status = "timeout"
+        elif failed_to_start or proc.exitCode() != 0 or stderr.strip():
+            status = "error"
+        elif _normalize_output(stdout) != _normalize_output(case.get("expected", "")):
+            status = "wrong_output"
+        else:
+            status = "pass"
+        result = {"index": index, "status": status, "passed": status == "pass", "ms": ms}
+        self._results[index] = result
+        self.case_finished.emit(result)
+
+        if status not in ("pass", "cancelled") and self._fail_fast:
+            self.cancel()
+        self._fill()
+        if not self._running:
+            self._finish()
+
+    def _finish(self):
+        cases = [r for r in self._results if r is not None]
+        self.all_finished.emit({
+            "passed": bool(cases) and all(r["passed"] for r in cases),
+            "cases": cases,
+            "ms": (time.perf_counter() - self._t0) * 1000.0,
+        })
+        self._queue = []
+
+
+# ---------- REMOTE EXECUTION ----------
+class JudgeProcess(QObject):
+    """
+    Stand-in for the run QProcess that executes jobs on a LAN judge worker.
+
+    It offers the part of the QProcess API the IDE uses. Call set_job()
+    before start(); the job is sent once the stdin channel is closed, and
+    output streams back through the usual readyRead signals. When the
+    worker cannot be reached (or did so recently) the same start() runs a
+    local QProcess instead, so callers never see the difference.
+    """
+
+    readyReadStandardOutput = pyqtSignal()
+    readyReadStandardError = pyqtSignal()
+    finished = pyqtSignal(int, int)
+
+    RETRY_AFTER_S = 30.0
+
+    def __init__(self, bridge, address, token=None, timeout_s=None, parent=None):
+        super().__init__(parent)
+        self._bridge = bridge
+        self.address = address
+        self.token = token
+        self.timeout_s = timeout_s
+        self.backend = None
+        self._local = QProcess(self)
+        self._local.readyReadStandardOutput.connect(self.readyReadStandardOutput)
+        self._local.readyReadStandardError.connect(self.readyReadStandardError)
+        self._local.finished.connect(lambda code, status: self.finished.emit(code, int(status)))
+        self._job = None
+        self._remote_running = False
+        # what the worker reported in its exit event (see judge_worker)
+        self.remote_result = {}
+        self._stdin = bytearray()
+        self._out = bytearray()
+        self._err = bytearray()
+        self._exit_code = 0
+        self._down_until = 0.0
+
+    def set_job(self, guard, code, meter_limit=None, failures=False):
+        """Source for the next start(): the worker compiles guard + code itself."""
+        self._job = {"guard": guard, "code": code}
+        if meter_limit:
+            self._job["meter_limit"] = meter_limit
+        if failures:
+            self._job["failures"] = True
+
+    # -- QProcess API used by the IDE --
+    def setProcessEnvironment(self, env):
+        self._local.setProcessEnvironment(env)
+
+    def setWorkingDirectory(self, path):
+        self._local.setWorkingDirectory(path)
+
+    def start(self, program, arguments):
+        self._program, self._arguments = program, list(arguments)
+        self._stdin = bytearray()
+        self._out, self._err = bytearray(), bytearray()
+        self.remote_result = {}
+        if self._job is None or time.monotonic() < self._down_until:
+            self._start_local()
+            return
+        self.backend = "remote"
+        self._remote_running = True
+
+    def _start_local(self):
+        self.backend = "local"
+        self._local.start(self._program, self._arguments)
+
+    def waitForStarted(self, msecs=30000):
+        return self._local.waitForStarted(msecs) if self.backend == "local" else True
+
+    def state(self):
+        if self.backend == "local":
+            return self._local.state()
+        return QProcess.Running if self._remote_running else QProcess.NotRunning
+
+    def write(self, data):
+        if self.backend == "local":
+            return self._local.write(data)
+        self._stdin += data
+        return len(data)
+
+    def closeWriteChannel(self):
+        if self.backend == "local":
+            self._local.closeWriteChannel()
+        elif self._remote_running:
+            job = dict(self._job, stdin=self._stdin.decode("utf-8", errors="replace"), timeout_s=self.timeout_s)
+            self._job = None
+            self._bridge.spawn(self._run_remote(job), name="judge-run")
+
+    def readAllStandardOutput(self):
+        if self.backend == "local":
+            return self._local.readAllStandardOutput()
+        data, self._out = bytes(self._out), bytearray()
+        return data
+
+    def readAllStandardError(self):
+        if self.backend == "local":
+            return self._local.readAllStandardError()
+        data, self._err = bytes(self._err), bytearray()
+        return data
+
+    def exitCode(self):
+        return self._local.exitCode() if self.backend == "local" else self._exit_code
+
+    def kill(self):
+        if self.backend == "local":
+            self._local.kill()
+        elif self._remote_running:
+            # closing the connection makes the worker kill the job
+            self._bridge.cancel("judge-run")
+            self._finish_remote(-9)
+
+    # -- remote side --
+    def _on_event(self, event):
+        kind = event.get("type")
+        if kind == "stdout":
+            self._out += event["data"].encode("utf-8")
+            self.readyReadStandardOutput.emit()
+        elif kind == "stderr":
+            self._err += event["data"].encode("utf-8")
+            self.readyReadStandardError.emit()
+
+    async def _run_remote(self, job):
+        import judge_worker
+        try:
+            result = await judge_worker.run_remote(self.address, job, self._on_event, token=self.token)
+            self.remote_result = result
+            code = result.get("code", -1)
+        except judge_worker.WorkerUnavailable:
+            # nothing ran remotely: run here and leave the worker alone for a while
+            self._down_until = time.monotonic() + self.RETRY_AFTER_S
+            self._remote_running = False
+            self._start_local()
+            self._local.write(bytes(self._stdin))
+            self._local.closeWriteChannel()
+            return
+        except (OSError, ValueError):
+            self._on_event({"type": "stderr", "data": "\njudge worker connection lost\n"})
+            code = -1
+        self._finish_remote(code)
+
+    def _finish_remote(self, code):
+        if not self._remote_running:
+            return
+        self._remote_running = False
+        self._exit_code = code
+        status = QProcess.NormalExit if code >= 0 else QProcess.CrashExit
+        # outside the asyncio callback: finished() handlers may open dialogs
+        QTimer.singleShot(0, lambda: self.finished.emit(code, int(status)))
+
+
+# ---------- HEALTH MONITOR ----------
+def process_rss_bytes():
+    """Current resident set size of this process in bytes (0 if unknown)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        pass
+    if os.name == "nt":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                    (name, ctypes.c_size_t) for name in (
+                        "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                        "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                        "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            handle = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+        except Exception:
+            pass
+    return 0
+
+
+class HealthMonitor(QObject):
+    """
+    Low-overhead self-monitor for long sessions.
+
+    A 250 ms timer measures Qt event-loop lag (how late it fires); every
+    second a sample with the worst lag and the process RSS goes into a
+    fixed-size ring buffer. Python object counts are added every 10 samples
+    and, when enabled, a tracemalloc diff against the previous snapshot
+    every 60 samples.
+    """
+
+    TICK_MS = 250
+    TICKS_PER_SAMPLE = 4
+    OBJECTS_EVERY = 10
+    TRACEMALLOC_EVERY = 60
+
+    def __init__(self, parent=None, capacity=3600):
+        super().__init__(parent)
+        self.samples = deque(maxlen=capacity)
+        self.tracemalloc_diffs = deque(maxlen=30)
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.TICK_MS)
+        self._timer.timeout.connect(self._tick)
+        self._ticks = 0
+        self._sample_count = 0
+        self._max_lag_ms = 0.0
+        self._last = None
+        self._last_snapshot = None
+        self._t0 = time.time()
+
+    def start(self):
+        self._last = time.perf_counter()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def tracemalloc_enabled(self):
+        import tracemalloc
+        return tracemalloc.is_tracing()
+
+    def set_tracemalloc(self, enabled):
+        import tracemalloc
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._last_snapshot = tracemalloc.take_snapshot()
+        elif not enabled and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            self._last_snapshot = None
+
+    def _tick(self):
+        now = time.perf_counter()
+        lag_ms = max(0.0, (now - self._last) * 1000.0 - self.TICK_MS)
+        self._last = now
+        self._max_lag_ms = max(self._max_lag_ms, lag_ms)
+        self._ticks += 1
+        if self._ticks % self.TICKS_PER_SAMPLE:
+            return
+
+        self._sample_count += 1
+        sample = {
+            "t": round(time.time() - self._t0, 1),
+            "lag_ms": round(self._max_lag_ms, 1),
+            "rss_kib": process_rss_bytes() // 1024,
+        }
+        self._max_lag_ms = 0.0
+        if self._sample_count % self.OBJECTS_EVERY == 0:
+            sample["objects"] = len(gc.get_objects())
+        if self._sample_count % self.TRACEMALLOC_EVERY == 0 and self._last_snapshot is not None:
+            self._take_tracemalloc_diff(sample["t"])
+        self.samples.append(sample)
+
+    def _take_tracemalloc_diff(self, t):
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot()
+        stats = snapshot.compare_to(self._last_snapshot, "lineno")[:10]
+        self._last_snapshot = snapshot
+        self.tracemalloc_diffs.append({"t": t, "top": [str(stat) for stat in stats]})
+
+    def summary_text(self):
+        if not self.samples:
+            return "No samples yet."
+        recent = list(self.samples)[-60:]
+        lags = sorted(s["lag_ms"] for s in recent)
+        objects = [s for s in self.samples if "objects" in s]
+        first, last = self.samples[0], self.samples[-1]
+        lines = [
+            f"Uptime: {last['t']:.0f} s   samples: {len(self.samples)}",
+            f"Event-loop lag (last {len(recent)} s): median {lags[len(lags) // 2]:.1f} ms, max {lags[-1]:.1f} ms",
+            f"RSS: {last['rss_kib'] / 1024:.1f} MiB (growth {(last['rss_kib'] - first['rss_kib']) / 1024:+.1f} MiB)",
+        ]
+        if objects:
+            lines.append(f"Python objects: {objects[-1]['objects']} "
+                         f"(growth {objects[-1]['objects'] - objects[0]['objects']:+d})")
+        if self.tracemalloc_diffs:
+            lines.append("")
+            lines.append(f"tracemalloc top growth at t={self.tracemalloc_diffs[-1]['t']:.0f} s:")
+            lines.extend("  " + line for line in self.tracemalloc_diffs[-1]["top"])
+        return "\n".join(lines)
+
+    def dump(self):
+        return {"samples": list(self.samples), "tracemalloc_diffs": list(self.tracemalloc_diffs)}
+
+
+# ---------- KEYSTROKE LATENCY ----------
+class LatencyHistogram:
+    """Fixed-size log-bucket histogram of millisecond values (about 5% resolution)."""
+
+    MIN_MS = 0.1
+    MAX_MS = 5000.0
+    RATIO = 1.05
+
+    def __init__(self):
+        self._bounds = []
+        bound = self.MIN_MS
+        while bound < self.MAX_MS:
+            self._bounds.append(bound)
+            bound *= self.RATIO
+        self._bounds.append(float("inf"))
+        self._log_ratio = math.log(self.RATIO)
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * len(self._bounds)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        if ms <= self.MIN_MS:
+            i = 0
+        else:
+            i = min(len(self._bounds) - 1, int(math.log(ms / self.MIN_MS) / self._log_ratio) + 1)
+        self.counts[i] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q):
+        """Upper bucket bound below which a fraction ``q`` of the values fall."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self._bounds, self.counts):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.50), 3),
+            "p95_ms": round(self.quantile(0.95), 3),
+            "p99_ms": round(self.quantile(0.99), 3),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {f"{b:.3f}": n for b, n in zip(self._bounds, self.counts) if n},
+        }
+
+
+class KeyLatencyProbe(QObject):
+    """
+    Event filter that timestamps key presses on an editor and the start of
+    the next paint of its viewport, feeding the gap into a LatencyHistogram.
+    Keys pressed before that paint are coalesced into the first one. Only
+    keys that changed the document or the cursor count; anything else
+    (modifiers, shortcuts, the read-only editor) would just wait for the
+    cursor blink.
+    """
+
+    # a gap this long is an idle editor waiting for the blink, not input latency
+    MAX_SAMPLE_MS = 1000.0
+    MODIFIER_KEYS = (Qt.Key_Shift, Qt.Key_Control, Qt.Key_Alt, Qt.Key_Meta, Qt.Key_AltGr,
+                     Qt.Key_CapsLock, Qt.Key_NumLock)
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.histogram = LatencyHistogram()
+        self._pending = None
+        self._editor = editor
+        self._viewport = editor.viewport()
+        editor.installEventFilter(self)
+        self._viewport.installEventFilter(self)
+
+    def _state(self):
+        cursor = self._editor.textCursor()
+        return self._editor.document().revision(), cursor.position(), cursor.anchor()
+
+    def eventFilter(self, obj, event):
+        etype = event.type()
+        if etype == QEvent.KeyPress:
+            if (self._pending is None and not self._editor.isReadOnly()
+                    and event.key() not in self.MODIFIER_KEYS):
+                self._pending = (time.perf_counter(), self._state())
+        elif etype == QEvent.Paint and obj is self._viewport and self._pending is not None:
+            started, before = self._pending
+            self._pending = None
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            if elapsed_ms <= self.MAX_SAMPLE_MS and self._state() != before:
+                self.histogram.add(elapsed_ms)
+        return False
+
+    def reset(self):
+        self._pending = None
+        self.histogram.reset()
+
+    def summary_text(self):
+        h = self.histogram.to_dict()
+        if not h["count"]:
+            return "No keystrokes recorded yet."
+        return (f"Keystrokes: {h['count']}\n"
+                f"p50: {h['p50_ms']:.1f} ms   p95: {h['p95_ms']:.1f} ms   p99: {h['p99_ms']:.1f} ms\n"
+                f"mean: {h['mean_ms']:.1f} ms   max: {h['max_ms']:.1f} ms")
+
+    def dump(self):
+        import platform
+        data = self.histogram.to_dict()
+        data["machine"] = platform.node()
+        data["platform"] = platform.platform()
+        return data
+
+
+# ---------- ADMIN PANEL ----------
+class AdminPanel(QDialog):
+    """
+    Hidden judge/admin dialog (Ctrl+F11). Each section is a tab whose text
+    is re-rendered every second while the dialog is visible; Dump writes
+    every section's data to one JSON file.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Admin Panel")
+        self.resize(760, 520)
+        self._sections = []
+        self._tabs = QTabWidget()
+        layout = QVBoxLayout(self)
+        layout.addWidget(self._tabs)
+        self._controls = QHBoxLayout()
+        dump_btn = QPushButton("Dump")
+        dump_btn.clicked.connect(self.dump)
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.hide)
+        self._controls.addStretch()
+        self._controls.addWidget(dump_btn)
+        self._controls.addWidget(close_btn)
+        layout.addLayout(self._controls)
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setInterval(1000)
+        self._refresh_timer.timeout.connect(self.refresh)
+
+    def add_section(self, title, render, dump=None, controls=()):
+        """Add a tab showing ``render()``; ``dump()`` supplies its JSON data."""
+        page = QWidget()
+        page_layout = QVBoxLayout(page)
+        view = QPlainTextEdit(readOnly=True)
+        view.setStyleSheet("font-family:Consolas; font-size:12px;")
+        page_layout.addWidget(view)
+        if controls:
+            row = QHBoxLayout()
+            for widget in controls:
+                row.addWidget(widget)
+            row.addStretch()
+            page_layout.addLayout(row)
+        self._tabs.addTab(page, title)
+        self._sections.append((title, render, dump, view))
+
+    def refresh(self):
+        for _, render, _, view in self._sections:
+            try:
+                view.setPlainText(render())
+            except Exception as e:
+                view.setPlainText(f"Error: {e}")
+
+    def dump(self):
+        data = {}
+        for title, _, dump, _ in self._sections:
+            if dump is not None:
+                try:
+                    data[title] = dump()
+                except Exception as e:
+                    data[title] = {"error": str(e)}
+        path = os.path.join(tempfile.gettempdir(), time.strftime("mnmj_admin_dump_%Y%m%d_%H%M%S.json"))
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1, sort_keys=True, default=str)
+            QMessageBox.information(self, "Dump", f"Written to:\n{path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Dump Error", f"Failed to write dump:\n{e}")
+        return path
+
+    def showEvent(self, event):
+        self.refresh()
+        self._refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self._refresh_timer.stop()
+        super().hideEvent(event)
+
+
+# ---------- OUTPUT SEARCH ----------
+class OutputSearchDialog(QDialog):
+    """
+    Find in run output (Ctrl+Shift+F). The OutputIndex is scanned a slice at
+    a time from a zero-delay timer, so matches appear while the search runs
+    and the window stays responsive; activating a match jumps to its line.
+    """
+
+    MAX_RESULTS = 5000
+    SLICE_MS = 12
+
+    def __init__(self, index, on_activate, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Find in Output")
+        self.resize(640, 420)
+        self._index = index
+        self._search = None
+        self._found = 0
+        self.pattern_edit = QLineEdit()
+        self.pattern_edit.setPlaceholderText("Regular expression")
+        self.pattern_edit.returnPressed.connect(self.start)
+        self.case_box = QCheckBox("Match case")
+        find_btn = QPushButton("Find")
+        find_btn.clicked.connect(self.start)
+        row = QHBoxLayout()
+        row.addWidget(self.pattern_edit)
+        row.addWidget(self.case_box)
+        row.addWidget(find_btn)
+        self.results = QListWidget()
+        self.results.setStyleSheet("font-family:Consolas; font-size:12px;")
+        self.results.itemActivated.connect(lambda item: on_activate(item.data(Qt.UserRole)))
+        self.status = QLabel("")
+        layout = QVBoxLayout(self)
+        layout.addLayout(row)
+        layout.addWidget(self.results)
+        layout.addWidget(self.status)
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._step)
+
+    def start(self):
+        pattern = self.pattern_edit.text()
+        if not pattern:
+            return
+        flags = 0 if self.case_box.isChecked() else re.IGNORECASE
+        try:
+            re.compile(pattern, flags)
+        except re.error as e:
+            self.status.setText(f"Invalid pattern: {e}")
+            return
+        self.results.clear()
+        self._found = 0
+        self._search = self._index.search(pattern, flags=flags)
+        self._timer.start()
+
+    def cancel(self, message=""):
+        self._timer.stop()
+        self._search = None
+        if message:
+            self.status.setText(message)
+
+    def _step(self):
+        deadline = time.perf_counter() + self.SLICE_MS / 1000.0
+        scanned = 0
+        while time.perf_counter() < deadline:
+            try:
+                scanned, matches = next(self._search)
+            except StopIteration:
+                self.cancel(f"Done — {self._found:,} matches in {self._index.line_count:,} lines.")
+                return
+            for i, text in matches:
+                self.results.addItem(f"{i + 1:>8}: {text[:300]}")
+                self.results.item(self.results.count() - 1).setData(Qt.UserRole, i)
+                self._found += 1
+                if self._found >= self.MAX_RESULTS:
+                    self.cancel(f"Stopped at {self.MAX_RESULTS:,} matches (line {i + 1:,}).")
+                    return
+        self.status.setText(f"Searching… {scanned:,} / {self._index.line_count:,} lines, {self._found:,} matches")
+
+    def hideEvent(self, event):
+        self.cancel()
+        super().hideEvent(event)
 
 
 class OfflinePythonIDE(QWidget):
     HARD_TIMEOUT_MS = 15 * 60 * 1000
     GROUP_TIMER_MS = 20 * 60 * 1000  # 20 minutes in milliseconds
+    # Session snapshot used to restore the station after a crash or restart.
+    # It lives in the user's profile (not the shared temp dir) and is plain
+    # JSON that is validated field by field on load.
+    SESSION_FILE = os.environ.get(
+        "MNMJ_SESSION_FILE", os.path.join(os.path.expanduser("~"), ".mnmj_ide_session.json"))
+    SESSION_VERSION = 2
+    # Judge stations set MNMJ_ADMIN_TOKEN; without it the admin panel (and the
+    # judge-only actions in it) does not exist. Popped so children never see it.
+    ADMIN_TOKEN = os.environ.pop("MNMJ_ADMIN_TOKEN", "")
+    SESSION_MAX_BYTES = 8 * 1024 * 1024
 
     # Template codes for each program (prog1..prog15)
     PROGRAM_TEMPLATES = {
@@ -132,10 +1062,56 @@ change()
 print(x)
 """
     }
+
+    # Expected behaviour of the fixed templates, checked by "Run Tests".
+    # Each case is {"stdin": ..., "expected": ...}; templates whose blank
+    # has more than one valid fix (prog2, prog4, prog7, prog8, prog9) carry no cases.
+    TEMPLATE_TEST_CASES = {
+        "prog1": [{"stdin": "", "expected": "[1]\n[2]\n"}],
+        "prog3": [{"stdin": "", "expected": "['Alice']\n['Bob']\n"}],
+        "prog5": [{"stdin": "", "expected": "[0, 1, 2, 3, 4]\n"}],
+        "prog6": [{"stdin": "", "expected": "Odd\n"}],
+        "prog10": [{"stdin": "", "expected": "6\n"}],
+        "prog11": [{"stdin": "", "expected": "10\n"}],
+        "prog12": [{"stdin": "", "expected": "0\n"}],
+        "prog13": [{"stdin": "", "expected": "[1, 2, 3, 4]\n"}],
+        "prog14": [{"stdin": "", "expected": "12\n"}],
+        "prog15": [{"stdin": "", "expected": "15\n"}],
+    }
+    TEST_CASE_TIMEOUT_MS = 10 * 1000
+    # console lines kept in the output widget; older lines stay searchable in output_index
+    OUTPUT_MAX_BLOCKS = 50000
+    WORKSPACE_QUOTA_POLL_MS = 1000
+    # Entry function and argument kinds for "Profile Complexity…" (see complexity_profiler)
+    PROFILE_ENTRIES = {
+        "prog1": "add(one, list)",
+        "prog3": "register_user(word, strlist)",
+        "prog9": "check_len(str)",
+        "prog10": "total(list)",
+    }
+    PROFILE_BUDGET_S = 1.0
+    TEMPLATE_BUTTON_STYLE = """
+        QPushButton {
+            background:#4f46e5;
+            color:white;
+            padding:10px 16px;
+            font-size:12px;
+            border-radius:6px;
+            border: 2px solid #4f46e5;
+            font-weight: bold;
+        }
+        QPushButton:hover { background:#4338ca; border: 2px solid #3730a3; }
+        QPushButton:pressed { background:#3730a3; }
+    """
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Python Compiler of MNMJEC")
         self.setGeometry(150, 80, 1100, 720)
+        # Set before any child exists so children are polished once, not twice
+        self.setStyleSheet("background:#ffffff; color:#0b1220;")
+        self._first_paint_done = False
+        self.window_state = WindowStateManager(self)
 
         # ---------- UI ----------
         title = QLabel("Python Compiler of MNMJEC")
@@ -155,6 +1131,8 @@ print(x)
             selection-background-color: rgba(255,215,0,0.15);
             selection-color: #ffd700;
         """)
+        # each template keeps its own document (edits + undo) across switches
+        self.template_docs = TemplateDocumentCache(self.editor)
 
         self.output = QPlainTextEdit(readOnly=True)
         self.output.setStyleSheet("""
@@ -170,10 +1148,11 @@ print(x)
         """)
 
         self.run_btn = QPushButton("▶ Run")
+        self.test_btn = QPushButton("🧪 Run Tests")
         self.stop_btn = QPushButton("⛔ Stop")
         self.clear_btn = QPushButton("🧹 Clear")
 
-        for btn in (self.run_btn, self.stop_btn, self.clear_btn):
+        for btn in (self.run_btn, self.test_btn, self.stop_btn, self.clear_btn):
             btn.setStyleSheet("""
                 QPushButton {
                     background:#2563eb;
@@ -187,11 +1166,13 @@ print(x)
 
         self.stop_btn.setEnabled(False)
         self.run_btn.clicked.connect(self.run_code)
+        self.test_btn.clicked.connect(self.run_tests)
         self.stop_btn.clicked.connect(self.stop_process)
-        self.clear_btn.clicked.connect(self.output.clear)
+        self.clear_btn.clicked.connect(self._clear_output)
 
         btns = QHBoxLayout()
         btns.addWidget(self.run_btn)
+        btns.addWidget(self.test_btn)
         btns.addWidget(self.stop_btn)
         btns.addWidget(self.clear_btn)
         btns.addStretch()
@@ -241,25 +1222,46 @@ print(x)
         stop_act = QAction("Stop", self)
         stop_act.triggered.connect(self.stop_process)
         clear_out_act = QAction("Clear Output", self)
-        clear_out_act.triggered.connect(self.output.clear)
-        for act in (run_act, stop_act, clear_out_act):
+        clear_out_act.triggered.connect(self._clear_output)
+        tests_act = QAction("Run Tests", self)
+        tests_act.setShortcut("Ctrl+F5")
+        tests_act.triggered.connect(self.run_tests)
+        self.fail_fast_act = QAction("Stop Tests at First Failure", self)
+        self.fail_fast_act.setCheckable(True)
+        self.fail_fast_act.setChecked(True)
+        # Fair time limit: budget of executed line events instead of wall-clock time
+        self.meter_act = QAction("Count Executed Lines (Fair Time Limit)", self)
+        self.meter_act.setCheckable(True)
+        self.meter_act.setChecked(os.environ.get("MNMJ_METER", "") not in ("", "0"))
+        find_out_act = QAction("Find in Output…", self)
+        find_out_act.setShortcut("Ctrl+Shift+F")
+        find_out_act.triggered.connect(self.show_output_search)
+        goto_out_act = QAction("Go to Output Line…", self)
+        goto_out_act.setShortcut("Ctrl+G")
+        goto_out_act.triggered.connect(self.goto_output_line)
+        profile_act = QAction("Profile Complexity…", self)
+        profile_act.triggered.connect(self.profile_complexity)
+        for act in (run_act, tests_act, self.fail_fast_act, self.meter_act, profile_act, stop_act, clear_out_act,
+                    find_out_act, goto_out_act):
             run_menu.addAction(act)
 
-        # Programs menu: show 5 templates chosen at random (in random order) each run of the IDE
-        programs_menu = self.menu_bar.addMenu("Programs")
+        # Programs menu: show 5 templates chosen at random (in random order) each run of the IDE.
+        # Its actions are added after the first paint in _build_template_ui.
+        self.programs_menu = self.menu_bar.addMenu("Programs")
         all_keys = list(self.PROGRAM_TEMPLATES.keys())
-        # choose 5 random templates to show this session
-        self.visible_template_keys = random.sample(all_keys, 5)
-        random.shuffle(self.visible_template_keys)
+        # Restore the previous session's templates if a snapshot exists,
+        # otherwise choose 5 random templates to show this session
+        self._session = self._load_session()
+        if self._session is not None:
+            self.visible_template_keys = list(self._session["visible"])
+            self.removed_template_keys = list(self._session["removed"])
+        else:
+            self.visible_template_keys = random.sample(all_keys, 5)
+            random.shuffle(self.visible_template_keys)
+            self.removed_template_keys = []
 
         self.prog_actions = []
         self.template_buttons = []  # Store template buttons for enable/disable control
-        for key in self.visible_template_keys:
-            i = int(key.replace("prog", ""))
-            act = QAction(f"Prog {i}", self)
-            act.triggered.connect(lambda checked=False, k=key: self.load_program_template(k))
-            programs_menu.addAction(act)
-            self.prog_actions.append(act)
 
         # Help menu
         help_menu = self.menu_bar.addMenu("Help")
@@ -279,34 +1281,14 @@ print(x)
         layout.addWidget(self.error_banner)
         
         # ---------- TEMPLATES PANEL ----------
-        # Display available templates as quick-access buttons
+        # Display available templates as quick-access buttons (filled in by _build_template_ui)
         self.templates_panel_label = QLabel("📋 Available Templates (Click to Load)")
         layout.addWidget(self.templates_panel_label)
         templates_panel = QHBoxLayout()
         self.templates_panel_layout = templates_panel  # Store reference for later access
-        
-        for key in self.visible_template_keys:
-            i = int(key.replace("prog", ""))
-            btn = QPushButton(f"Template {i}")
-            btn.setStyleSheet("""
-                QPushButton {
-                    background:#4f46e5;
-                    color:white;
-                    padding:10px 16px;
-                    font-size:12px;
-                    border-radius:6px;
-                    border: 2px solid #4f46e5;
-                    font-weight: bold;
-                }
-                QPushButton:hover { background:#4338ca; border: 2px solid #3730a3; }
-                QPushButton:pressed { background:#3730a3; }
-            """)
-            btn.clicked.connect(lambda checked=False, k=key: self.load_program_template(k))
-            templates_panel.addWidget(btn)
-            self.template_buttons.append((btn, key))
-        
-        templates_panel.addStretch()
         self.templates_panel_widget = QWidget()  # Container for the layout
+        # One stylesheet on the container instead of one per button
+        self.templates_panel_widget.setStyleSheet(self.TEMPLATE_BUTTON_STYLE)
         self.templates_panel_widget.setLayout(templates_panel)
         layout.addWidget(self.templates_panel_widget)
         
@@ -315,11 +1297,23 @@ print(x)
         layout.addLayout(btns)
         layout.addWidget(QLabel("📤 Output Console"))
         layout.addWidget(self.output, 2)
-
-        self.setStyleSheet("background:#ffffff; color:#0b1220;")
+        startup_mark("editor and layout built")
 
         # ---------- PROCESS ----------
-        self.process = QProcess(self)
+        # Pre-runs, file I/O, session writes and remote runs are coroutines on
+        # self.aio, created on first use (see the aio property)
+        self._aio = None
+
+        # MNMJ_JUDGE_WORKER=host:port sends runs to a LAN judge worker (local fallback)
+        judge_address = None
+        if os.environ.get("MNMJ_JUDGE_WORKER", "").strip():
+            import judge_worker
+            judge_address = judge_worker.configured_address()
+        if judge_address is not None:
+            self.process = JudgeProcess(self.aio, judge_address, token=os.environ.get("MNMJ_JUDGE_TOKEN"),
+                                        timeout_s=self.HARD_TIMEOUT_MS / 1000.0 + 5, parent=self)
+        else:
+            self.process = QProcess(self)
         self.process.readyReadStandardOutput.connect(self.read_stdout)
         self.process.readyReadStandardError.connect(self.read_stderr)
         self.process.finished.connect(self.finished)
@@ -328,17 +1322,72 @@ print(x)
         self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.force_kill)
 
+        # started after the first paint
+        self.health_monitor = None
+        self.key_latency = None
+        self._admin_panel = None
+        self._admin_unlocked = False
+
+        # Verdicts go to a local SQLite store through a background writer thread
+        # (results_store and source_archive are opened on first use)
+        self._results_store = None
+        self._source_archive = None
+        self._template_attempts = {}
+        self._run_started = 0.0
+        self._run_template = None
+        self._run_source = ""
+        self._run_end_reason = None
+        self._run_meter_out = None
+        self._run_cost = None
+        self._run_failure_out = None
+        self._run_line_offset = 0
+        # Live per-template aggregates for the admin panel (made on first use)
+        self._template_stats = None
+
+        # Full stdout of the current run, indexed by line; the console only
+        # keeps the last OUTPUT_MAX_BLOCKS lines (made on first use)
+        self._output_index = None
+        self._output_trimmed = 0
+        self._output_chunk_lines = []
+        self._output_chunk_blocks = []
+        self._output_search_dialog = None
+
+        # Each run gets a throwaway directory (RAM-backed where possible);
+        # leftovers of a crashed IDE are swept after the first paint
+        self._workspace_reaper = None
+        self._run_workspace = None
+        self._tests_workspace = None
+        self.quota_timer = QTimer(self)
+        self.quota_timer.setInterval(self.WORKSPACE_QUOTA_POLL_MS)
+        self.quota_timer.timeout.connect(self._check_workspace_quota)
+
+        # Verified reference fixes: a submission that is one (up to comments and formatting) needs no run.
+        # Validated once in the background (then cached on disk) after the first paint; runs are
+        # normal until it is ready.
+        self.reference_index = None
+        self._run_from_reference = False
+
+        self.test_runner = TestCaseRunner(self)
+        self.test_runner.case_finished.connect(self._on_test_case_finished)
+        self.test_runner.all_finished.connect(self._on_tests_finished)
+        self._test_file = None
+
         # group timer variables
         self.group_timer_started = False
         self.group_time_left_ms = 0
+        self.group_deadline = 0.0
         self.group_countdown_timer = QTimer(self)
         self.group_countdown_timer.timeout.connect(self._tick_group_timer)
 
         self.temp_file = None
         self.user_input = ""
         self.current_file = None
+        # newest save still in flight; it becomes current_file once written
+        self._save_target = None
         self.runtime_error = False
         self.current_template = None
+        self.last_preflight = None
+        self._pre_run_cache = {}
 
         # Track whether window was maximized before a run so we can restore it later
         self._pre_run_was_maximized = False
@@ -375,9 +1424,112 @@ print(x)
         except Exception:
             self._debugger_check_timer = None
 
+        # Session snapshots are coalesced so bursts of edits cost one write
+        self._session_save_timer = QTimer(self)
+        self._session_save_timer.setSingleShot(True)
+        self._session_save_timer.setInterval(500)
+        self._session_save_timer.timeout.connect(self._save_session)
+        if self._session is not None:
+            self._restore_session(self._session)
+        self._session = None
+        self.editor.textChanged.connect(self._schedule_session_save)
+
+        # Template buttons, Programs menu entries and the reference index are
+        # not needed for the first frame; paintEvent starts them after it.
+        startup_mark("__init__ done")
+
         # ========== NEW: ENHANCED WINDOW LOCK PROTECTION ==========
         # (hash and debugger locks removed)
 
+    # ---------- DEFERRED STARTUP ----------
+    @property
+    def aio(self):
+        if self._aio is None:
+            from qt_asyncio import QtAsyncioBridge
+            self._aio = QtAsyncioBridge(self)
+        return self._aio
+
+    @property
+    def results_store(self):
+        if self._results_store is None:
+            from results_store import ResultsStore
+            self._results_store = ResultsStore()
+        return self._results_store
+
+    @property
+    def source_archive(self):
+        if self._source_archive is None:
+            from source_archive import SourceArchive
+            self._source_archive = SourceArchive()
+        return self._source_archive
+
+    @property
+    def template_stats(self):
+        if self._template_stats is None:
+            from template_stats import TemplateStatsEngine
+            self._template_stats = TemplateStatsEngine()
+        return self._template_stats
+
+    @property
+    def output_index(self):
+        if self._output_index is None:
+            from output_index import OutputIndex
+            self._output_index = OutputIndex()
+        return self._output_index
+
+    @property
+    def workspace_reaper(self):
+        if self._workspace_reaper is None:
+            import run_workspace
+            self._workspace_reaper = run_workspace.Reaper()
+        return self._workspace_reaper
+
+    def _after_first_paint(self):
+        """Work that waits until the window is on screen."""
+        self._build_template_ui()
+        self.health_monitor = HealthMonitor(self)
+        self.health_monitor.start()
+        self.key_latency = KeyLatencyProbe(self.editor)
+        self.workspace_reaper.sweep()
+        import reference_fixes
+        self.aio.spawn(self.aio.run_in_worker(reference_fixes.ensure_index, reference_fixes.FIXES,
+                                              self._reference_expected()),
+                       name="reference-fixes", done=self._on_reference_index)
+
+    def _build_template_ui(self):
+        """Create the Programs menu actions and template buttons after first paint."""
+        if self.prog_actions or self.template_buttons:
+            return
+        for key in self.visible_template_keys:
+            i = int(key.replace("prog", ""))
+            act = QAction(f"Prog {i}", self)
+            act.triggered.connect(lambda checked=False, k=key: self.load_program_template(k))
+            self.programs_menu.addAction(act)
+            self.prog_actions.append(act)
+
+        for key in self.visible_template_keys:
+            i = int(key.replace("prog", ""))
+            btn = QPushButton(f"Template {i}")
+            btn.clicked.connect(lambda checked=False, k=key: self.load_program_template(k))
+            self.templates_panel_layout.addWidget(btn)
+            self.template_buttons.append((btn, key))
+        self.templates_panel_layout.addStretch()
+
+        # Respect state restored from a session snapshot
+        expired = self.group_timer_started and self.group_time_left_ms == 0
+        if self.current_template or expired:
+            self.set_program_actions_enabled(False)
+        if expired:
+            self.set_template_buttons_enabled(False)
+        startup_mark("template panel built")
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            startup_mark("first paint")
+            QTimer.singleShot(0, self._after_first_paint)
+
     # ---------- Helpers ----------
     def _on_focus_changed(self, old, now):
         try:
@@ -395,6 +1547,8 @@ print(x)
         if self._system_hook_installed:
             return True
         try:
+            import ctypes
+            from ctypes import wintypes
             user32 = ctypes.windll.user32
             kernel32 = ctypes.windll.kernel32
 
@@ -452,6 +1606,7 @@ print(x)
             return
         try:
             if self._system_hook_installed and self._hhook:
+                import ctypes
                 ctypes.windll.user32.UnhookWindowsHookEx(self._hhook)
         except Exception:
             pass
@@ -497,6 +1652,9 @@ print(x)
             # Remove from visible_template_keys
             if template_name in self.visible_template_keys:
                 self.visible_template_keys.remove(template_name)
+            if template_name not in self.removed_template_keys:
+                self.removed_template_keys.append(template_name)
+            self.template_docs.evict(template_name)
             
             # Remove from menu actions
             for i, act in enumerate(self.prog_actions):
@@ -505,11 +1663,7 @@ print(x)
                 if f"Prog {template_num}" == act_text:
                     self.prog_actions.pop(i)
                     try:
-                        # Remove from menu (we need to find the Programs menu)
-                        for menu in self.menu_bar.findChildren(type(self.menu_bar)):
-                            if menu.title() == "Programs":
-                                menu.removeAction(act)
-                                break
+                        self.programs_menu.removeAction(act)
                     except Exception:
                         pass
                     break
@@ -527,6 +1681,7 @@ print(x)
                 self.templates_panel_widget.setVisible(False)
         except Exception:
             pass
+        self._save_session()
 
     # (hash-based validation and external-debugger blocking removed)
 
@@ -537,10 +1692,12 @@ print(x)
             return
         self.group_timer_started = True
         self.group_time_left_ms = self.GROUP_TIMER_MS
+        self.group_deadline = time.time() + self.GROUP_TIMER_MS / 1000.0
         self._update_group_timer_label()
         self.group_timer_label.setVisible(True)
         self.group_countdown_timer.start(1000)
         QTimer.singleShot(self.GROUP_TIMER_MS, self.on_group_time_expired)
+        self._save_session()
 
     def _tick_group_timer(self):
         self.group_time_left_ms -= 1000
@@ -565,6 +1722,7 @@ print(x)
             pass
         self.editor.setReadOnly(True)
         self.run_btn.setEnabled(False)
+        self.test_btn.setEnabled(False)
         self.set_program_actions_enabled(False)
         self.set_file_actions_enabled(False)
         self.set_template_buttons_enabled(False)
@@ -572,38 +1730,156 @@ print(x)
         self.group_timer_label.setVisible(True)
         self._update_group_timer_label()
 
+    # ---------- SESSION SNAPSHOT ----------
+    def _load_session(self):
+        """Read the session snapshot, or return None if there is no usable one."""
+        try:
+            if os.path.getsize(self.SESSION_FILE) > self.SESSION_MAX_BYTES:
+                return None
+            with open(self.SESSION_FILE, encoding="utf-8") as f:
+                snap = json.load(f)
+            return self._valid_session(snap)
+        except Exception:
+            return None
+
+    def _valid_session(self, snap):
+        """``snap`` if every field has the expected type and names known templates, else None."""
+        if not isinstance(snap, dict) or snap.get("version") != self.SESSION_VERSION:
+            return None
+        keys = snap.get("visible"), snap.get("removed")
+        if not all(isinstance(k, list) and all(isinstance(x, str) and x in self.PROGRAM_TEMPLATES for x in k)
+                   for k in keys):
+            return None
+        if not isinstance(snap.get("template"), str) or (
+                snap["template"] and snap["template"] not in self.PROGRAM_TEMPLATES):
+            return None
+        deadline = snap.get("deadline")
+        if isinstance(deadline, bool) or not isinstance(deadline, (int, float)) or not 0 <= deadline < 1e11:
+            return None
+        documents = snap.get("documents")
+        if not isinstance(documents, dict) or not all(
+                key in self.PROGRAM_TEMPLATES and isinstance(text, str) for key, text in documents.items()):
+            return None
+        if not isinstance(snap.get("buffer"), str):
+            return None
+        if not isinstance(snap.get("exam_lock"), bool) or not isinstance(snap.get("halt"), bool):
+            return None
+        attempts = snap.setdefault("attempts", {})
+        if not isinstance(attempts, dict) or not all(
+                key in self.PROGRAM_TEMPLATES and type(count) is int and count >= 0
+                for key, count in attempts.items()):
+            return None
+        return snap
+
+    def _save_session(self, wait=False):
+        """Write the current station state atomically to SESSION_FILE (in the background unless ``wait``)."""
+        try:
+            self._session_save_timer.stop()
+        except Exception:
+            pass
+        try:
+            snap = {
+                "version": self.SESSION_VERSION,
+                "visible": list(self.visible_template_keys),
+                "removed": list(self.removed_template_keys),
+                "deadline": float(self.group_deadline) if self.group_timer_started else 0.0,
+                "template": self.current_template or "",
+                "buffer": self.editor.toPlainText(),
+                "documents": self.template_docs.texts(),
+                "exam_lock": bool(self.exam_lock_active),
+                "halt": bool(self.halt_mode_active),
+                # attempt numbers in the results store continue across restarts
+                "attempts": dict(self._template_attempts),
+            }
+            blob = json.dumps(snap, ensure_ascii=False).encode("utf-8")
+            if wait:
+                if self._aio is not None:
+                    self._aio.cancel("session-save")
+                tmp_path = self.SESSION_FILE + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(blob)
+                os.replace(tmp_path, self.SESSION_FILE)
+            else:
+                # writes are serialized on the I/O thread, so the newest snapshot lands last
+                from qt_asyncio import write_bytes_atomic
+                self.aio.spawn(write_bytes_atomic(self.SESSION_FILE, blob), name="session-save")
+        except Exception:
+            pass
+
+    def _schedule_session_save(self):
+        try:
+            self._session_save_timer.start()
+        except Exception:
+            pass
+
+    def _restore_session(self, snap):
+        """Apply a loaded snapshot; called from __init__ before the window is shown."""
+        self._template_attempts = dict(snap["attempts"])
+        for key, text in snap.get("documents", {}).items():
+            if key not in snap["removed"]:
+                self.template_docs.add(key, text)
+        self.current_template = snap["template"] or None
+        if self.current_template:
+            self.template_docs.show_template(self.current_template, snap["buffer"])
+        else:
+            self.editor.setPlainText(snap["buffer"])
+        self.halt_mode_active = bool(snap["halt"])
+        if self.current_template:
+            self.set_program_actions_enabled(False)
+            self.set_file_actions_enabled(False)
+            self.set_error_banner(True, f"📝 Template '{self.current_template}' restored — Fix the code and run successfully OR switch to another template from the Programs menu")
+        if not self.visible_template_keys:
+            self.templates_panel_label.setVisible(False)
+            self.templates_panel_widget.setVisible(False)
+
+        deadline = snap["deadline"]
+        if deadline:
+            self.group_timer_started = True
+            self.group_deadline = deadline
+            left_ms = int((deadline - time.time()) * 1000)
+            if left_ms <= 0:
+                self.group_time_left_ms = 0
+                self.on_group_time_expired()
+            else:
+                self.group_time_left_ms = left_ms
+                self._update_group_timer_label()
+                self.group_timer_label.setVisible(True)
+                self.group_countdown_timer.start(1000)
+                QTimer.singleShot(left_ms, self.on_group_time_expired)
+
+        if snap["exam_lock"]:
+            # Flags are set before the first show(), so no native window is rebuilt
+            self.exam_lock_active = True
+            self.setWindowFlag(Qt.WindowStaysOnTopHint, True)
+            self.setWindowFlag(Qt.WindowMinimizeButtonHint, False)
+            self.setWindowFlag(Qt.WindowMaximizeButtonHint, False)
+            self.setWindowState(Qt.WindowFullScreen)
+
     # ---------- WINDOW LOCK ----------
+    # All window flag / show-state changes go through self.window_state so a
+    # single event (e.g. finished) rebuilds the native window at most once.
     def lock_window(self):
         try:
-            self.setWindowFlag(Qt.WindowCloseButtonHint, True)
-            self.setWindowFlag(Qt.WindowStaysOnTopHint, True)
-            self.raise_()
-            self.activateWindow()
-            self.show()
+            self.window_state.request(on=Qt.WindowCloseButtonHint | Qt.WindowStaysOnTopHint, activate=True)
         except Exception:
             pass
 
     def unlock_window(self):
         try:
-            self.setWindowFlag(Qt.WindowStaysOnTopHint, False)
-            self.show()
+            self.window_state.request(off=Qt.WindowStaysOnTopHint)
         except Exception:
             pass
 
     # ---------- MIN / MAX CONTROL ----------
     def disable_min_max(self):
         try:
-            self.setWindowFlag(Qt.WindowMinimizeButtonHint, False)
-            self.setWindowFlag(Qt.WindowMaximizeButtonHint, False)
-            self.show()
+            self.window_state.request(off=Qt.WindowMinimizeButtonHint | Qt.WindowMaximizeButtonHint)
         except Exception:
             pass
 
     def enable_min_max(self):
         try:
-            self.setWindowFlag(Qt.WindowMinimizeButtonHint, True)
-            self.setWindowFlag(Qt.WindowMaximizeButtonHint, True)
-            self.show()
+            self.window_state.request(on=Qt.WindowMinimizeButtonHint | Qt.WindowMaximizeButtonHint)
         except Exception:
             pass
 
@@ -621,7 +1897,8 @@ print(x)
 
     # ---------- INPUT DETECTION ----------
     def code_needs_input(self, code):
-        return "input(" in code
+        from preflight import analyze_source
+        return analyze_source(code).reads_stdin
 
     # ---------- SYNTAX CHECK ----------
     def has_syntax_error(self, code):
@@ -633,6 +1910,10 @@ print(x)
 
     # ---------- RUN ----------
     def run_code(self):
+        import launch_profiles
+        import instruction_meter
+        import failure_channel
+        from preflight import analyze_source
         if self.group_timer_started and self.group_time_left_ms == 0:
             QMessageBox.information(self, "Time Expired", "Template time expired — editor is read-only.")
             return
@@ -641,10 +1922,12 @@ print(x)
         if not code:
             QMessageBox.warning(self, "No Code", "Please write some Python code.")
             return
+        # Every submitted source goes to the audit archive (background thread)
+        self.source_archive.add_async(code, template=self.current_template)
 
         error = self.has_syntax_error(code)
         if error:
-            self.output.clear()
+            self._clear_output()
             self.output.appendPlainText("❌ERROR DETECTED\n")
             self.output.appendPlainText("Error occurred\n")
             self.runtime_error = True
@@ -654,6 +1937,7 @@ print(x)
             else:
                 self.set_error_banner(True, "❌error detected — fix code and run to unlock window")
             self.lock_window()
+            self._record_attempt(code, "syntax_error", time.time(), 0.0, self.current_template)
             return
 
         # (previous code-integrity and external-debugger checks removed)
@@ -667,7 +1951,15 @@ print(x)
             self.start_group_timer_if_needed()
 
         self.user_input = ""
-        if self.code_needs_input(code):
+        self.last_preflight = analyze_source(code)
+        # a metered run is wanted for its cost, and stdin makes cached output meaningless
+        if self.reference_index and not self.last_preflight.reads_stdin and not self.meter_act.isChecked():
+            import reference_fixes
+            entry = reference_fixes.match(self.reference_index, self.current_template, code)
+            if entry is not None:
+                self._finish_from_reference(code, entry)
+                return
+        if self.last_preflight.reads_stdin:
             text, ok = QInputDialog.getMultiLineText(self, "Program Input", "Enter input:")
             if not ok:
                 return
@@ -675,31 +1967,21 @@ print(x)
 
         # Add a runtime guard to the temporary script so it only executes when
         # launched from this IDE process (parent-PID verification).
-        guard = (
-            "import os,sys\n"
-            "_expected_ppid = os.environ.get('MNMJ_PARENT_PID')\n"
-            "try:\n"
-            "    if _expected_ppid is None or int(_expected_ppid) != os.getppid():\n"
-            "        print('❌ Unauthorized execution: script must be run from the MNMJ IDE')\n"
-            "        sys.exit(2)\n"
-            "except Exception:\n"
-            "    print('❌ Unauthorized execution: script must be run from the MNMJ IDE')\n"
-            "    sys.exit(2)\n"
-            "sys.setrecursionlimit(10**7)\n"
-        )
-        code = guard + code
-
+        # The launch profile decides interpreter flags, environment and
+        # whether the script is handed over precompiled.
+        _, profile = launch_profiles.get_profile()
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".py", mode="w", encoding="utf-8") as f:
-                f.write(code)
-                self.temp_file = f.name
+            self.temp_file = launch_profiles.write_script(profile, run_guard(), code)
         except Exception as e:
             QMessageBox.critical(self, "Temp File Error", f"Failed to write temp file:\n{e}")
             self.enable_min_max()
             return
 
-        self.output.clear()
+        self._clear_output()
         self.output.appendPlainText("▶ Running...\n")
+        if self.last_preflight.infinite_loop_lines:
+            lines = ", ".join(str(n) for n in self.last_preflight.infinite_loop_lines)
+            self.output.appendPlainText(f"⚠️ Possible infinite loop with no output (line {lines}).\n")
 
         self.editor.setReadOnly(True)
         self.run_btn.setEnabled(False)
@@ -707,35 +1989,50 @@ print(x)
 
         try:
             self._pre_run_was_maximized = self.isMaximized()
-            self.showMaximized()
+            self.window_state.request(mode="maximized")
         except Exception:
             pass
 
+        self._run_started = time.time()
+        self._run_template = self.current_template
+        self._run_source = self.editor.toPlainText().strip()
+        self._run_end_reason = None
+
         try:
-            # Mark that this run is initiated by the IDE and set a short-lived
-            # environment variable the child will check.
-            prev_env = os.environ.get('MNMJ_PARENT_PID')
-            try:
-                os.environ['MNMJ_PARENT_PID'] = str(os.getpid())
-                self._last_run_initiated_by_ide = True
-                self.process.start(sys.executable, ["-u", self.temp_file])
-            finally:
-                # restore previous environment variable immediately; child has already inherited it
-                try:
-                    if prev_env is None:
-                        del os.environ['MNMJ_PARENT_PID']
-                    else:
-                        os.environ['MNMJ_PARENT_PID'] = prev_env
-                except Exception:
-                    pass
+            # Mark that this run is initiated by the IDE; the child checks
+            # MNMJ_PARENT_PID in its own environment.
+            self._last_run_initiated_by_ide = True
+            self._run_workspace = self._new_workspace("run")
+            env = self._child_environment(profile)
+            self._run_meter_out = None
+            if self.meter_act.isChecked() and self._run_workspace:
+                self._run_meter_out = instruction_meter.cost_path(self._run_workspace)
+                for key, value in instruction_meter.environment(self._run_meter_out).items():
+                    env.insert(key, value)
+            # uncaught exceptions are reported as records here instead of being parsed from stderr
+            self._run_failure_out = None
+            if self._run_workspace:
+                self._run_failure_out = os.path.join(self._run_workspace, ".mnmj_failures")
+                self._run_line_offset = launch_profiles.code_line_offset(profile, run_guard())
+                for key, value in failure_channel.environment(self._run_failure_out).items():
+                    env.insert(key, value)
+            self.process.setProcessEnvironment(env)
+            self.process.setWorkingDirectory(self._run_workspace or "")
+            if isinstance(self.process, JudgeProcess):
+                # a remote child meters and reports failures in the worker's workspace
+                self.process.set_job(run_guard(), code,
+                                     meter_limit=instruction_meter.DEFAULT_LIMIT if self._run_meter_out else None,
+                                     failures=bool(self._run_failure_out))
+            self.process.start(sys.executable, launch_profiles.command(profile, self.temp_file))
             if not self.process.waitForStarted(1000):
+                self._release_run_workspace()
                 self.output.appendPlainText("\n❌ Failed to start process.\n")
                 self.stop_btn.setEnabled(False)
                 self.run_btn.setEnabled(True)
                 self.editor.setReadOnly(False)
                 try:
                     if not self._pre_run_was_maximized:
-                        self.showNormal()
+                        self.window_state.request(mode="normal")
                 except Exception:
                     pass
                 return
@@ -752,33 +2049,293 @@ print(x)
             except Exception:
                 pass
         except Exception:
+            self._release_run_workspace()
             self.output.appendPlainText("\n❌ Failed to start process.\n")
             self.stop_btn.setEnabled(False)
             self.run_btn.setEnabled(True)
             self.editor.setReadOnly(False)
             try:
                 if not self._pre_run_was_maximized:
-                    self.showNormal()
+                    self.window_state.request(mode="normal")
             except Exception:
                 pass
             return
 
-        if self.user_input and self.process.state() == QProcess.Running:
+        if self.process.state() == QProcess.Running:
             try:
-                self.process.write(self.user_input.encode())
+                if self.user_input:
+                    self.process.write(self.user_input.encode())
+                # Programs that never read stdin get EOF straight away instead
+                # of an open pipe that could block a stray read.
                 self.process.closeWriteChannel()
             except Exception:
                 pass
 
         self.timer.start(self.HARD_TIMEOUT_MS)
+        self.quota_timer.start()
+
+    # ---------- TEST CASES ----------
+    def run_tests(self):
+        """Run the editor code against the current template's test cases concurrently."""
+        if self.group_timer_started and self.group_time_left_ms == 0:
+            QMessageBox.information(self, "Time Expired", "Template time expired — editor is read-only.")
+            return
+        if self.process.state() == QProcess.Running or self.test_runner.is_running():
+            return
+        import launch_profiles
+
+        cases = self.TEMPLATE_TEST_CASES.get(self.current_template or "")
+        if not cases:
+            QMessageBox.information(self, "No Test Cases", "The current code has no test cases — use Run instead.")
+            return
+
+        code = self.editor.toPlainText().strip()
+        if not code:
+            QMessageBox.warning(self, "No Code", "Please write some Python code.")
+            return
+        if self.has_syntax_error(code):
+            self._clear_output()
+            self.output.appendPlainText("❌ERROR DETECTED\n")
+            self.output.appendPlainText("Error occurred\n")
+            return
+
+        _, profile = launch_profiles.get_profile()
+        try:
+            self._test_file = launch_profiles.write_script(profile, run_guard(), code)
+        except Exception as e:
+            QMessageBox.critical(self, "Temp File Error", f"Failed to write temp file:\n{e}")
+            return
+
+        self._clear_output()
+        workers = min(len(cases), self.test_runner.max_workers)
+        self.output.appendPlainText(f"🧪 Running {len(cases)} test case(s) on {workers} worker(s)...\n")
+        self.editor.setReadOnly(True)
+        self.run_btn.setEnabled(False)
+        self.test_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
+        self._tests_workspace = self._new_workspace("test")
+        self.test_runner.start(launch_profiles.command(profile, self._test_file), cases,
+                               fail_fast=self.fail_fast_act.isChecked(),
+                               timeout_ms=self.TEST_CASE_TIMEOUT_MS,
+                               env=self._child_environment(profile),
+                               working_dir=self._tests_workspace)
+
+    def _on_test_case_finished(self, result):
+        labels = {
+            "pass": "✅ passed",
+            "wrong_output": "❌ wrong output",
+            "error": "❌ error",
+            "timeout": "⏱ time limit exceeded",
+            "cancelled": "⛔ cancelled",
+        }
+        self.output.appendPlainText(
+            f"  Case {result['index'] + 1}: {labels.get(result['status'], result['status'])} ({result['ms']:.0f} ms)")
+
+    def _on_tests_finished(self, verdict):
+        if self._test_file and os.path.exists(self._test_file):
+            try:
+                os.remove(self._test_file)
+            except Exception:
+                pass
+        self._test_file = None
+        self.workspace_reaper.discard(self._tests_workspace)
+        self._tests_workspace = None
+
+        cases = verdict["cases"]
+        passed = sum(1 for r in cases if r["passed"])
+        if verdict["passed"]:
+            self.output.appendPlainText(f"\n✅ Verdict: all {len(cases)} test case(s) passed ({verdict['ms']:.0f} ms)")
+        else:
+            self.output.appendPlainText(f"\n❌ Verdict: {passed}/{len(cases)} test case(s) passed ({verdict['ms']:.0f} ms)")
+
+        self.stop_btn.setEnabled(False)
+        if not (self.group_timer_started and self.group_time_left_ms == 0):
+            self.editor.setReadOnly(False)
+            self.run_btn.setEnabled(True)
+            self.test_btn.setEnabled(True)
+
+    # ---------- RESULTS ----------
+    def _record_attempt(self, source, verdict, started, duration_ms, template, exit_code=None, cost=None):
+        """Queue one run for the results store (never blocks on disk)."""
+        try:
+            template = template or None
+            attempt = None
+            if template:
+                attempt = self._template_attempts.get(template, 0) + 1
+                self._template_attempts[template] = attempt
+            self.results_store.record_run(
+                template, started, duration_ms, verdict, exit_code=exit_code,
+                output_produced=self.execution_output_produced,
+                source_hash=hashlib.sha1(source.encode("utf-8", "surrogatepass")).hexdigest(),
+                attempt=attempt or 1, cost=cost)
+            self.template_stats.on_run_finished(template, duration_ms, verdict)
+        except Exception:
+            pass
+
+    def _run_verdict(self):
+        """Verdict for the run that just finished; called before finished() changes state."""
+        if self._run_end_reason:
+            return self._run_end_reason
+        if self.runtime_error:
+            return "error"
+        if self._run_template:
+            return "fixed" if self._last_run_initiated_by_ide else "locked"
+        return "ok"
+
+    def _collect_run_cost(self):
+        """Read the metered cost of the run that just finished; an exceeded budget or a missing count is a limit verdict."""
+        import instruction_meter
+        self._run_cost = None
+        if not self._run_meter_out:
+            return
+        self._run_cost = instruction_meter.read_cost(self._run_meter_out)
+        self._run_meter_out = None
+        if self._ran_remotely():
+            if "cost" not in self.process.remote_result:
+                # a worker that does not meter: no cost, and no verdict from a missing count
+                return
+            self._run_cost = self.process.remote_result["cost"]
+        # no count at all means the program got around the meter (or the count file), so it
+        # gets no benefit of the doubt
+        exceeded = self.process.exitCode() == instruction_meter.METER_EXIT_CODE
+        if (exceeded or self._run_cost is None) and self._run_end_reason is None:
+            self._run_end_reason = "ops_limit"
+            self.runtime_error = True
+            if exceeded:
+                self.output.appendPlainText(
+                    f"\n⏱ Time limit exceeded: more than {instruction_meter.DEFAULT_LIMIT:,} lines executed.")
+            else:
+                self.output.appendPlainText(
+                    "\n⏱ No cost reported (the program ended abnormally or switched the meter off); "
+                    "counted as over the limit.")
+        elif self._run_cost is not None:
+            self.output.appendPlainText(f"\n📏 Cost: {self._run_cost:,} lines executed.")
+
+    # ---------- REFERENCE FIXES ----------
+    def _reference_expected(self):
+        """{template: expected stdout} from the stdin-less test cases, for validating the fixes."""
+        return {template: cases[0]["expected"] for template, cases in self.TEMPLATE_TEST_CASES.items()
+                if len(cases) == 1 and not cases[0]["stdin"]}
+
+    def _on_reference_index(self, task):
+        if task.exception() is None:
+            self.reference_index = task.result()
+
+    def _finish_from_reference(self, code, entry):
+        """Complete a run without a child: ``code`` is equivalent to a verified fix, so show its output."""
+        self._clear_output()
+        self.output.appendPlainText("▶ Running...\n")
+        try:
+            self._pre_run_was_maximized = self.isMaximized()
+        except Exception:
+            pass
+        self._run_started = time.time()
+        self._run_template = self.current_template
+        self._run_source = code
+        self._run_end_reason = None
+        self._run_cost = None
+        self._run_from_reference = True
+        self._last_run_initiated_by_ide = True
+        self._show_stdout(entry["stdout"].encode("utf-8"))
+        self.output.appendPlainText("\n⚡ Same as a verified fix — result taken from its checked run.")
+        try:
+            self.finished()
+        finally:
+            self._run_from_reference = False
+
+    def _ran_remotely(self):
+        return isinstance(self.process, JudgeProcess) and self.process.backend == "remote"
+
+    def _collect_run_failures(self):
+        """Store and aggregate the structured failure records of the run that just finished."""
+        import failure_channel
+        out, self._run_failure_out = self._run_failure_out, None
+        if not out:
+            return
+        records = failure_channel.read_records(out, self._run_line_offset)
+        if self._ran_remotely():
+            # already in the editor's numbering
+            records = self.process.remote_result.get("failures") or []
+        for record in records:
+            self.template_stats.on_failure(self._run_template, record)
+            if self._run_started:
+                self.results_store.record_failure(self._run_template, self._run_started, record)
+
+    def _record_run_result(self):
+        if not self._run_started:
+            return
+        duration_ms = (time.time() - self._run_started) * 1000.0
+        exit_code = 0 if self._run_from_reference else self.process.exitCode()
+        self._record_attempt(self._run_source, self._run_verdict(), self._run_started, duration_ms,
+                             self._run_template, exit_code=exit_code, cost=self._run_cost)
+        self._run_started = 0.0
+
+    # ---------- RUN WORKSPACES ----------
+    def _new_workspace(self, kind):
+        """A fresh working directory for a child, or None to inherit ours if it cannot be made."""
+        import run_workspace
+        try:
+            return run_workspace.create(kind)
+        except OSError:
+            return None
+
+    def _release_run_workspace(self):
+        self.quota_timer.stop()
+        self.aio.cancel("quota-check")
+        self.workspace_reaper.discard(self._run_workspace)
+        self._run_workspace = None
+
+    def _check_workspace_quota(self):
+        workspace = self._run_workspace
+        if workspace is None or self.aio.is_active("quota-check"):
+            return
+        import run_workspace
+        from qt_asyncio import run_blocking
+        self.aio.spawn(run_blocking(run_workspace.usage, workspace, run_workspace.QUOTA_BYTES), name="quota-check",
+                       done=lambda task: self._on_workspace_usage(workspace, task))
+
+    def _on_workspace_usage(self, workspace, task):
+        if task.exception() is not None or workspace != self._run_workspace:
+            return
+        import run_workspace
+        if task.result() > run_workspace.QUOTA_BYTES and self.process.state() == QProcess.Running:
+            try:
+                self.process.kill()
+            except Exception:
+                pass
+            self._run_end_reason = "quota"
+            # a run stopped for its disk usage must not count as a fix
+            self.runtime_error = True
+            self.output.appendPlainText(
+                f"\n💾 Disk quota exceeded ({run_workspace.QUOTA_BYTES // (1024 * 1024)} MB) — run stopped.")
+
+    def _child_environment(self, profile):
+        import launch_profiles
+        import run_workspace
+        env = QProcessEnvironment()
+        for key, value in launch_profiles.child_environment(profile, os.environ, os.getpid()).items():
+            env.insert(key, value)
+        for key, value in run_workspace.environment().items():
+            env.insert(key, value)
+        return env
 
     # ---------- OUTPUT ----------
     def read_stdout(self):
         try:
-            text = bytes(self.process.readAllStandardOutput()).decode(errors="replace")
+            self._show_stdout(bytes(self.process.readAllStandardOutput()))
+        except Exception:
+            pass
+
+    def _show_stdout(self, data):
+        try:
+            text = data.decode(errors="replace")
             if text.strip():  # Track that we've received actual output
                 self.execution_output_produced = True
+            # remember which console block this chunk starts in, for jump-to-line
+            self._output_chunk_lines.append(self.output_index.append(data))
+            self._output_chunk_blocks.append(self._output_trimmed + self.output.blockCount() - 1)
             self.output.insertPlainText(text)
+            self._trim_output()
             cursor = self.output.textCursor()
             cursor.movePosition(QTextCursor.End)
             self.output.setTextCursor(cursor)
@@ -790,6 +2347,7 @@ print(x)
             data = bytes(self.process.readAllStandardError()).decode(errors="replace")
             if data.strip() and not self.runtime_error:
                 self.runtime_error = True
+                self.template_stats.on_stderr(self._run_template)
                 self.output.insertPlainText("\n❌ ERROR: Error occurred\n")
                 self.disable_min_max()
                 if self.current_template:
@@ -803,13 +2361,143 @@ print(x)
         except Exception:
             pass
 
+    # ---------- OUTPUT INDEX ----------
+    def _clear_output(self):
+        """Clear the console and start a new output index."""
+        self.output.clear()
+        if self._output_index is not None:
+            self._output_index.clear()
+        self._output_trimmed = 0
+        self._output_chunk_lines = []
+        self._output_chunk_blocks = []
+        if self._output_search_dialog is not None:
+            self._output_search_dialog.cancel("Output cleared.")
+
+    def _trim_output(self):
+        doc = self.output.document()
+        excess = doc.blockCount() - self.OUTPUT_MAX_BLOCKS
+        if excess <= 0:
+            return
+        # drop a tenth more than needed so this runs once per few thousand lines
+        excess += self.OUTPUT_MAX_BLOCKS // 10
+        cursor = QTextCursor(doc)
+        cursor.movePosition(QTextCursor.Start)
+        cursor.movePosition(QTextCursor.NextBlock, QTextCursor.KeepAnchor, excess)
+        cursor.removeSelectedText()
+        self._output_trimmed += excess
+
+    def show_output_line(self, i):
+        """Select stdout line ``i`` (0-based) in the console, or show it from the index if it was trimmed."""
+        try:
+            text = self.output_index.line(i)
+        except IndexError:
+            return
+        pos = bisect.bisect_right(self._output_chunk_lines, i) - 1
+        if pos >= 0:
+            block_no = self._output_chunk_blocks[pos] + i - self._output_chunk_lines[pos] - self._output_trimmed
+            block = self.output.document().findBlockByNumber(block_no)
+            if block_no >= 0 and block.isValid() and block.text().rstrip("\r") == text:
+                cursor = QTextCursor(block)
+                cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+                self.output.setTextCursor(cursor)
+                self.output.centerCursor()
+                return
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"Output line {i + 1:,}")
+        dialog.resize(720, 420)
+        view = QPlainTextEdit(readOnly=True)
+        view.setStyleSheet("font-family:Consolas; font-size:12px;")
+        view.setPlainText("\n".join(f"{n + 1:>9} {'▶' if n == i else ' '} {line}"
+                                     for n, line in self.output_index.lines(i - 15, i + 16)))
+        QVBoxLayout(dialog).addWidget(view)
+        dialog.show()
+
+    def goto_output_line(self):
+        count = self.output_index.line_count
+        if count == 0:
+            QMessageBox.information(self, "Go to Output Line", "There is no run output yet.")
+            return
+        line, ok = QInputDialog.getInt(self, "Go to Output Line", f"Line (1–{count:,}):", count, 1, count)
+        if ok:
+            self.show_output_line(line - 1)
+
+    def show_output_search(self):
+        if self._output_search_dialog is None:
+            self._output_search_dialog = OutputSearchDialog(self.output_index, self.show_output_line, self)
+        self._output_search_dialog.show()
+        self._output_search_dialog.raise_()
+        self._output_search_dialog.activateWindow()
+        self._output_search_dialog.pattern_edit.setFocus()
+
+    # ---------- COMPLEXITY PROFILE ----------
+    def profile_complexity(self):
+        """Time the editor's entry function on growing inputs in the background and report its class."""
+        import complexity_profiler
+        code = self.editor.toPlainText()
+        try:
+            ast.parse(code)
+        except SyntaxError as e:
+            QMessageBox.warning(self, "Profile Complexity", f"Fix the syntax error first (line {e.lineno}).")
+            return
+        default = self.PROFILE_ENTRIES.get(self.current_template or "", "")
+        kinds = ", ".join(complexity_profiler.KINDS)
+        spec, ok = QInputDialog.getText(self, "Profile Complexity",
+                                        f"Entry function and argument kinds, e.g. total(list)\nKinds: {kinds}",
+                                        QLineEdit.Normal, default)
+        if not ok or not spec.strip():
+            return
+        try:
+            entry, arg_kinds = complexity_profiler.parse_entry(spec)
+        except ValueError as e:
+            QMessageBox.warning(self, "Profile Complexity", str(e))
+            return
+        self.output.appendPlainText(f"\n⏱ Profiling {entry}({', '.join(arg_kinds)}) on growing inputs…")
+        self.aio.spawn(self.aio.run_in_worker(complexity_profiler.profile, code, entry, arg_kinds,
+                                              complexity_profiler.DEFAULT_SIZES, self.PROFILE_BUDGET_S),
+                       name="complexity-profile", done=self._on_profile_done)
+
+    def _on_profile_done(self, task):
+        if task.exception() is not None:
+            self.output.appendPlainText(f"Profiling failed: {task.exception()}")
+            return
+        import complexity_profiler
+        self.output.appendPlainText(complexity_profiler.format_report(task.result()))
+
+    # ---------- DIFFERENTIAL FUZZING ----------
+    # Judge-only (admin panel): the report shows what the reference returns for chosen inputs.
+    def fuzz_against_reference(self):
+        """Compare the editor's fix with the template's reference solution on random inputs in the background."""
+        if not self._admin_unlocked:
+            return
+        import differential_tester
+        parent = self._admin_panel or self
+        template = self.current_template
+        if template not in differential_tester.REFERENCES:
+            QMessageBox.information(parent, "Fuzz Against Reference",
+                                    "There is no reference solution for the current program.")
+            return
+        self.aio.spawn(self.aio.run_in_worker(differential_tester.fuzz, self.editor.toPlainText(), template),
+                       name="fuzz", done=self._on_fuzz_done)
+
+    def _on_fuzz_done(self, task):
+        parent = self._admin_panel or self
+        if task.exception() is not None:
+            QMessageBox.warning(parent, "Fuzz Against Reference", f"Fuzzing failed: {task.exception()}")
+            return
+        import differential_tester
+        QMessageBox.information(parent, "Fuzz Against Reference", differential_tester.format_report(task.result()))
+
     # ---------- CONTROL ----------
     def stop_process(self):
+        if self.test_runner.is_running():
+            self.test_runner.cancel()
+            self.output.appendPlainText("\n⛔ Tests stopped.")
         if self.process.state() == QProcess.Running:
             try:
                 self.process.kill()
             except Exception:
                 pass
+            self._run_end_reason = "stopped"
             self.output.appendPlainText("\n⛔ Stopped.")
         # remove protections if any
         try:
@@ -827,6 +2515,7 @@ print(x)
                 self.process.kill()
             except Exception:
                 pass
+            self._run_end_reason = "timeout"
             self.output.appendPlainText("\n⏱ Time limit exceeded.")
         # remove protections
         try:
@@ -839,6 +2528,19 @@ print(x)
             pass
 
     def finished(self):
+        try:
+            self._collect_run_cost()
+        except Exception:
+            pass
+        try:
+            self._collect_run_failures()
+        except Exception:
+            pass
+        try:
+            self._record_run_result()
+        except Exception:
+            pass
+        self._release_run_workspace()
         try:
             self.timer.stop()
             self.editor.setReadOnly(False)
@@ -848,7 +2550,7 @@ print(x)
 
             try:
                 if not self._pre_run_was_maximized:
-                    self.showNormal()
+                    self.window_state.request(mode="normal")
             except Exception:
                 pass
 
@@ -897,13 +2599,14 @@ print(x)
             # Activate exam-lock mode after process finishes
             try:
                 self.exam_lock_active = True
-                self.setWindowFlag(Qt.WindowStaysOnTopHint, True)
-                self.setWindowFlag(Qt.WindowMinimizeButtonHint, False)
-                self.setWindowFlag(Qt.WindowMaximizeButtonHint, False)
-                self.showFullScreen()
+                self.window_state.request(
+                    on=Qt.WindowStaysOnTopHint,
+                    off=Qt.WindowMinimizeButtonHint | Qt.WindowMaximizeButtonHint,
+                    mode="fullscreen")
                 self.output.appendPlainText("\n🔒 EXAM MODE ACTIVE — APP SWITCHING DISABLED")
             except Exception:
                 pass
+            self._save_session()
         finally:
             if self.temp_file and os.path.exists(self.temp_file):
                 try:
@@ -933,22 +2636,73 @@ print(x)
             QMessageBox.warning(self, "Exam Mode", "Application cannot be closed during exam mode.")
             event.ignore()
         else:
+            self._save_session(wait=True)
+            for service in (self._aio, self._results_store, self._source_archive):
+                if service is not None:
+                    service.close()
+            for service in (self._output_index, self._workspace_reaper):
+                if service is not None:
+                    service.close()
             event.accept()
 
+    # 🛠 ADMIN PANEL (Ctrl+F11)
+    def show_admin_panel(self):
+        # the monitors it shows start after the first paint
+        if self.health_monitor is None or not self._check_admin_token():
+            return
+        if self._admin_panel is None:
+            self._admin_panel = self._build_admin_panel()
+        self._admin_panel.show()
+        self._admin_panel.raise_()
+        self._admin_panel.activateWindow()
+
+    def _check_admin_token(self):
+        """True once the judge has entered MNMJ_ADMIN_TOKEN; always False on contestant stations."""
+        if not self.ADMIN_TOKEN:
+            return False
+        if not self._admin_unlocked:
+            token, ok = QInputDialog.getText(self, "Admin Panel", "Admin token:", QLineEdit.Password)
+            self._admin_unlocked = ok and hmac.compare_digest(token.encode("utf-8"),
+                                                              self.ADMIN_TOKEN.encode("utf-8"))
+        return self._admin_unlocked
+
+    def _build_admin_panel(self):
+        panel = AdminPanel(self)
+        tracemalloc_box = QCheckBox("tracemalloc diffs (adds overhead)")
+        tracemalloc_box.setChecked(self.health_monitor.tracemalloc_enabled())
+        tracemalloc_box.toggled.connect(self.health_monitor.set_tracemalloc)
+        panel.add_section("Health", self.health_monitor.summary_text, self.health_monitor.dump,
+                          controls=(tracemalloc_box,))
+        reset_latency_btn = QPushButton("Reset")
+        reset_latency_btn.clicked.connect(self.key_latency.reset)
+        fuzz_btn = QPushButton("Fuzz Editor Code Against Reference")
+        fuzz_btn.clicked.connect(self.fuzz_against_reference)
+        panel.add_section("Templates", self.template_stats.summary_text, self.template_stats.to_dict,
+                          controls=(fuzz_btn,))
+        panel.add_section("Failures", self.template_stats.failures_text, self.template_stats.to_dict)
+        panel.add_section("Results", self.results_store.status_text, self.results_store.status)
+        panel.add_section("Key Latency", self.key_latency.summary_text, self.key_latency.dump,
+                          controls=(reset_latency_btn,))
+        return panel
+
     # 🔓 ADMIN UNLOCK (Ctrl+F12)
     def keyPressEvent(self, event):
         try:
+            if event.key() == Qt.Key_F11 and event.modifiers() == Qt.ControlModifier:
+                self.show_admin_panel()
+                return
             if event.key() == Qt.Key_F12 and event.modifiers() == Qt.ControlModifier:
                 self.exam_lock_active = False
                 try:
                     self._uninstall_system_key_block()
                 except Exception:
                     pass
-                self.setWindowFlag(Qt.WindowStaysOnTopHint, False)
-                self.setWindowFlag(Qt.WindowMinimizeButtonHint, True)
-                self.setWindowFlag(Qt.WindowMaximizeButtonHint, True)
-                self.showNormal()
+                self.window_state.request(
+                    on=Qt.WindowMinimizeButtonHint | Qt.WindowMaximizeButtonHint,
+                    off=Qt.WindowStaysOnTopHint,
+                    mode="normal")
                 self.set_error_banner(False, "")
+                self._save_session()
                 QMessageBox.information(self, "Unlocked", "Exam mode disabled.")
                 return
         except Exception:
@@ -990,12 +2744,9 @@ print(x)
                 pass
             self.temp_file = None
 
-        # Ask user if they want to discard current content (only if there's unsaved code)
-        if self.editor.toPlainText().strip():
-            if self.current_template:
-                msg = f"Switch to '{template_name}' template? Current template '{self.current_template}' will be discarded (unsaved changes lost)."
-            else:
-                msg = f"Load '{template_name}' template? This will replace current code."
+        # Ask before replacing free code; template edits stay in their cached document
+        if not self.current_template and self.editor.toPlainText().strip():
+            msg = f"Load '{template_name}' template? This will replace current code."
             resp = QMessageBox.question(
                 self, "Load Template", msg,
                 QMessageBox.Yes | QMessageBox.No
@@ -1006,61 +2757,39 @@ print(x)
         template_code = self.PROGRAM_TEMPLATES[template_name]
 
         # --- PRE-RUN: quick, non-interactive execution with timeout ---
-        pre_run_result = None
-        try:
-            # Try compiling first (fast)
-            compile(template_code, "<template>", "exec")
-            # write to a temporary file for execution
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".py", mode="w", encoding="utf-8") as tf:
-                tf.write(template_code)
-                tmp_path = tf.name
-            # Run the template briefly with no input; timeout quickly to avoid blocking on input()
+        # Deterministic templates always pre-run the same way, so the result
+        # is reused; templates that read stdin would only sit in input()
+        # until the smoke-run timeout, so that run is skipped entirely.
+        from preflight import analyze_source
+        report = analyze_source(template_code)
+        pre_run_result = self._pre_run_cache.get(template_code) if report.deterministic else None
+        if pre_run_result is None and report.reads_stdin:
+            pre_run_result = "timeout"
+        if pre_run_result is None:
             try:
-                # 2-second timeout for a quick smoke-run (adjustable)
-                completed = subprocess.run([sys.executable, "-u", tmp_path],
-                input=None,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                timeout=2,
-                check=False,
-                encoding="utf-8")
-                # capture minimal info — do NOT show detailed tracebacks to user
-                if completed.returncode != 0 or completed.stderr.strip():
-                    pre_run_result = "error"
-                else:
-                    pre_run_result = "ok"
-            except subprocess.TimeoutExpired:
-                # If the script waits for input or runs longer, we kill it — that's acceptable
-                pre_run_result = "timeout"
+                # Try compiling first (fast)
+                compile(template_code, "<template>", "exec")
             except Exception:
-                pre_run_result = "error"
-            finally:
-                try:
-                    os.remove(tmp_path)
-                except Exception:
-                    pass
-        except Exception:
-            # compilation failed — treat as error but continue to show template
-            pre_run_result = "compile_error"
-
-        # Show a small note in output about the pre-run (kept minimal)
-        if pre_run_result == "ok":
-            self.output.clear()
-            self.output.appendPlainText("ℹ️ Template pre-run completed (no immediate errors).\n")
-        elif pre_run_result in ("timeout", "error", "compile_error"):
-            self.output.clear()
-            self.output.appendPlainText("ℹ️ Template pre-run detected an issue (template loaded for fixing).\n")
+                # compilation failed — treat as error but continue to show template
+                pre_run_result = "compile_error"
+                if report.deterministic:
+                    self._pre_run_cache[template_code] = pre_run_result
+
+        self._clear_output()
+        if pre_run_result is None:
+            # the smoke-run finishes in the background; its note is appended when it does
+            self.aio.spawn(self._pre_run_template(template_code, report.deterministic), name="pre-run",
+                           done=lambda task, name=template_name: self._on_pre_run_done(name, task))
+        else:
+            self._show_pre_run_note(pre_run_result)
 
         # Activate exam mode now (lock the app / disable switching) BEFORE loading template into editor.
         try:
             self.exam_lock_active = True
-            self.setWindowFlag(Qt.WindowStaysOnTopHint, True)
-            self.setWindowFlag(Qt.WindowMinimizeButtonHint, False)
-            self.setWindowFlag(Qt.WindowMaximizeButtonHint, False)
-            try:
-                self.showFullScreen()
-            except Exception:
-                pass
+            self.window_state.request(
+                on=Qt.WindowStaysOnTopHint,
+                off=Qt.WindowMinimizeButtonHint | Qt.WindowMaximizeButtonHint,
+                mode="fullscreen")
             # Try to install system key block to further reduce switching (best-effort on Windows)
             try:
                 if self._install_system_key_block():
@@ -1076,8 +2805,8 @@ print(x)
         except Exception:
             pass
 
-        # Now load the template into the editor (as requested: show after pre-run attempt)
-        self.editor.setPlainText(template_code)
+        # Now show the template's document (previous edits and undo history included)
+        self.template_docs.show_template(template_name, template_code)
         self.editor.setReadOnly(False)
 
         self.current_template = template_name
@@ -1098,7 +2827,60 @@ print(x)
         self.runtime_error = False
         self.user_input = ""
         self.start_group_timer_if_needed()
+        self._save_session()
+
+
+    async def _pre_run_template(self, template_code, deterministic):
+        """Smoke-run a template briefly with no input; returns "ok", "error" or "timeout"."""
+        import asyncio
+        import launch_profiles
+        import run_workspace
+        from qt_asyncio import run_process, run_blocking
+        # write to a temporary file for execution (same launch profile as runs)
+        _, profile = launch_profiles.get_profile()
+        tmp_path = workspace = None
+        try:
+            # inside the try, so a cancel while the workspace is made still removes the script
+            tmp_path = await run_blocking(launch_profiles.write_script, profile, run_workspace.QUOTA_GUARD, template_code)
+            workspace = await run_blocking(self._new_workspace, "pre")
+            env = launch_profiles.child_environment(profile, os.environ, os.getpid())
+            env.update(run_workspace.environment())
+            # 2-second timeout for a quick smoke-run (adjustable)
+            completed = await run_process(
+                sys.executable, launch_profiles.command(profile, tmp_path),
+                env=env, cwd=workspace, timeout=2)
+            # capture minimal info — do NOT show detailed tracebacks to user
+            result = "error" if completed.returncode != 0 or completed.stderr.strip() else "ok"
+        except asyncio.TimeoutError:
+            # If the script waits for input or runs longer, we kill it — that's acceptable
+            result = "timeout"
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            result = "error"
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except Exception:
+                    pass
+            if workspace is not None:
+                self.workspace_reaper.discard(workspace)
+        if deterministic:
+            self._pre_run_cache[template_code] = result
+        return result
+
+    def _on_pre_run_done(self, template_name, task):
+        if self.current_template != template_name or task.exception() is not None:
+            return
+        self._show_pre_run_note(task.result())
 
+    def _show_pre_run_note(self, pre_run_result):
+        # Show a small note in output about the pre-run (kept minimal)
+        if pre_run_result == "ok":
+            self.output.appendPlainText("ℹ️ Template pre-run completed (no immediate errors).\n")
+        elif pre_run_result in ("timeout", "error", "compile_error"):
+            self.output.appendPlainText("ℹ️ Template pre-run detected an issue (template loaded for fixing).\n")
 
     # ---------- FILE OPERATIONS & HELP ----------
     def new_file(self):
@@ -1131,21 +2913,25 @@ print(x)
                 pass
             self.temp_file = None
 
+        self.aio.cancel("pre-run")
+        self.template_docs.show_scratch()
         self.editor.clear()
         self.editor.setReadOnly(False)
         self.current_file = None
+        self._save_target = None
         self.current_template = None
         # template hash tracking removed
         if not (self.group_timer_started and self.group_time_left_ms == 0):
             self.set_program_actions_enabled(True)
             self.set_file_actions_enabled(True)
         self.setWindowTitle("Python Compiler of MNMJEC")
-        self.output.clear()
+        self._clear_output()
         self.enable_min_max()
         self.set_error_banner(False, "")
         self.runtime_error = False
         self.user_input = ""
         self.exam_lock_active = False
+        self._save_session()
 
     def open_file(self):
         # Prevent opening another file while a template is active
@@ -1159,41 +2945,55 @@ print(x)
 
         path, _ = QFileDialog.getOpenFileName(self, "Open Python file", "", "Python Files (*.py);;All Files (*)")
         if path:
-            try:
-                if self.process.state() == QProcess.Running:
-                    try:
-                        self.process.kill()
-                    except Exception:
-                        pass
-                    self.timer.stop()
-                    self.run_btn.setEnabled(True)
-                    self.stop_btn.setEnabled(False)
+            from qt_asyncio import read_text
+            self.aio.spawn(read_text(path), name="open-file",
+                           done=lambda task: self._on_file_read(path, task))
 
-                if self.temp_file and os.path.exists(self.temp_file):
-                    try:
-                        os.remove(self.temp_file)
-                    except Exception:
-                        pass
-                    self.temp_file = None
+    def _on_file_read(self, path, task):
+        if task.exception() is not None:
+            QMessageBox.critical(self, "Open Error", f"Failed to open file:\n{task.exception()}")
+            return
+        # a template may have been loaded while the file was being read
+        if self.current_template:
+            return
+        try:
+            if self.process.state() == QProcess.Running:
+                try:
+                    self.process.kill()
+                except Exception:
+                    pass
+                self.timer.stop()
+                self.run_btn.setEnabled(True)
+                self.stop_btn.setEnabled(False)
 
-                with open(path, "r", encoding="utf-8") as f:
-                    self.editor.setPlainText(f.read())
-                self.editor.setReadOnly(False)
-                self.current_file = path
-                self.current_template = None
-                # template hash tracking removed
-                if not (self.group_timer_started and self.group_time_left_ms == 0):
-                    self.set_program_actions_enabled(True)
-                    self.set_file_actions_enabled(True)
-                self.setWindowTitle(f"Python Compiler of MNMJEC - {os.path.basename(path)}")
-                self.output.clear()
-                self.enable_min_max()
-                self.set_error_banner(False, "")
-                self.runtime_error = False
-                self.user_input = ""
-                self.exam_lock_active = False
-            except Exception as e:
-                QMessageBox.critical(self, "Open Error", f"Failed to open file:\n{e}")
+            if self.temp_file and os.path.exists(self.temp_file):
+                try:
+                    os.remove(self.temp_file)
+                except Exception:
+                    pass
+                self.temp_file = None
+
+            self.aio.cancel("pre-run")
+            self.template_docs.show_scratch()
+            self.editor.setPlainText(task.result())
+            self.editor.setReadOnly(False)
+            self.current_file = path
+            self._save_target = None
+            self.current_template = None
+            # template hash tracking removed
+            if not (self.group_timer_started and self.group_time_left_ms == 0):
+                self.set_program_actions_enabled(True)
+                self.set_file_actions_enabled(True)
+            self.setWindowTitle(f"Python Compiler of MNMJEC - {os.path.basename(path)}")
+            self._clear_output()
+            self.enable_min_max()
+            self.set_error_banner(False, "")
+            self.runtime_error = False
+            self.user_input = ""
+            self.exam_lock_active = False
+            self._save_session()
+        except Exception as e:
+            QMessageBox.critical(self, "Open Error", f"Failed to open file:\n{e}")
 
     def save_file(self):
         if self.current_file:
@@ -1202,31 +3002,42 @@ print(x)
             path, _ = QFileDialog.getSaveFileName(self, "Save Python file", "", "Python Files (*.py);;All Files (*)")
             if not path:
                 return
-            self.current_file = path
-        try:
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(self.editor.toPlainText())
-            self.setWindowTitle(f"Python Compiler of MNMJEC - {os.path.basename(path)}")
-        except Exception as e:
-            QMessageBox.critical(self, "Save Error", f"Failed to save file:\n{e}")
+        self._write_file(path)
 
     def save_file_as(self):
         path, _ = QFileDialog.getSaveFileName(self, "Save Python file as", "", "Python Files (*.py);;All Files (*)")
         if path:
-            try:
-                with open(path, "w", encoding="utf-8") as f:
-                    f.write(self.editor.toPlainText())
+            self._write_file(path)
+
+    def _write_file(self, path):
+        """Save the editor to ``path`` on the I/O thread; current_file and the title update once it is on disk."""
+        def done(task):
+            if task.exception() is not None:
+                QMessageBox.critical(self, "Save Error", f"Failed to save file:\n{task.exception()}")
+            elif self._save_target == path:
+                # only the newest save counts, and not once another file was opened
+                self._save_target = None
                 self.current_file = path
                 self.setWindowTitle(f"Python Compiler of MNMJEC - {os.path.basename(path)}")
-            except Exception as e:
-                QMessageBox.critical(self, "Save Error", f"Failed to save file:\n{e}")
+        self._save_target = path
+        from qt_asyncio import write_text
+        self.aio.spawn(write_text(path, self.editor.toPlainText()), done=done)
 
     def show_about(self):
         QMessageBox.information(self, "About", "Offline Python IDE — MNMJEC\nSimple offline code runner.")
 
 
 if __name__ == "__main__":
+    # --new-session discards the crash-recovery snapshot and starts a fresh station
+    if "--new-session" in sys.argv[1:]:
+        sys.argv.remove("--new-session")
+        try:
+            os.remove(OfflinePythonIDE.SESSION_FILE)
+        except OSError:
+            pass
     app = QApplication(sys.argv)
+    startup_mark("QApplication created")
     ide = OfflinePythonIDE()
     ide.show()
+    startup_mark("window shown")
     sys.exit(app.exec_())
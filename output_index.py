@@ -0,0 +1,102 @@
+"""
+Line-offset index over a run's stdout.
+
+The raw bytes go to an anonymous temporary file and the byte offset of
+every line start is kept in an array (8 bytes per line), so any line can
+be fetched in O(1) and a search can walk the whole output in slices even
+after the console widget has dropped the oldest lines.
+"""
+import re
+import tempfile
+from array import array
+
+
+class OutputIndex:
+    """Append-only line store; all methods are meant for one thread."""
+
+    SEARCH_SLICE_LINES = 4096
+
+    def __init__(self):
+        self._file = None
+        self.clear()
+
+    def clear(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = tempfile.TemporaryFile()
+        # _starts[i] is the offset of line i; the last entry may be an empty line in progress
+        self._starts = array("q", [0])
+        self.size = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ---------- WRITES ----------
+    def append(self, data):
+        """Add raw output bytes; returns the number of the line ``data`` starts in."""
+        first_line = len(self._starts) - 1
+        if not data:
+            return first_line
+        self._file.seek(0, 2)
+        self._file.write(data)
+        base = self.size
+        find = data.find
+        pos = find(b"\n")
+        while pos != -1:
+            self._starts.append(base + pos + 1)
+            pos = find(b"\n", pos + 1)
+        self.size += len(data)
+        return first_line
+
+    # ---------- READS ----------
+    @property
+    def line_count(self):
+        """Complete lines plus a trailing line without its newline yet."""
+        n = len(self._starts)
+        return n if self._starts[-1] < self.size else n - 1
+
+    def _read(self, start, end):
+        self._file.seek(start)
+        return self._file.read(end - start)
+
+    def _end_of(self, i):
+        return self._starts[i + 1] if i + 1 < len(self._starts) else self.size
+
+    @staticmethod
+    def _decode(raw):
+        return raw.decode("utf-8", errors="replace").rstrip("\r\n")
+
+    def line(self, i):
+        """Text of line ``i`` (0-based) without its line ending."""
+        if not 0 <= i < self.line_count:
+            raise IndexError(i)
+        return self._decode(self._read(self._starts[i], self._end_of(i)))
+
+    def lines(self, start, stop):
+        """[(i, text)] for lines start..stop-1, clamped to what exists."""
+        start = max(0, start)
+        stop = min(stop, self.line_count)
+        if start >= stop:
+            return []
+        raw = self._read(self._starts[start], self._end_of(stop - 1))
+        base = self._starts[start]
+        return [(i, self._decode(raw[self._starts[i] - base:self._end_of(i) - base]))
+                for i in range(start, stop)]
+
+    def search(self, pattern, start=0, flags=0):
+        """
+        Generator for incremental regex search.
+
+        Each next() scans at most SEARCH_SLICE_LINES lines and yields
+        (next_line, [(i, text), ...]) with that slice's matches, so the caller
+        decides how much to do per event-loop turn. Lines appended while the
+        search runs are searched too.
+        """
+        regex = re.compile(pattern, flags)
+        i = start
+        while i < self.line_count:
+            batch = self.lines(i, i + self.SEARCH_SLICE_LINES)
+            i = batch[-1][0] + 1
+            yield i, [(n, text) for n, text in batch if regex.search(text)]
@@ -0,0 +1,234 @@
+"""
+Pre-flight analysis of the editor text: one AST pass, cached by content.
+
+analyze_source() tells the IDE whether a program may read stdin (so it
+prompts for input only then), whether its output is deterministic (so a
+template pre-run can be cached), which modules it imports and which
+``while True`` loops can never end or print. Reading stdin is decided
+conservatively: anything that may reach fd 0 counts, and ambiguous
+file-descriptor or path arguments count too, because a program judged
+input-free runs with stdin closed.
+"""
+import ast
+import hashlib
+import symtable
+from collections import OrderedDict
+
+# Modules whose use makes a program's output vary between runs.
+NONDETERMINISTIC_MODULES = frozenset({
+    "random", "secrets", "uuid", "time", "datetime", "threading",
+    "multiprocessing", "asyncio", "socket", "urllib", "http",
+})
+
+
+# Paths that name the process's stdin on POSIX and Windows
+STDIN_PATHS = frozenset({"/dev/stdin", "/dev/fd/0", "/proc/self/fd/0", "con", "conin$"})
+# from-imports that bring a way of reading stdin into scope
+_STDIN_IMPORTS = {
+    "sys": {"stdin", "__stdin__", "*"},
+    "os": {"read", "fdopen", "open", "*"},
+    "posix": {"read", "fdopen", "open", "*"},
+    "nt": {"read", "fdopen", "open", "*"},
+    "io": {"open", "FileIO", "*"},
+    "_io": {"open", "FileIO", "*"},
+    "codecs": {"open", "*"},
+    "builtins": {"input", "open", "*"},
+    "fileinput": {"input", "FileInput", "*"},
+}
+# module.function calls whose first argument is a file descriptor or path
+_OPENERS = {
+    "os": {"read", "fdopen", "open"},
+    "posix": {"read", "fdopen", "open"},
+    "nt": {"read", "fdopen", "open"},
+    "io": {"open", "FileIO"},
+    "_io": {"open", "FileIO"},
+    "codecs": {"open"},
+    "builtins": {"open"},
+    "__builtins__": {"open"},
+}
+
+
+def _may_name_stdin(node):
+    """True if a file argument may be stdin: fd 0, a stdin path, or anything not a literal."""
+    if node is None:
+        return True
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool):
+            return False
+        if isinstance(node.value, int):
+            return node.value == 0
+        if isinstance(node.value, str):
+            return node.value.strip().lower() in STDIN_PATHS or node.value.strip() == "-"
+        return False
+    if isinstance(node, ast.JoinedStr):
+        return False
+    return True
+
+
+def _fileinput_reads_stdin(node):
+    """fileinput.input()/FileInput() read stdin without files, or with "-" among them."""
+    files = node.args[0] if node.args else next((k.value for k in node.keywords if k.arg == "files"), None)
+    if files is None:
+        return True
+    items = files.elts if isinstance(files, (ast.List, ast.Tuple)) else [files]
+    return any(not isinstance(item, ast.Constant) or not isinstance(item.value, str) or item.value == "-"
+               for item in items)
+
+
+class PreflightReport:
+    """Result of one AST pass over the editor text."""
+
+    __slots__ = ("syntax_ok", "reads_stdin", "deterministic", "imports", "infinite_loop_lines")
+
+    def __init__(self, syntax_ok=True, reads_stdin=False, deterministic=True,
+                 imports=frozenset(), infinite_loop_lines=()):
+        self.syntax_ok = syntax_ok
+        self.reads_stdin = reads_stdin
+        self.deterministic = deterministic
+        self.imports = imports
+        self.infinite_loop_lines = infinite_loop_lines
+
+
+class _PreflightVisitor(ast.NodeVisitor):
+    def __init__(self):
+        self.uses_stdin = False
+        self.nondeterministic = False
+        self.imports = set()
+        self.infinite_loop_lines = []
+        # import os as o: o.read(0, n) is os.read
+        self.module_aliases = {}
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.add(alias.name.split(".")[0])
+            if alias.asname:
+                self.module_aliases[alias.asname] = alias.name
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node):
+        if node.module and not node.level:
+            self.imports.add(node.module.split(".")[0])
+            # from sys import stdin / from os import read: uses cannot be told apart any more
+            names = _STDIN_IMPORTS.get(node.module, ())
+            if any(alias.name in names for alias in node.names):
+                self.uses_stdin = True
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Name) and func.id in ("id", "hash"):
+            self.nondeterministic = True
+        elif isinstance(func, ast.Attribute) and func.attr == "urandom":
+            self.nondeterministic = True
+        first = node.args[0] if node.args else None
+        if isinstance(func, ast.Name) and func.id == "open":
+            # open(0), open("/dev/stdin") or a path only known at run time
+            self.uses_stdin |= _may_name_stdin(first)
+        elif isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+            module, name = self.module_aliases.get(func.value.id, func.value.id), func.attr
+            if name in _OPENERS.get(module, ()):
+                self.uses_stdin |= _may_name_stdin(first)
+            elif module in ("builtins", "__builtins__") and name == "input":
+                self.uses_stdin = True
+            elif module == "fileinput" and name in ("input", "FileInput"):
+                self.uses_stdin |= _fileinput_reads_stdin(node)
+        elif isinstance(func, ast.Name) and func.id == "getattr" and len(node.args) > 1:
+            # getattr(sys, "stdin"), getattr(builtins, "input")
+            name = node.args[1]
+            if not isinstance(name, ast.Constant) or name.value in ("stdin", "__stdin__", "input"):
+                self.uses_stdin = True
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node):
+        # sys.stdin / sys.stdin.read / sys.__stdin__
+        if node.attr in ("stdin", "__stdin__"):
+            self.uses_stdin = True
+        self.generic_visit(node)
+
+    def visit_While(self, node):
+        test = node.test
+        always_true = isinstance(test, ast.Constant) and bool(test.value)
+        if always_true and not node.orelse and not _loop_can_exit_or_print(node.body):
+            self.infinite_loop_lines.append(node.lineno)
+        self.generic_visit(node)
+
+
+def _loop_can_exit_or_print(body, nested=False):
+    """True if a loop body can leave the loop or produce output."""
+    for node in body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(node, (ast.Return, ast.Raise, ast.Yield, ast.YieldFrom)):
+            return True
+        # a break inside a nested loop only leaves that loop
+        if isinstance(node, ast.Break) and not nested:
+            return True
+        if isinstance(node, ast.Call):
+            func = node.func
+            name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", "")
+            if name in ("print", "write", "exit", "_exit", "quit", "input"):
+                return True
+        inner = nested or isinstance(node, (ast.For, ast.AsyncFor, ast.While))
+        if _loop_can_exit_or_print(list(ast.iter_child_nodes(node)), inner):
+            return True
+    return False
+
+
+def _may_use_builtin_input(code):
+    """
+    True if some reference to ``input`` (a call, or an alias like ``read = input``)
+    can resolve to the builtin. Only a binding in the referencing function or an
+    enclosing one proves otherwise; a module-level ``input = ...`` may run after
+    the read, so it does not.
+    """
+    try:
+        tables = [symtable.symtable(code, "<editor>", "exec")]
+    except (SyntaxError, ValueError):
+        return "input" in code
+    while tables:
+        table = tables.pop()
+        tables.extend(table.get_children())
+        try:
+            sym = table.lookup("input")
+        except KeyError:
+            continue
+        if not sym.is_referenced():
+            continue
+        if table.get_type() == "module" or sym.is_global():
+            return True
+    return False
+
+
+_PREFLIGHT_CACHE = OrderedDict()
+_PREFLIGHT_CACHE_SIZE = 64
+
+
+def analyze_source(code):
+    """Run the pre-flight AST pass over ``code``, cached by content hash."""
+    key = hashlib.sha1(code.encode("utf-8", "surrogatepass")).hexdigest()
+    report = _PREFLIGHT_CACHE.get(key)
+    if report is not None:
+        _PREFLIGHT_CACHE.move_to_end(key)
+        return report
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        # keep the old substring behaviour for code we cannot parse
+        report = PreflightReport(syntax_ok=False, reads_stdin="input(" in code, deterministic=False)
+    else:
+        visitor = _PreflightVisitor()
+        visitor.visit(tree)
+        reads_stdin = visitor.uses_stdin or _may_use_builtin_input(code)
+        imports = frozenset(visitor.imports)
+        report = PreflightReport(
+            syntax_ok=True,
+            reads_stdin=reads_stdin,
+            deterministic=not (visitor.nondeterministic or reads_stdin
+                               or imports & NONDETERMINISTIC_MODULES),
+            imports=imports,
+            infinite_loop_lines=tuple(visitor.infinite_loop_lines),
+        )
+    _PREFLIGHT_CACHE[key] = report
+    if len(_PREFLIGHT_CACHE) > _PREFLIGHT_CACHE_SIZE:
+        _PREFLIGHT_CACHE.popitem(last=False)
+    return report
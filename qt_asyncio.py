@@ -0,0 +1,195 @@
+"""
+asyncio event loop driven by the Qt event loop.
+
+QtAsyncioBridge owns a private asyncio loop and advances it from a Qt
+timer while it has tasks, so coroutines run on the GUI thread between Qt
+events with no second thread and no blocking. Tasks can be named; starting
+a task under a name cancels the previous one, and cancel() works the same
+for process runs, file I/O and sleeps. File I/O goes through one worker
+thread so writes to the same file land in submission order; long blocking
+jobs (profiling, analysis) get a separate thread via run_in_worker() so
+they never hold up a session save.
+"""
+import asyncio
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, QTimer
+
+
+class ProcessResult:
+    __slots__ = ("returncode", "stdout", "stderr")
+
+    def __init__(self, returncode, stdout, stderr):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+class QtAsyncioBridge(QObject):
+    """Runs an asyncio loop inside the Qt loop; see the module docstring."""
+
+    POLL_MS = 5
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.loop = asyncio.new_event_loop()
+        self.io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ide-io")
+        self.loop.set_default_executor(self.io_executor)
+        self.work_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ide-work")
+        self._named = {}
+        # spawned tasks whose done-callbacks have not run yet
+        self._outstanding = 0
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.POLL_MS)
+        self._timer.timeout.connect(self._pump)
+
+    def _pump(self):
+        # A modal dialog opened from a callback runs a nested Qt loop that
+        # fires this timer again; the asyncio loop is not re-entrant.
+        if self.loop.is_running() or self.loop.is_closed():
+            return
+        self.loop.call_soon(self.loop.stop)
+        self.loop.run_forever()
+        if self._outstanding == 0 and not asyncio.all_tasks(self.loop):
+            self._timer.stop()
+
+    def spawn(self, coro, name=None, done=None):
+        """
+        Schedule ``coro`` and return its task.
+
+        A running task with the same ``name`` is cancelled first. ``done(task)``
+        is called on the GUI thread, outside the asyncio loop, unless the task
+        was cancelled.
+        """
+        if name is not None:
+            self.cancel(name)
+        task = self.loop.create_task(coro)
+        if name is not None:
+            self._named[name] = task
+            task.add_done_callback(lambda t, n=name: self._named.pop(n, None) if self._named.get(n) is t else None)
+        if done is not None:
+            task.add_done_callback(lambda t: None if t.cancelled() else QTimer.singleShot(0, lambda: done(t)))
+        else:
+            # nobody else looks at the result; keep asyncio from logging it as unretrieved
+            task.add_done_callback(lambda t: None if t.cancelled() else t.exception())
+        self._outstanding += 1
+        task.add_done_callback(self._task_settled)
+        if not self._timer.isActive():
+            self._timer.start()
+        return task
+
+    def _task_settled(self, task):
+        self._outstanding -= 1
+
+    def cancel(self, name=None):
+        """Cancel the task called ``name``, or every task when ``name`` is None."""
+        tasks = list(self._named.values()) if name is None else [self._named.get(name)]
+        if name is None:
+            tasks += list(asyncio.all_tasks(self.loop))
+        for task in tasks:
+            if task is not None and not task.done():
+                task.cancel()
+
+    def is_active(self, name):
+        task = self._named.get(name)
+        return task is not None and not task.done()
+
+    def close(self):
+        """Cancel everything, let cancellations run, then close the loop."""
+        self.cancel()
+        self._timer.stop()
+        if not self.loop.is_closed() and not self.loop.is_running():
+            pending = asyncio.all_tasks(self.loop)
+            if pending:
+                self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.close()
+        self.io_executor.shutdown(wait=True)
+        self.work_executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run_in_worker(self, func, *args):
+        """Run a long blocking ``func(*args)`` off the GUI thread and off the I/O thread."""
+        return await self.loop.run_in_executor(self.work_executor, func, *args)
+
+
+# ---------- ASYNC OPERATIONS ----------
+async def run_process(program, args, stdin=None, env=None, cwd=None, timeout=None, on_stdout=None, on_stderr=None):
+    """
+    Spawn ``program args``, stream its output and return a ProcessResult.
+
+    ``on_stdout``/``on_stderr`` receive each chunk as it arrives. On timeout
+    (asyncio.TimeoutError) or cancellation the child is killed first.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        program, *args,
+        stdin=subprocess.PIPE if stdin is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env, cwd=cwd)
+    out, err = [], []
+
+    async def pump(stream, sink, callback):
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                break
+            sink.append(chunk)
+            if callback is not None:
+                callback(chunk)
+
+    async def feed():
+        if stdin is not None:
+            try:
+                proc.stdin.write(stdin)
+                await proc.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            proc.stdin.close()
+
+    work = asyncio.gather(feed(), pump(proc.stdout, out, on_stdout), pump(proc.stderr, err, on_stderr), proc.wait())
+    # retrieve the result so a cancelled run is not logged as an error
+    work.add_done_callback(lambda f: f.cancelled() or f.exception())
+    try:
+        await asyncio.wait_for(work, timeout)
+    except BaseException:
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+        raise
+    return ProcessResult(proc.returncode, b"".join(out), b"".join(err))
+
+
+def _read_text(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _write_text(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _write_bytes_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+async def read_text(path):
+    return await asyncio.get_running_loop().run_in_executor(None, _read_text, path)
+
+
+async def write_text(path, text):
+    await asyncio.get_running_loop().run_in_executor(None, _write_text, path, text)
+
+
+async def write_bytes_atomic(path, data):
+    await asyncio.get_running_loop().run_in_executor(None, _write_bytes_atomic, path, data)
+
+
+async def run_blocking(func, *args):
+    """Run a blocking helper on the I/O thread."""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
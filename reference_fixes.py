@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Pre-validated reference fixes and instant "fixed?" checks.
+
+Most contestants submit one of a handful of canonical fixes per template.
+FIXES lists them as full programs; validate() runs every one once, in
+parallel child interpreters, and keeps those that finish cleanly (and
+print the expected output where the template has test cases). The result
+is an index from template and normalized-AST fingerprint (code_fingerprint)
+to the verified stdout, cached on disk per Python version and set of
+fixes, so a station validates only on first start.
+
+The fingerprint only finds the candidate; a match also needs the exact
+ast.dump() of the verified fix, so the submission differs from it only in
+comments and formatting. The IDE then shows the verified output and the
+"fixed" verdict without starting a child; anything else gets a full run
+as before.
+
+  python reference_fixes.py            validate all fixes and refresh the cache
+  python reference_fixes.py --check submission.py --template prog13
+"""
+import os
+import sys
+import ast
+import json
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from code_fingerprint import fingerprint
+from template_mutator import run_source
+
+CACHE_PATH = os.environ.get(
+    "MNMJ_REFERENCE_CACHE", os.path.join(os.path.expanduser("~"), ".mnmj_reference_fixes.json"))
+TIME_LIMIT_S = 5.0
+# bump when the cached index layout or the fingerprint changes
+INDEX_VERSION = 2
+
+FIXES = {
+    "prog1": [
+        "def add(x, lst=None):\n    if lst is None:\n        lst = []\n    lst.append(x)\n    return lst\n"
+        "print(add(1))\nprint(add(2))\n",
+    ],
+    "prog2": [
+        "a = False\nb = True\nc = False\nif a or b or c:\n    print(\"YES\")\nelse:\n    print(\"NO\")\n",
+        "a = False\nb = True\nc = False\nif a or b and c:\n    print(\"YES\")\nelse:\n    print(\"NO\")\n",
+    ],
+    "prog3": [
+        "def register_user(user, users=None):\n    if users is None:\n        users = []\n"
+        "    if user not in users:\n        users.append(user)\n    return users\n"
+        "print(register_user(\"Alice\"))\nprint(register_user(\"Bob\"))\n",
+    ],
+    "prog4": [
+        "funcs = []\nfor i in range(3):\n    funcs.append(lambda: i)\nfor f in funcs:\n    print(f())\n",
+        "funcs = []\nfor i in range(3):\n    funcs.append(lambda i=i: i)\nfor f in funcs:\n    print(f())\n",
+    ],
+    "prog5": [
+        "def make_funcs():\n    return [lambda x=x: x for x in range(5)]\nfuncs = make_funcs()\nprint([f() for f in funcs])\n",
+    ],
+    "prog6": [
+        "x = 7\nif x % 2 == 1:\n    print(\"Odd\")\nelse:\n    print(\"Even\")\n",
+    ],
+    "prog7": [
+        "funcs = []\nfor i in range(3):\n    funcs.append(lambda: i)\nfor f in funcs:\n    print(f())\n",
+        "funcs = []\nfor i in range(3):\n    funcs.append(lambda i=i: i)\nfor f in funcs:\n    print(f())\n",
+    ],
+    "prog8": [
+        "for i in range(1, 6):\n    if i == 4:\n        break\n    print(i)\n",
+        "for i in range(1, 6):\n    if i == 4:\n        continue\n    print(i)\n",
+    ],
+    "prog9": [
+        "def check_len(s):\n    if len(s) >= 5:\n        return \"Long\"\n    return \"Short\"\nprint(check_len(\"Hello\"))\n",
+        "def check_len(s):\n    if len(s) >= 5:\n        return \"Long\"\n    return \"Short\"\nprint(check_len(\"Hi\"))\n",
+    ],
+    "prog10": [
+        "list = [1, 2, 3]\ndef total(items):\n    return sum(items)\nprint(total(list))\n",
+    ],
+    "prog11": [
+        "data = {\"x\": 10, \"y\": 20}\nprint(data.get(\"x\"))\n",
+    ],
+    "prog12": [
+        "try:\n    num = int(\"12a\")\nexcept ValueError:\n    num = 0\nprint(num)\n",
+    ],
+    "prog13": [
+        "data = [1, 2, 2, 3, 4, 3]\nresult = []\nfor x in data:\n    if x not in result:\n"
+        "        result.append(x)\nprint(result)\n",
+    ],
+    "prog14": [
+        "nums = [2, 4, 6]\ntotal = 0\nfor n in nums:\n    total += n\nprint(total)\n",
+    ],
+    "prog15": [
+        "x = 10\ndef change():\n    global x\n    x += 5\nchange()\nprint(x)\n",
+    ],
+}
+
+
+def _cache_key(fixes, expected):
+    data = json.dumps([INDEX_VERSION, sys.version, fixes, expected], sort_keys=True).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def validate(fixes=FIXES, expected=None, workers=None, time_limit=TIME_LIMIT_S):
+    """
+    Run every fix once in parallel; return (index, rejected).
+
+    ``expected`` maps a template to the stdout its fix must print. index is
+    {"template:fingerprint": {"template", "stdout", "dump"}} (templates may
+    share a fix); rejected is [(template, reason)].
+    """
+    expected = expected or {}
+    jobs = [(template, source) for template, sources in sorted(fixes.items()) for source in sources]
+    # child interpreters do the work, so threads keep every core busy
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        results = list(pool.map(lambda job: run_source(job[1], time_limit), jobs))
+    index, rejected = {}, []
+    for (template, source), (status, stdout) in zip(jobs, results):
+        if status != "ok":
+            rejected.append((template, status))
+        elif template in expected and stdout != expected[template]:
+            rejected.append((template, "wrong_output"))
+        else:
+            index[f"{template}:{fingerprint(source)}"] = {"template": template, "stdout": stdout,
+                                                          "dump": ast.dump(ast.parse(source))}
+    return index, rejected
+
+
+def load_index(fixes=FIXES, expected=None, path=CACHE_PATH):
+    """Cached index for these fixes, or None when it is missing or stale."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("key") == _cache_key(fixes, expected or {}):
+            return cached["index"]
+    except (OSError, ValueError, AttributeError):
+        pass
+    return None
+
+
+def save_index(index, fixes=FIXES, expected=None, path=CACHE_PATH):
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"key": _cache_key(fixes, expected or {}), "index": index}, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def ensure_index(fixes=FIXES, expected=None, path=CACHE_PATH):
+    """Cached index, validating (and caching) first when needed. Blocks; call off the GUI thread."""
+    index = load_index(fixes, expected, path)
+    if index is None:
+        index, _ = validate(fixes, expected)
+        save_index(index, fixes, expected, path)
+    return index
+
+
+def match(index, template, source):
+    """Verified entry that ``source`` is the same program as (up to comments and formatting), or None."""
+    if not index or not template:
+        return None
+    entry = index.get(f"{template}:{fingerprint(source)}")
+    if entry is None:
+        return None
+    try:
+        same = ast.dump(ast.parse(source)) == entry.get("dump")
+    except (SyntaxError, ValueError):
+        same = False
+    return entry if same else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate reference fixes and check submissions against them.")
+    parser.add_argument("--check", metavar="SCRIPT", help="report whether SCRIPT matches a verified fix")
+    parser.add_argument("--template", help="template the checked script belongs to")
+    args = parser.parse_args(argv)
+    if args.check:
+        with open(args.check, encoding="utf-8") as f:
+            source = f.read()
+        entry = match(ensure_index(), args.template, source)
+        print("matches a verified fix" if entry else "no match — needs a full run")
+        return 0 if entry else 1
+    index, rejected = validate()
+    save_index(index)
+    print(f"{len(index)} verified fixes cached in {CACHE_PATH}")
+    for template, reason in rejected:
+        print(f"  rejected a fix of {template}: {reason}")
+    return 1 if rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
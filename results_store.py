@@ -0,0 +1,251 @@
+"""
+Embedded SQLite store for runs and verdicts.
+
+The GUI only ever puts rows on a queue; a background writer thread drains
+it and inserts them in batched transactions, so no slot waits on disk.
+Indexes cover the usual judge queries (per station, per template, first
+successful fix) so they stay fast with millions of rows. Structured
+failure records of runs (see failure_channel) go to their own table.
+
+A batch that fails is retried on a fresh connection; rows that still
+cannot be written, or that arrive while MAX_QUEUED rows are waiting, are
+counted in ``dropped`` and the last error is kept in ``error`` so the IDE
+can show a failing store instead of losing runs silently.
+"""
+import os
+import json
+import queue
+import socket
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = os.environ.get(
+    "MNMJ_RESULTS_DB", os.path.join(os.path.expanduser("~"), "mnmj_results.sqlite3"))
+STATION_ID = os.environ.get("MNMJ_STATION_ID") or socket.gethostname()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    station TEXT NOT NULL,
+    template TEXT,
+    attempt INTEGER NOT NULL DEFAULT 1,
+    started REAL NOT NULL,
+    duration_ms REAL NOT NULL,
+    verdict TEXT NOT NULL,
+    exit_code INTEGER,
+    output_produced INTEGER NOT NULL DEFAULT 0,
+    source_hash TEXT,
+    cost INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_station ON runs (station, started);
+CREATE INDEX IF NOT EXISTS runs_template ON runs (template, started);
+CREATE INDEX IF NOT EXISTS runs_fixed ON runs (template, station, started) WHERE verdict = 'fixed';
+CREATE TABLE IF NOT EXISTS failures (
+    id INTEGER PRIMARY KEY,
+    station TEXT NOT NULL,
+    template TEXT,
+    started REAL NOT NULL,
+    type TEXT NOT NULL,
+    line INTEGER,
+    depth INTEGER,
+    frames TEXT
+);
+CREATE INDEX IF NOT EXISTS failures_template ON failures (template, type, line);
+"""
+
+RUN_COLUMNS = ("station", "template", "attempt", "started", "duration_ms", "verdict",
+               "exit_code", "output_produced", "source_hash", "cost")
+FAILURE_COLUMNS = ("station", "template", "started", "type", "line", "depth", "frames")
+_INSERT = {
+    table: f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})"
+    for table, cols in (("runs", RUN_COLUMNS), ("failures", FAILURE_COLUMNS))
+}
+
+
+def connect(path=DEFAULT_DB_PATH):
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    # stores created before metered runs lack the cost column
+    try:
+        conn.execute("ALTER TABLE runs ADD COLUMN cost INTEGER")
+    except sqlite3.OperationalError:
+        pass
+    return conn
+
+
+class ResultsStore:
+    """Queue-fed SQLite writer; the writer thread starts on the first record."""
+
+    BATCH_SIZE = 500
+    BATCH_WAIT_S = 0.2
+    # rows waiting for the writer; more are dropped (and counted) rather than piling up in memory
+    MAX_QUEUED = 100_000
+    RETRIES = 3
+    RETRY_WAIT_S = 1.0
+
+    def __init__(self, path=DEFAULT_DB_PATH, station=STATION_ID):
+        self.path = path
+        self.station = station
+        self._queue = queue.Queue(self.MAX_QUEUED)
+        self._thread = None
+        self._lock = threading.Lock()
+        # last write error (None while writes succeed) and rows lost so far
+        self.error = None
+        self.dropped = 0
+        # one read connection for all queries (schema and migration run once)
+        self._reader = None
+        self._read_lock = threading.Lock()
+
+    # ---------- WRITES ----------
+    def record_run(self, template, started, duration_ms, verdict, exit_code=None,
+                   output_produced=False, source_hash=None, attempt=1, cost=None):
+        """Queue one run; returns immediately."""
+        self._put(("runs", (self.station, template, attempt, started, duration_ms, verdict,
+                            exit_code, int(bool(output_produced)), source_hash, cost)))
+
+    def record_failure(self, template, started, record):
+        """Queue one failure record of the run that started at ``started``."""
+        self._put(("failures", (self.station, template, started, record["type"], record.get("line"),
+                                record.get("depth"), json.dumps(record.get("frames", [])))))
+
+    def _put(self, item):
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _ensure_writer(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._writer, name="results-writer", daemon=True)
+                self._thread.start()
+
+    def _writer(self):
+        conn = None
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.BATCH_WAIT_S
+            while True:
+                if item is None:
+                    stop = True
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.BATCH_SIZE:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                conn = self._write_batch(conn, batch)
+        if conn is not None:
+            conn.close()
+
+    def _write_batch(self, conn, batch):
+        """Insert ``batch`` in one transaction, reconnecting between retries; returns the connection."""
+        for attempt in range(self.RETRIES):
+            try:
+                if conn is None:
+                    conn = connect(self.path)
+                with conn:
+                    for table, sql in _INSERT.items():
+                        rows = [row for kind, row in batch if kind == table]
+                        if rows:
+                            conn.executemany(sql, rows)
+                self.error = None
+                return conn
+            except (sqlite3.Error, OSError) as e:
+                self.error = f"{type(e).__name__}: {e}"
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except sqlite3.Error:
+                        pass
+                    conn = None
+                if attempt + 1 < self.RETRIES:
+                    time.sleep(self.RETRY_WAIT_S)
+        with self._lock:
+            self.dropped += len(batch)
+        return None
+
+    def status_text(self):
+        """One-line health summary for the admin panel."""
+        queued = self._queue.qsize()
+        if self.error is None and not self.dropped:
+            return f"Results store OK ({self.path}), {queued} rows queued."
+        return (f"Results store FAILING ({self.path}): {self.error or 'queue full'}\n"
+                f"{self.dropped} rows lost, {queued} rows queued.")
+
+    def status(self):
+        return {"path": self.path, "error": self.error, "dropped": self.dropped, "queued": self._queue.qsize()}
+
+    def close(self, timeout=5.0):
+        """Flush queued rows, stop the writer thread and close the read connection."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            try:
+                self._queue.put(None, timeout=timeout)
+            except queue.Full:
+                pass
+            thread.join(timeout)
+        with self._read_lock:
+            reader, self._reader = self._reader, None
+        if reader is not None:
+            reader.close()
+
+    # ---------- QUERIES ----------
+    def _query(self, sql, params=()):
+        with self._read_lock:
+            if self._reader is None:
+                self._reader = connect(self.path)
+            return self._reader.execute(sql, params).fetchall()
+
+    def runs_for_station(self, station=None, limit=100):
+        return self._query(
+            "SELECT template, attempt, started, duration_ms, verdict FROM runs "
+            "WHERE station = ? ORDER BY started DESC LIMIT ?", (station or self.station, limit))
+
+    def runs_for_template(self, template, limit=100):
+        return self._query(
+            "SELECT station, attempt, started, duration_ms, verdict FROM runs "
+            "WHERE template = ? ORDER BY started DESC LIMIT ?", (template, limit))
+
+    def first_successful_fix(self, template):
+        """(station, started, attempt) of the earliest fix of ``template``, or None."""
+        rows = self._query(
+            "SELECT station, started, attempt FROM runs WHERE verdict = 'fixed' AND template = ? "
+            "ORDER BY started LIMIT 1", (template,))
+        return rows[0] if rows else None
+
+    def first_fix_per_station(self, template):
+        """[(station, started, attempt)] of each station's earliest fix of ``template``, earliest first."""
+        # SQLite takes the bare attempt column from the row that holds MIN(started)
+        return self._query(
+            "SELECT station, MIN(started), attempt FROM runs WHERE verdict = 'fixed' AND template = ? "
+            "GROUP BY station ORDER BY MIN(started)", (template,))
+
+    def cost_ranking(self, template):
+        """[(station, lowest metered cost)] over runs that fixed ``template``, cheapest first."""
+        return self._query(
+            "SELECT station, MIN(cost) FROM runs WHERE template = ? AND verdict = 'fixed' AND cost IS NOT NULL "
+            "GROUP BY station ORDER BY MIN(cost)", (template,))
+
+    def common_failures(self, template, limit=10):
+        """[(type, line, count, stations)] for ``template``, most frequent first."""
+        return self._query(
+            "SELECT type, line, COUNT(*), COUNT(DISTINCT station) FROM failures WHERE template = ? "
+            "GROUP BY type, line ORDER BY COUNT(*) DESC LIMIT ?", (template, limit))
+
+    def attempts_by_template(self, station=None):
+        """{template: number of runs} for one station."""
+        return dict(self._query(
+            "SELECT template, COUNT(*) FROM runs WHERE station = ? AND template IS NOT NULL "
+            "GROUP BY template", (station or self.station,)))
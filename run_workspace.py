@@ -0,0 +1,149 @@
+"""
+Throwaway working directories for contestant runs.
+
+Every run, test batch and template pre-run gets a fresh directory under
+WORKSPACE_ROOT: /dev/shm when the machine has it (RAM-backed, so
+file-heavy programs never touch the lab disk), otherwise the temp dir.
+QUOTA_GUARD caps the size of any file the child writes (RLIMIT_FSIZE,
+POSIX only); the IDE also polls the total with usage() and stops runs over
+QUOTA_BYTES. Directories are removed by a background Reaper thread, and
+leftovers from a crashed IDE are swept on the next start.
+
+  MNMJ_WORKSPACE_ROOT      base directory (default /dev/shm or the temp dir)
+  MNMJ_WORKSPACE_QUOTA_MB  per-run quota in MiB (default 64)
+"""
+import os
+import stat
+import time
+import queue
+import shutil
+import tempfile
+import threading
+
+QUOTA_BYTES = int(os.environ.get("MNMJ_WORKSPACE_QUOTA_MB", "64")) * 1024 * 1024
+# sweep() only touches directories untouched for this long
+STALE_S = 3600
+_SWEEP = object()
+
+
+def _default_root():
+    base = os.environ.get("MNMJ_WORKSPACE_ROOT")
+    if not base:
+        shm = "/dev/shm"
+        base = shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else tempfile.gettempdir()
+    return os.path.join(base, "mnmj_runs")
+
+
+WORKSPACE_ROOT = _default_root()
+
+# Prepended to the child's script; MNMJ_WORKSPACE_QUOTA comes from environment().
+# With SIGXFSZ ignored an oversized write raises OSError instead of killing the child.
+QUOTA_GUARD = (
+    "def _mnmj_quota():\n"
+    "    try:\n"
+    "        import os, resource, signal\n"
+    "        quota = int(os.environ.get('MNMJ_WORKSPACE_QUOTA', '0'))\n"
+    "        if quota > 0:\n"
+    "            signal.signal(signal.SIGXFSZ, signal.SIG_IGN)\n"
+    "            resource.setrlimit(resource.RLIMIT_FSIZE, (quota, quota))\n"
+    "    except Exception:\n"
+    "        pass\n"
+    "_mnmj_quota()\n"
+    "del _mnmj_quota\n"
+)
+
+
+def environment(quota=QUOTA_BYTES):
+    """Extra child environment variables for QUOTA_GUARD."""
+    return {"MNMJ_WORKSPACE_QUOTA": str(int(quota))}
+
+
+def create(kind="run"):
+    """Make and return a new empty workspace directory."""
+    os.makedirs(WORKSPACE_ROOT, exist_ok=True)
+    return tempfile.mkdtemp(prefix=f"{kind}-{os.getpid()}-", dir=WORKSPACE_ROOT)
+
+
+def usage(path, limit=None):
+    """Bytes used under ``path`` (symlinks not followed); stops counting once above ``limit``."""
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if stat.S_ISDIR(st.st_mode):
+                    stack.append(entry.path)
+                else:
+                    total += st.st_size
+                if limit is not None and total > limit:
+                    return total
+    return total
+
+
+def _is_workspace(path):
+    return os.path.dirname(os.path.abspath(path)) == os.path.abspath(WORKSPACE_ROOT)
+
+
+class Reaper:
+    """Removes workspaces on a daemon thread so teardown never blocks the GUI."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _put(self, item):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="workspace-reaper", daemon=True)
+                self._thread.start()
+        self._queue.put(item)
+
+    def discard(self, path):
+        if path and _is_workspace(path):
+            self._put(path)
+
+    def sweep(self):
+        """Remove leftovers of earlier sessions (crash, power loss) in the background."""
+        self._put(_SWEEP)
+
+    @staticmethod
+    def _stale():
+        try:
+            names = os.listdir(WORKSPACE_ROOT)
+        except OSError:
+            return []
+        now = time.time()
+        stale = []
+        for name in names:
+            path = os.path.join(WORKSPACE_ROOT, name)
+            try:
+                if now - os.stat(path).st_mtime > STALE_S:
+                    stale.append(path)
+            except OSError:
+                pass
+        return stale
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            for path in self._stale() if item is _SWEEP else (item,):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def close(self, timeout=5.0):
+        """Finish queued removals and stop the thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
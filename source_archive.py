@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Content-addressed archive of every source sent through run_code.
+
+Each distinct source is stored once, keyed by the same SHA-1 the results
+store records. A new source is zlib-compressed with the station's previous
+source as the preset dictionary, so a run that changed a few characters
+costs a few bytes; every MAX_CHAIN-th version is stored whole to bound
+extraction time. An index by station, template and time supports fast
+lookups and bulk export.
+
+  python source_archive.py stats
+  python source_archive.py export out_dir --station LAB-07 --template prog3
+"""
+import os
+import sys
+import time
+import queue
+import sqlite3
+import hashlib
+import argparse
+import threading
+import zlib
+from collections import OrderedDict
+
+from results_store import STATION_ID
+
+DEFAULT_ARCHIVE_PATH = os.environ.get(
+    "MNMJ_ARCHIVE_DB", os.path.join(os.path.expanduser("~"), "mnmj_sources.sqlite3"))
+
+MAX_CHAIN = 32
+# zlib only looks back 32 KiB, so only that much of the base is useful
+_ZDICT_LIMIT = 32 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    base TEXT,
+    depth INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY,
+    station TEXT NOT NULL,
+    template TEXT,
+    ts REAL NOT NULL,
+    hash TEXT NOT NULL REFERENCES blobs (hash)
+);
+CREATE INDEX IF NOT EXISTS submissions_station ON submissions (station, ts);
+CREATE INDEX IF NOT EXISTS submissions_template ON submissions (template, ts);
+CREATE INDEX IF NOT EXISTS submissions_hash ON submissions (hash);
+"""
+
+
+def source_hash(source):
+    return hashlib.sha1(source.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _zdict(base_bytes):
+    return base_bytes[-_ZDICT_LIMIT:]
+
+
+class SourceArchive:
+    """SQLite-backed deduplicating, delta-compressed source archive."""
+
+    def __init__(self, path=DEFAULT_ARCHIVE_PATH):
+        self.path = path
+        self._conn = None
+        self._cache = OrderedDict()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        # one connection shared by the writer thread and readers
+        self._db_lock = threading.RLock()
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    # ---------- WRITES ----------
+    def add(self, source, station=STATION_ID, template=None, ts=None):
+        """Archive ``source``; returns its hash. Blocks on disk — use add_async from the GUI."""
+        digest = source_hash(source)
+        with self._db_lock, self._connection() as conn:
+            if conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is None:
+                data = source.encode("utf-8", "surrogatepass")
+                base = conn.execute(
+                    "SELECT b.hash, b.depth FROM submissions s JOIN blobs b ON b.hash = s.hash "
+                    "WHERE s.station = ? ORDER BY s.ts DESC LIMIT 1", (station,)).fetchone()
+                if base is not None and base[1] < MAX_CHAIN:
+                    comp = zlib.compressobj(9, zdict=_zdict(self._bytes(base[0])))
+                    blob, base_hash, depth = comp.compress(data) + comp.flush(), base[0], base[1] + 1
+                else:
+                    blob, base_hash, depth = zlib.compress(data, 9), None, 0
+                conn.execute("INSERT INTO blobs (hash, base, depth, size, data) VALUES (?, ?, ?, ?, ?)",
+                             (digest, base_hash, depth, len(data), blob))
+            conn.execute("INSERT INTO submissions (station, template, ts, hash) VALUES (?, ?, ?, ?)",
+                         (station, template, ts if ts is not None else time.time(), digest))
+        return digest
+
+    def add_async(self, source, station=STATION_ID, template=None, ts=None):
+        """Queue ``source`` for the background writer thread."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._writer, name="source-archive", daemon=True)
+                self._thread.start()
+        self._queue.put((source, station, template, ts if ts is not None else time.time()))
+
+    def _writer(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self.add(*item)
+            except sqlite3.Error:
+                pass
+
+    def close(self, timeout=5.0):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ---------- READS ----------
+    def _bytes(self, digest):
+        cached = self._cache.get(digest)
+        if cached is not None:
+            self._cache.move_to_end(digest)
+            return cached
+        # walk down to a whole version, then decompress back up the chain
+        chain = []
+        conn = self._connection()
+        current = digest
+        while current is not None and current not in self._cache:
+            row = conn.execute("SELECT base, data FROM blobs WHERE hash = ?", (current,)).fetchone()
+            if row is None:
+                raise KeyError(digest)
+            chain.append((current, row[0], row[1]))
+            current = row[0]
+        data = self._cache.get(current) if current is not None else None
+        for h, base, blob in reversed(chain):
+            if base is None:
+                data = zlib.decompress(blob)
+            else:
+                dec = zlib.decompressobj(zdict=_zdict(data))
+                data = dec.decompress(blob) + dec.flush()
+            self._cache[h] = data
+        while len(self._cache) > 256:
+            self._cache.popitem(last=False)
+        return data
+
+    def get(self, digest):
+        """Source text for ``digest``."""
+        with self._db_lock:
+            return self._bytes(digest).decode("utf-8", "surrogatepass")
+
+    def find(self, station=None, template=None, since=None, until=None, limit=None):
+        """[(station, template, ts, hash)] matching the filters, oldest first."""
+        clauses, params = [], []
+        for column, op, value in (("station", "=", station), ("template", "=", template),
+                                  ("ts", ">=", since), ("ts", "<", until)):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        sql = "SELECT station, template, ts, hash FROM submissions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._db_lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    def export(self, out_dir, **filters):
+        """Write matching submissions to out_dir/station/template/<time>_<hash>.py; returns the count."""
+        count = 0
+        for station, template, ts, digest in self.find(**filters):
+            folder = os.path.join(out_dir, station, template or "free")
+            os.makedirs(folder, exist_ok=True)
+            name = time.strftime("%Y%m%d_%H%M%S", time.localtime(ts)) + f"_{digest[:10]}.py"
+            with open(os.path.join(folder, name), "w", encoding="utf-8") as f:
+                f.write(self.get(digest))
+            count += 1
+        return count
+
+    def stats(self):
+        with self._db_lock:
+            return self._stats(self._connection())
+
+    @staticmethod
+    def _stats(conn):
+        submissions = conn.execute("SELECT COUNT(*) FROM submissions").fetchone()[0]
+        blobs, raw, stored = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()
+        return {"submissions": submissions, "unique_sources": blobs,
+                "raw_bytes": raw, "stored_bytes": stored}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or export the submitted-source archive.")
+    parser.add_argument("--db", default=DEFAULT_ARCHIVE_PATH, help="archive database")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("stats", help="show archive size and deduplication")
+    exp = sub.add_parser("export", help="write sources to a directory tree")
+    exp.add_argument("out_dir")
+    exp.add_argument("--station")
+    exp.add_argument("--template")
+    exp.add_argument("--since", type=float, help="unix time")
+    exp.add_argument("--until", type=float, help="unix time")
+    args = parser.parse_args(argv)
+
+    archive = SourceArchive(args.db)
+    if args.cmd == "stats":
+        for key, value in archive.stats().items():
+            print(f"{key:15s} {value}")
+    else:
+        n = archive.export(args.out_dir, station=args.station, template=args.template,
+                           since=args.since, until=args.until)
+        print(f"exported {n} submissions to {args.out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
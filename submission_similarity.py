@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Find copied submissions across stations after a round.
+
+Each submission becomes a set of normalized-AST shingles (code_fingerprint),
+shingles shared by most submissions (the template itself) are discarded,
+and the rest are summarised by a MinHash signature. An LSH index over the
+signatures yields candidate pairs without comparing every pair, so the cost
+grows roughly linearly with the number of submissions. Candidates above the
+threshold are grouped into clusters.
+
+Example:
+  python submission_similarity.py submissions/ --threshold 0.8 --json report.json
+"""
+import os
+import sys
+import json
+import random
+import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from code_fingerprint import shingles
+
+NUM_PERM = 128
+BANDS = 32
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 64) - 1
+
+
+def _permutations(num_perm, seed=1):
+    rng = random.Random(seed)
+    return [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+
+PERMUTATIONS = _permutations(NUM_PERM)
+
+
+def minhash(shingle_set, perms=PERMUTATIONS):
+    """MinHash signature of a set of 64-bit shingle hashes."""
+    if not shingle_set:
+        return (_MASK,) * len(perms)
+    values = list(shingle_set)
+    return tuple(min((a * v + b) % _PRIME for v in values) for a, b in perms)
+
+
+def estimated_jaccard(sig_a, sig_b):
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class LSHIndex:
+    """Banded locality-sensitive hash index over MinHash signatures."""
+
+    def __init__(self, bands=BANDS, num_perm=NUM_PERM):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+
+    def add(self, key, signature):
+        r = self.rows
+        for band, bucket in enumerate(self._buckets):
+            bucket[signature[band * r:(band + 1) * r]].append(key)
+
+    def candidate_pairs(self):
+        pairs = set()
+        for bucket in self._buckets:
+            for keys in bucket.values():
+                if len(keys) < 2:
+                    continue
+                for i in range(len(keys)):
+                    for j in range(i + 1, len(keys)):
+                        pairs.add((keys[i], keys[j]) if keys[i] < keys[j] else (keys[j], keys[i]))
+        return pairs
+
+
+# ---------- PIPELINE ----------
+def _read_shingles(path):
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return path, shingles(f.read())
+    except OSError:
+        return path, set()
+
+
+def _signature(item):
+    path, shingle_set = item
+    return path, minhash(shingle_set)
+
+
+def collect_sources(paths):
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _, files in os.walk(p):
+                out.extend(os.path.join(root, name) for name in files if name.endswith(".py"))
+        elif p.endswith(".py"):
+            out.append(p)
+    return sorted(out)
+
+
+def find_clusters(paths, threshold=0.8, max_df=0.5, workers=None):
+    """
+    Return (clusters, pairs) for the given source files.
+
+    ``pairs`` maps (path_a, path_b) to the estimated similarity; ``clusters``
+    is a list of path lists, largest first. Shingles present in more than
+    ``max_df`` of the submissions are treated as template boilerplate.
+    """
+    chunk = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        sets = dict(pool.map(_read_shingles, paths, chunksize=chunk))
+
+        if len(sets) > 2 and max_df < 1.0:
+            df = defaultdict(int)
+            for shingle_set in sets.values():
+                for h in shingle_set:
+                    df[h] += 1
+            limit = max_df * len(sets)
+            common = {h for h, n in df.items() if n > limit}
+            sets = {p: s - common for p, s in sets.items()}
+
+        signatures = dict(pool.map(_signature, sets.items(), chunksize=chunk))
+
+    index = LSHIndex()
+    for path, sig in signatures.items():
+        if sets[path]:
+            index.add(path, sig)
+
+    pairs = {}
+    for a, b in index.candidate_pairs():
+        score = estimated_jaccard(signatures[a], signatures[b])
+        if score >= threshold:
+            pairs[(a, b)] = score
+
+    # union-find over the confirmed pairs
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in pairs:
+        parent[find(a)] = find(b)
+    groups = defaultdict(list)
+    for x in list(parent):
+        groups[find(x)].append(x)
+    clusters = sorted((sorted(g) for g in groups.values()), key=lambda g: (-len(g), g))
+    return clusters, pairs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detect similar submissions with MinHash/LSH.")
+    parser.add_argument("paths", nargs="+", help="submission files or directories of .py files")
+    parser.add_argument("--threshold", type=float, default=0.8, help="minimum similarity to report")
+    parser.add_argument("--max-df", type=float, default=0.5,
+                        help="drop shingles found in more than this fraction of submissions")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--json", metavar="FILE", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    paths = collect_sources(args.paths)
+    if not paths:
+        print("No .py submissions found.")
+        return 1
+    clusters, pairs = find_clusters(paths, args.threshold, args.max_df, args.workers)
+
+    print(f"{len(paths)} submissions, {len(pairs)} similar pairs, {len(clusters)} clusters")
+    report = []
+    for n, cluster in enumerate(clusters, 1):
+        members = set(cluster)
+        cluster_pairs = sorted(((a, b, s) for (a, b), s in pairs.items() if a in members),
+                               key=lambda t: -t[2])
+        top = cluster_pairs[0][2] if cluster_pairs else 0.0
+        print(f"\nCluster {n}: {len(cluster)} submissions, max similarity {top:.2f}")
+        for path in cluster:
+            print(f"  {path}")
+        report.append({
+            "members": cluster,
+            "pairs": [{"a": a, "b": b, "score": round(s, 3)} for a, b, s in cluster_pairs],
+        })
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"threshold": args.threshold, "clusters": report}, f, indent=2, sort_keys=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Generate new buggy templates from correct reference programs.
+
+Each reference is parsed and every applicable AST mutation site is turned
+into a candidate, using the same kinds of bugs as PROGRAM_TEMPLATES:
+wrong operators, a removed ``global``, mutable/wrong default arguments,
+late-binding lambdas, break/continue swaps and off-by-one ranges.
+Candidates are deduplicated by normalized-AST fingerprint and vetted in
+parallel: the reference must pass, the candidate must fail (error or
+different output) and both must finish within the time limit.
+
+Example:
+  python template_mutator.py references/ --out generated/ --limit 500
+"""
+import os
+import sys
+import ast
+import json
+import time
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from code_fingerprint import fingerprint
+
+TIME_LIMIT_S = 2.0
+
+_OP_SWAPS = {
+    ast.Add: ast.Sub, ast.Sub: ast.Add,
+    ast.Mult: ast.FloorDiv, ast.FloorDiv: ast.Mult, ast.Div: ast.Mult,
+    ast.Mod: ast.FloorDiv, ast.Pow: ast.Mult,
+    ast.Lt: ast.LtE, ast.LtE: ast.Lt, ast.Gt: ast.GtE, ast.GtE: ast.Gt,
+    ast.Eq: ast.NotEq, ast.NotEq: ast.Eq,
+    ast.In: ast.NotIn, ast.NotIn: ast.In,
+    ast.Is: ast.IsNot, ast.IsNot: ast.Is,
+    ast.And: ast.Or, ast.Or: ast.And,
+}
+
+
+# ---------- MUTATIONS ----------
+# Each mutation is a function (tree, site) -> bool that applies the change at
+# the site-th applicable node of a fresh copy of the tree and reports
+# whether such a site existed.
+def _nth(nodes, site):
+    nodes = list(nodes)
+    return nodes[site] if site < len(nodes) else None
+
+
+def mutate_operator(tree, site):
+    def ops():
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.BinOp, ast.AugAssign, ast.BoolOp)) and type(node.op) in _OP_SWAPS:
+                yield node, None
+            elif isinstance(node, ast.Compare):
+                for i, op in enumerate(node.ops):
+                    if type(op) in _OP_SWAPS:
+                        yield node, i
+    hit = _nth(ops(), site)
+    if hit is None:
+        return False
+    node, i = hit
+    if i is None:
+        node.op = _OP_SWAPS[type(node.op)]()
+    else:
+        node.ops[i] = _OP_SWAPS[type(node.ops[i])]()
+    return True
+
+
+def remove_global(tree, site):
+    hit = _nth(((parent, stmt) for parent in ast.walk(tree)
+                if isinstance(getattr(parent, "body", None), list)
+                for stmt in parent.body if isinstance(stmt, ast.Global)), site)
+    if hit is None:
+        return False
+    parent, stmt = hit
+    parent.body.remove(stmt)
+    if not parent.body:
+        parent.body.append(ast.Pass())
+    return True
+
+
+def mutable_default(tree, site):
+    """``def f(x, lst=None)`` -> ``def f(x, lst=[])``; other defaults get a wrong value."""
+    def defaults():
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.Lambda)):
+                for i, d in enumerate(node.args.defaults):
+                    if isinstance(d, ast.Constant):
+                        yield node.args.defaults, i
+    hit = _nth(defaults(), site)
+    if hit is None:
+        return False
+    defaults_list, i = hit
+    value = defaults_list[i].value
+    if value is None:
+        defaults_list[i] = ast.List(elts=[], ctx=ast.Load())
+    elif isinstance(value, bool):
+        defaults_list[i] = ast.Constant(not value)
+    elif isinstance(value, (int, float)):
+        defaults_list[i] = ast.Constant(value + 1)
+    else:
+        defaults_list[i] = ast.Constant(None)
+    return True
+
+
+def late_binding_lambda(tree, site):
+    """``lambda i=i: i`` -> ``lambda: i`` so every closure sees the last value."""
+    hit = _nth((n for n in ast.walk(tree) if isinstance(n, ast.Lambda) and n.args.defaults), site)
+    if hit is None:
+        return False
+    hit.args.args = hit.args.args[:len(hit.args.args) - len(hit.args.defaults)]
+    hit.args.defaults = []
+    return True
+
+
+def swap_break_continue(tree, site):
+    def stmts():
+        for parent in ast.walk(tree):
+            for field in ("body", "orelse"):
+                block = getattr(parent, field, None)
+                if isinstance(block, list):
+                    for i, stmt in enumerate(block):
+                        if isinstance(stmt, (ast.Break, ast.Continue)):
+                            yield block, i
+    hit = _nth(stmts(), site)
+    if hit is None:
+        return False
+    block, i = hit
+    block[i] = ast.Continue() if isinstance(block[i], ast.Break) else ast.Break()
+    return True
+
+
+def off_by_one(tree, site):
+    hit = _nth((n for n in ast.walk(tree) if isinstance(n, ast.Call) and isinstance(n.func, ast.Name)
+                and n.func.id == "range" and n.args), site)
+    if hit is None:
+        return False
+    stop = hit.args[0] if len(hit.args) == 1 else hit.args[1]
+    new_stop = ast.BinOp(left=stop, op=ast.Sub(), right=ast.Constant(1))
+    if len(hit.args) == 1:
+        hit.args[0] = new_stop
+    else:
+        hit.args[1] = new_stop
+    return True
+
+
+MUTATIONS = {
+    "operator": mutate_operator,
+    "remove_global": remove_global,
+    "mutable_default": mutable_default,
+    "late_binding_lambda": late_binding_lambda,
+    "break_continue": swap_break_continue,
+    "off_by_one": off_by_one,
+}
+
+
+def generate_mutants(source, kinds=None):
+    """Yield (kind, site, mutant_source) for every applicable mutation site."""
+    for kind in kinds or MUTATIONS:
+        mutate = MUTATIONS[kind]
+        site = 0
+        while True:
+            tree = ast.parse(source)
+            if not mutate(tree, site):
+                break
+            ast.fix_missing_locations(tree)
+            try:
+                yield kind, site, ast.unparse(tree) + "\n"
+            except Exception:
+                pass
+            site += 1
+
+
+# ---------- VALIDATION ----------
+def run_source(source, time_limit=TIME_LIMIT_S):
+    """Run ``source`` in a fresh interpreter; return (status, stdout)."""
+    try:
+        done = subprocess.run([sys.executable, "-I", "-c", source],
+                              input="", capture_output=True, text=True, timeout=time_limit)
+    except subprocess.TimeoutExpired:
+        return "timeout", ""
+    if done.returncode != 0 or done.stderr.strip():
+        return "error", done.stdout
+    return "ok", done.stdout
+
+
+def vet(candidate, expected_stdout, time_limit=TIME_LIMIT_S):
+    """Return the failure mode of a candidate, or None if it is not a usable problem."""
+    status, stdout = run_source(candidate, time_limit)
+    if status == "timeout":
+        return None
+    if status == "error":
+        return "runtime_error"
+    if stdout != expected_stdout:
+        return "wrong_output"
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate and vet buggy templates from reference programs.")
+    parser.add_argument("references", nargs="+", help="correct reference .py files or directories")
+    parser.add_argument("--out", default="generated_templates", help="output directory")
+    parser.add_argument("--kinds", nargs="*", choices=sorted(MUTATIONS), help="mutation kinds to apply")
+    parser.add_argument("--limit", type=int, default=0, help="stop after this many vetted problems")
+    parser.add_argument("--time-limit", type=float, default=TIME_LIMIT_S, help="seconds per run")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="parallel runs")
+    args = parser.parse_args(argv)
+
+    ref_paths = []
+    for p in args.references:
+        if os.path.isdir(p):
+            ref_paths.extend(os.path.join(p, n) for n in sorted(os.listdir(p)) if n.endswith(".py"))
+        else:
+            ref_paths.append(p)
+
+    t0 = time.perf_counter()
+    os.makedirs(args.out, exist_ok=True)
+    seen = set()
+    jobs = []
+    # Child interpreters do the work, so threads are enough to keep every core busy.
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        references = {}
+        sources = {}
+        for path in ref_paths:
+            with open(path, encoding="utf-8") as f:
+                sources[path] = f.read()
+        for path, ref in zip(ref_paths, pool.map(lambda p: run_source(sources[p], args.time_limit), ref_paths)):
+            if ref[0] != "ok":
+                print(f"skipping {path}: reference does not pass ({ref[0]})")
+                continue
+            references[path] = ref[1]
+
+        for path, expected in references.items():
+            source = sources[path]
+            seen.add(fingerprint(source))
+            for kind, site, mutant in generate_mutants(source, args.kinds):
+                fp = fingerprint(mutant)
+                if fp in seen:
+                    continue
+                seen.add(fp)
+                jobs.append((path, kind, site, mutant, fp,
+                             pool.submit(vet, mutant, expected, args.time_limit)))
+
+        manifest = []
+        for path, kind, site, mutant, fp, future in jobs:
+            failure = future.result()
+            if failure is None:
+                continue
+            name = f"{os.path.splitext(os.path.basename(path))[0]}_{kind}_{site}.py"
+            with open(os.path.join(args.out, name), "w", encoding="utf-8") as f:
+                f.write(mutant)
+            manifest.append({"file": name, "reference": path, "kind": kind, "site": site,
+                             "failure": failure, "fingerprint": fp})
+            if args.limit and len(manifest) >= args.limit:
+                for *_, pending in jobs:
+                    pending.cancel()
+                break
+
+    with open(os.path.join(args.out, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    elapsed = time.perf_counter() - t0
+    rate = len(manifest) / elapsed * 60 if elapsed else 0.0
+    print(f"{len(manifest)} vetted problems from {len(jobs)} candidates in {elapsed:.1f}s ({rate:.0f}/min)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
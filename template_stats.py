@@ -0,0 +1,211 @@
+"""
+Streaming per-template statistics for the admin view.
+
+Every event updates a few counters and O(1) estimators: Welford running
+mean/variance and P-square quantile sketches (five markers each), so the
+cost per event is constant no matter how long the round runs. Structured
+failure records (see failure_channel) are counted per failure signature.
+"""
+import math
+from collections import Counter
+
+import failure_channel
+
+
+class RunningStats:
+    """Welford's online mean and variance."""
+
+    __slots__ = ("n", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class P2Quantile:
+    """Jain & Chlamtac P-square estimator of one quantile in constant memory."""
+
+    __slots__ = ("p", "_initial", "_q", "_n", "_np", "_dn")
+
+    def __init__(self, p):
+        self.p = p
+        self._initial = []
+        self._q = None
+
+    def add(self, x):
+        if self._q is None:
+            self._initial.append(x)
+            if len(self._initial) == 5:
+                p = self.p
+                self._q = sorted(self._initial)
+                self._n = [0, 1, 2, 3, 4]
+                self._np = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+                self._dn = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+            return
+
+        q, n = self._q, self._n
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._np[i] += self._dn[i]
+
+        for i in (1, 2, 3):
+            d = self._np[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if q[i - 1] < parabolic < q[i + 1]:
+                    q[i] = parabolic
+                else:
+                    q[i] += d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    def value(self):
+        if self._q is not None:
+            return self._q[2]
+        if not self._initial:
+            return 0.0
+        ordered = sorted(self._initial)
+        return ordered[min(len(ordered) - 1, int(self.p * len(ordered)))]
+
+
+class TemplateStats:
+    """Aggregates for one template key."""
+
+    def __init__(self):
+        self.attempts = 0
+        self.fixes = 0
+        self.error_runs = 0
+        self.stderr_events = 0
+        self.timeouts = 0
+        self.run_ms = RunningStats()
+        self.run_ms_p50 = P2Quantile(0.5)
+        self.run_ms_p90 = P2Quantile(0.9)
+        self.attempts_to_fix = RunningStats()
+        self._since_fix = 0
+        self.failures = Counter()
+
+    def add_run(self, duration_ms, verdict):
+        self.attempts += 1
+        self._since_fix += 1
+        if verdict in ("error", "syntax_error"):
+            self.error_runs += 1
+        elif verdict == "timeout":
+            self.timeouts += 1
+        elif verdict == "fixed":
+            self.fixes += 1
+            self.attempts_to_fix.add(self._since_fix)
+            self._since_fix = 0
+        if verdict != "syntax_error":
+            self.run_ms.add(duration_ms)
+            self.run_ms_p50.add(duration_ms)
+            self.run_ms_p90.add(duration_ms)
+
+    @property
+    def error_rate(self):
+        return self.error_runs / self.attempts if self.attempts else 0.0
+
+    def to_dict(self):
+        return {
+            "attempts": self.attempts,
+            "fixes": self.fixes,
+            "error_runs": self.error_runs,
+            "error_rate": round(self.error_rate, 4),
+            "stderr_events": self.stderr_events,
+            "timeouts": self.timeouts,
+            "run_ms_mean": round(self.run_ms.mean, 2),
+            "run_ms_std": round(self.run_ms.std, 2),
+            "run_ms_p50": round(self.run_ms_p50.value(), 2),
+            "run_ms_p90": round(self.run_ms_p90.value(), 2),
+            "attempts_to_fix_mean": round(self.attempts_to_fix.mean, 2),
+            "top_failures": self.failures.most_common(5),
+        }
+
+
+class TemplateStatsEngine:
+    """Per-template aggregates fed by the IDE's run events."""
+
+    def __init__(self):
+        self.templates = {}
+
+    def _get(self, key):
+        stats = self.templates.get(key)
+        if stats is None:
+            stats = self.templates[key] = TemplateStats()
+        return stats
+
+    def on_stderr(self, template):
+        if template:
+            self._get(template).stderr_events += 1
+
+    def on_failure(self, template, record):
+        if template:
+            self._get(template).failures[failure_channel.signature(record)] += 1
+
+    def on_run_finished(self, template, duration_ms, verdict):
+        if template:
+            self._get(template).add_run(duration_ms, verdict)
+
+    def to_dict(self):
+        return {key: stats.to_dict() for key, stats in sorted(self.templates.items())}
+
+    def summary_text(self):
+        if not self.templates:
+            return "No template runs yet."
+        header = f"{'template':10s} {'tries':>6s} {'fixes':>6s} {'err%':>6s} {'tries/fix':>9s} " \
+                 f"{'mean ms':>9s} {'std':>8s} {'p50':>8s} {'p90':>8s}"
+        lines = [header, "-" * len(header)]
+        # hardest first: most attempts per fix, then highest error rate
+        def hardness(item):
+            s = item[1]
+            return (-(s.attempts_to_fix.mean if s.fixes else s.attempts + 1e6), -s.error_rate)
+        for key, s in sorted(self.templates.items(), key=hardness):
+            d = s.to_dict()
+            tries_per_fix = f"{d['attempts_to_fix_mean']:.1f}" if s.fixes else "-"
+            lines.append(f"{key:10s} {d['attempts']:>6d} {d['fixes']:>6d} {d['error_rate'] * 100:>5.1f}% "
+                         f"{tries_per_fix:>9s} {d['run_ms_mean']:>9.1f} {d['run_ms_std']:>8.1f} "
+                         f"{d['run_ms_p50']:>8.1f} {d['run_ms_p90']:>8.1f}")
+        return "\n".join(lines)
+
+    def failures_text(self, per_template=3):
+        """Most common failure modes per template, most failing template first."""
+        failing = [(key, s) for key, s in self.templates.items() if s.failures]
+        if not failing:
+            return "No runtime failures recorded yet."
+        lines = []
+        for key, s in sorted(failing, key=lambda item: -sum(item[1].failures.values())):
+            lines.append(f"{key}  ({sum(s.failures.values())} failures)")
+            for sig, count in s.failures.most_common(per_template):
+                lines.append(f"  {count:>5d}  {sig}")
+        return "\n".join(lines)
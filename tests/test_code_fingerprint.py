@@ -0,0 +1,38 @@
+from code_fingerprint import fingerprint, normalized_tokens, shingles
+
+BASE = "def total(items):\n    s = 0\n    for x in items:\n        s += x\n    return s\nprint(total([1, 2]))\n"
+
+
+def test_renaming_comments_and_formatting_do_not_change_the_fingerprint():
+    variant = ('def add_all(values):\n    """Sum them."""\n    acc = 0  # running sum\n'
+               '    for v in values:\n\n        acc += v\n    return acc\nprint(add_all( [1,2] ))\n')
+    assert fingerprint(variant) == fingerprint(BASE)
+
+
+def test_literals_change_the_fingerprint():
+    assert fingerprint(BASE.replace("[1, 2]", "[1, 3]")) != fingerprint(BASE)
+
+
+def test_moving_a_statement_out_of_a_block_changes_the_fingerprint():
+    moved = "def total(items):\n    s = 0\n    for x in items:\n        s += x\n        return s\nprint(total([1, 2]))\n"
+    assert fingerprint(moved) != fingerprint(BASE)
+
+
+def test_builtins_keep_their_names():
+    assert fingerprint("print(1)\n") != fingerprint("repr(1)\n")
+
+
+def test_names_used_in_strings_or_keywords_are_not_renamed():
+    assert fingerprint("x = 1\nprint(globals()['x'])\n") != fingerprint("y = 1\nprint(globals()['x'])\n")
+    assert fingerprint("def f(sep):\n    pass\nf(sep=1)\n") != fingerprint("def f(end):\n    pass\nf(end=1)\n")
+
+
+def test_shingles_ignore_literal_values():
+    assert shingles("print(1)\n") == shingles("print(2)\n")
+    assert shingles("print(1)\n") != shingles("print(len(1))\n")
+
+
+def test_unparseable_source_falls_back_to_renamed_tokens():
+    broken = "def f(:\n    a = 1\n"
+    assert normalized_tokens(broken)
+    assert fingerprint(broken) == fingerprint("def g(:\n    b = 1\n")
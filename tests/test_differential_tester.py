@@ -0,0 +1,35 @@
+from differential_tester import shrink
+
+
+def test_shrink_int_to_the_smallest_failing_value():
+    assert shrink(1000, lambda v: v >= 7) == 7
+    assert shrink(-1000, lambda v: v <= -7) == -7
+
+
+def test_shrink_list_keeps_only_the_culprit():
+    assert shrink([5, 3, 8, 1], lambda v: 3 in v) == [3]
+
+
+def test_shrink_string():
+    assert shrink("hello xyz", lambda v: "x" in v) == "x"
+    assert shrink("bbbb", lambda v: len(v) == 4) == "aaaa"
+
+
+def test_shrink_keeps_argument_arity():
+    assert shrink((50, [1, 2, 3], "abc"), lambda v: v[0] > 2) == (3, [], "")
+
+
+def test_shrink_dict():
+    assert shrink({"a": 9, "b": 4}, lambda v: v.get("b", 0) > 1) == {"b": 2}
+
+
+def test_shrink_stops_after_its_step_budget():
+    calls = []
+
+    def fails(v):
+        calls.append(v)
+        return v > 100
+
+    # 0 passes, 500 still fails, then the third step runs out the budget
+    assert shrink(1000, fails, steps=3) == 500
+    assert len(calls) == 3
@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+from output_index import OutputIndex
+
+
+@pytest.fixture
+def index():
+    idx = OutputIndex()
+    yield idx
+    idx.close()
+
+
+def test_lines_split_across_chunks(index):
+    assert index.append(b"first li") == 0
+    assert index.append(b"ne\nsecond\r\nthi") == 0
+    assert index.append(b"rd") == 2
+    assert index.line_count == 3
+    assert [index.line(i) for i in range(3)] == ["first line", "second", "third"]
+    assert index.lines(-5, 100) == [(0, "first line"), (1, "second"), (2, "third")]
+    with pytest.raises(IndexError):
+        index.line(3)
+
+
+def test_invalid_utf8_is_replaced(index):
+    index.append(b"caf\xc3\xa9 \xff\n")
+    assert index.line(0) == "café �"
+
+
+def test_search_walks_every_slice(index):
+    index.SEARCH_SLICE_LINES = 10
+    index.append("".join(f"line {i}\n" for i in range(95)).encode())
+    found, slices = [], 0
+    for next_line, matches in index.search(r"line \d*7$"):
+        slices += 1
+        found.extend(n for n, _ in matches)
+    assert found == [7, 17, 27, 37, 47, 57, 67, 77, 87]
+    assert slices == 10 and next_line == 95
+
+
+def test_search_sees_lines_appended_meanwhile(index):
+    index.SEARCH_SLICE_LINES = 2
+    index.append(b"a\nb\n")
+    search = index.search("NEEDLE", flags=re.IGNORECASE)
+    assert next(search) == (2, [])
+    index.append(b"c\nneedle\n")
+    assert next(search) == (4, [(3, "needle")])
+
+
+def test_clear_starts_over(index):
+    index.append(b"old\n")
+    index.clear()
+    assert index.line_count == 0 and index.size == 0
+    index.append(b"new\n")
+    assert index.line(0) == "new"
@@ -0,0 +1,61 @@
+import pytest
+
+from preflight import analyze_source
+
+
+@pytest.mark.parametrize("code", [
+    "x = input()\n",
+    "read = input\nprint(read())\n",
+    "def f():\n    return input()\nf()\n",
+    "import sys\nprint(sys.stdin.read())\n",
+    "import sys\nprint(sys.__stdin__.readline())\n",
+    "from sys import stdin\nprint(stdin.read())\n",
+    "from sys import stdin as s\nprint(s.read())\n",
+    "from sys import *\nprint(stdin.read())\n",
+    "print(open(0).read())\n",
+    "with open('/dev/stdin') as f:\n    print(f.read())\n",
+    "import io\nprint(io.open(0).read())\n",
+    "import os\nprint(os.read(0, 100))\n",
+    "import os as o\nprint(o.read(0, 100))\n",
+    "from os import read\nprint(read(0, 100))\n",
+    "import os\nprint(os.fdopen(0).read())\n",
+    "import builtins\nprint(builtins.input())\n",
+    "print(__builtins__.input())\n",
+    "import fileinput\nfor line in fileinput.input():\n    print(line)\n",
+    "import fileinput\nfor line in fileinput.input(['-']):\n    print(line)\n",
+    "import sys\nprint(getattr(sys, 'stdin').read())\n",
+    "name = 'data.txt'\nprint(open(name).read())\n",
+])
+def test_reads_stdin(code):
+    assert analyze_source(code).reads_stdin
+
+
+@pytest.mark.parametrize("code", [
+    "print('hello')\n",
+    "def input():\n    return 'x'\n",
+    "def f(input):\n    return input()\nprint(f(str))\n",
+    "with open('data.txt', 'w') as f:\n    f.write('x')\n",
+    "import os\nprint(os.path.join('a', 'b'))\n",
+    "import builtins\nprint(builtins.len([1]))\n",
+    "import fileinput\nfor line in fileinput.input(['a.txt']):\n    print(line)\n",
+    "import os\nfd = os.open('a.txt', os.O_RDONLY)\n",
+    "print(open(1, 'w').write('x'))\n",
+])
+def test_does_not_read_stdin(code):
+    assert not analyze_source(code).reads_stdin
+
+
+def test_unparsable_code_falls_back_to_substring():
+    report = analyze_source("x = input(\n")
+    assert not report.syntax_ok and report.reads_stdin
+
+
+def test_infinite_loop_lines():
+    report = analyze_source("x = 0\nwhile True:\n    x += 1\n")
+    assert report.infinite_loop_lines == (2,)
+    assert analyze_source("while True:\n    break\n").infinite_loop_lines == ()
+
+
+def test_nondeterministic_imports():
+    assert not analyze_source("import random\nprint(random.random())\n").deterministic
+    assert analyze_source("print(sum([1, 2]))\n").deterministic
@@ -0,0 +1,47 @@
+import ast
+
+import pytest
+
+from code_fingerprint import fingerprint
+from reference_fixes import match
+
+FIX = "def check_len(s):\n    if len(s) >= 5:\n        return 'Long'\n    return 'Short'\nprint(check_len('Hello'))\n"
+
+
+@pytest.fixture
+def index():
+    entry = {"template": "prog5", "stdout": "Long\n", "dump": ast.dump(ast.parse(FIX))}
+    return {f"prog5:{fingerprint(FIX)}": entry}
+
+
+def test_comments_and_formatting_still_match(index):
+    reformatted = ("# my fix\ndef check_len(s):\n\n    if len(s)>=5:  # long enough\n        return 'Long'\n"
+                   "    return 'Short'\nprint( check_len('Hello') )\n")
+    assert match(index, "prog5", reformatted)["stdout"] == "Long\n"
+
+
+def test_renamed_fix_shares_the_fingerprint_but_not_the_dump(index):
+    renamed = FIX.replace("s)", "text)").replace("(s", "(text")
+    assert fingerprint(renamed) == fingerprint(FIX)
+    assert match(index, "prog5", renamed) is None
+
+
+def test_stale_dump_rejects_the_candidate(index):
+    for entry in index.values():
+        entry["dump"] = ast.dump(ast.parse("print('Long')\n"))
+    assert match(index, "prog5", FIX) is None
+
+
+@pytest.mark.parametrize("template, source", [
+    ("prog6", FIX),
+    (None, FIX),
+    ("prog5", FIX.replace("'Hello'", "'Hi'")),
+    ("prog5", "def check_len(s:\n"),
+])
+def test_no_match(index, template, source):
+    assert match(index, template, source) is None
+
+
+def test_empty_index():
+    assert match({}, "prog5", FIX) is None
+    assert match(None, "prog5", FIX) is None
@@ -0,0 +1,57 @@
+from source_archive import MAX_CHAIN, SourceArchive, source_hash
+
+
+def _versions(n):
+    lines = [f"x{i} = {i}\n" for i in range(200)]
+    out = []
+    for i in range(n):
+        lines[i % len(lines)] = f"x{i} = {i * 7}  # edit {i}\n"
+        out.append("".join(lines))
+    return out
+
+
+def test_delta_chain_round_trips(tmp_path):
+    path = str(tmp_path / "sources.sqlite3")
+    versions = _versions(MAX_CHAIN * 2 + 5)
+    archive = SourceArchive(path)
+    hashes = [archive.add(source, station="s1", template="prog1", ts=float(i))
+              for i, source in enumerate(versions)]
+    archive.close()
+
+    # a fresh instance has an empty cache, so every chain is decoded from disk
+    archive = SourceArchive(path)
+    try:
+        assert [archive.get(h) for h in reversed(hashes)] == versions[::-1]
+        conn = archive._connection()
+        depths = [row[0] for row in conn.execute("SELECT depth FROM blobs ORDER BY rowid")]
+        # a whole version every MAX_CHAIN + 1 sources
+        assert max(depths) == MAX_CHAIN
+        assert depths.count(0) == len(versions) // (MAX_CHAIN + 1) + 1
+        stats = archive.stats()
+        assert stats["stored_bytes"] < stats["raw_bytes"] / 10
+    finally:
+        archive.close()
+
+
+def test_duplicate_sources_are_stored_once(tmp_path):
+    archive = SourceArchive(str(tmp_path / "sources.sqlite3"))
+    try:
+        assert archive.add("print(1)\n", station="s1", ts=1.0) == source_hash("print(1)\n")
+        archive.add("print(1)\n", station="s2", ts=2.0)
+        assert archive.stats()["unique_sources"] == 1
+        assert [row[0] for row in archive.find()] == ["s1", "s2"]
+        assert archive.find(station="s2", since=1.5)[0][3] == source_hash("print(1)\n")
+    finally:
+        archive.close()
+
+
+def test_add_async_is_written_by_close(tmp_path):
+    archive = SourceArchive(str(tmp_path / "sources.sqlite3"))
+    archive.add_async("print('ü')\n", station="s1", template="prog2")
+    archive.close()
+    archive = SourceArchive(archive.path)
+    try:
+        (station, template, _, digest), = archive.find()
+        assert (station, template, archive.get(digest)) == ("s1", "prog2", "print('ü')\n")
+    finally:
+        archive.close()
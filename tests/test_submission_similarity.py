@@ -0,0 +1,49 @@
+import pytest
+
+from submission_similarity import NUM_PERM, LSHIndex, estimated_jaccard, find_clusters, minhash
+
+
+def test_identical_sets_have_identical_signatures():
+    shingle_set = set(range(1000, 1100))
+    assert estimated_jaccard(minhash(shingle_set), minhash(set(shingle_set))) == 1.0
+
+
+def test_estimated_jaccard_is_close_to_the_true_value():
+    a, b = set(range(0, 200)), set(range(100, 300))
+    # true Jaccard similarity is 100 / 300
+    assert estimated_jaccard(minhash(a), minhash(b)) == pytest.approx(1 / 3, abs=0.12)
+    assert estimated_jaccard(minhash(a), minhash(set(range(5000, 5200)))) < 0.1
+
+
+def test_empty_set_signature():
+    assert len(minhash(set())) == NUM_PERM
+
+
+def test_lsh_pairs_only_similar_signatures():
+    index = LSHIndex()
+    base = set(range(500))
+    index.add("a", minhash(base))
+    index.add("b", minhash(base | {10_000}))
+    index.add("c", minhash(set(range(20_000, 20_500))))
+    assert index.candidate_pairs() == {("a", "b")}
+
+
+def test_lsh_rejects_uneven_bands():
+    with pytest.raises(ValueError):
+        LSHIndex(bands=5, num_perm=128)
+
+
+def test_find_clusters_groups_renamed_copies(tmp_path):
+    original = ("def mean(values):\n    total = 0\n    for v in values:\n        total += v\n"
+                "    return total / len(values)\nprint(mean([1, 2, 3]))\n")
+    copied = original.replace("values", "xs").replace("total", "acc")
+    other = ("words = input().split()\ncounts = {}\nfor w in words:\n    counts[w] = counts.get(w, 0) + 1\n"
+             "for w in sorted(counts):\n    print(w, counts[w])\n")
+    paths = []
+    for name, source in (("a.py", original), ("b.py", copied), ("c.py", other)):
+        path = tmp_path / name
+        path.write_text(source, encoding="utf-8")
+        paths.append(str(path))
+    clusters, pairs = find_clusters(paths, threshold=0.8, max_df=1.0, workers=1)
+    assert clusters == [paths[:2]]
+    assert pairs == {(paths[0], paths[1]): 1.0}
@@ -0,0 +1,52 @@
+import random
+import statistics
+
+import pytest
+
+from template_stats import P2Quantile, RunningStats, TemplateStats
+
+
+def test_running_stats_matches_statistics():
+    rng = random.Random(1)
+    values = [rng.gauss(100, 15) for _ in range(1000)]
+    stats = RunningStats()
+    for x in values:
+        stats.add(x)
+    assert stats.n == 1000
+    assert stats.mean == pytest.approx(statistics.mean(values))
+    assert stats.variance == pytest.approx(statistics.variance(values))
+    assert (stats.min, stats.max) == (min(values), max(values))
+
+
+def test_running_stats_single_value_has_no_variance():
+    stats = RunningStats()
+    stats.add(5.0)
+    assert stats.variance == 0.0 and stats.std == 0.0
+
+
+@pytest.mark.parametrize("p", [0.5, 0.9])
+def test_p2_quantile_tracks_uniform_data(p):
+    rng = random.Random(2)
+    sketch = P2Quantile(p)
+    for _ in range(20000):
+        sketch.add(rng.random())
+    assert sketch.value() == pytest.approx(p, abs=0.02)
+
+
+def test_p2_quantile_before_five_samples():
+    sketch = P2Quantile(0.5)
+    assert sketch.value() == 0.0
+    for x in (30, 10, 20):
+        sketch.add(x)
+    assert sketch.value() == 20
+
+
+def test_template_stats_counts_attempts_to_fix():
+    stats = TemplateStats()
+    for verdict in ("error", "syntax_error", "timeout", "fixed", "ok", "fixed"):
+        stats.add_run(10.0, verdict)
+    assert stats.attempts == 6 and stats.fixes == 2
+    assert stats.attempts_to_fix.mean == 3.0
+    # syntax errors never ran, so they are not timed
+    assert stats.run_ms.n == 5
+    assert stats.error_rate == pytest.approx(2 / 6)